@@ -1,23 +1,76 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, make_response, abort
+from functools import wraps
+import hashlib
 import json
 import webbrowser
 import time
 import os
-from urllib.parse import quote
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.catalogue import Catalogue, load_catalogue, default_catalogue_path, source_fingerprint
+from src.core.games_index import (
+    ConsoleFacets, compute_games_index, default_games_index_path, load_games_index, save_games_index
+)
+from src.core.name_index import NameIndex, normalize_name
+from src.factories.url_factory import URLGeneratorFactory
+from src.utils.rom_info import extract_game_name, analyze_rom_info, get_console_from_rom_path
+from src.utils.result_cache import LRUResultCache
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key'  # Necesario para usar flash
 
-# Ruta al archivo JSON local
-JSON_FILE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'Data', 'TamperMonkeyRetroachievements.json')
+# Ruta al archivo JSON local y a su catálogo binario (ver build_catalogue.py)
+JSON_FILE_PATH = os.path.join(PROJECT_ROOT, 'Data', 'TamperMonkeyRetroachievements.json')
+CATALOGUE_FILE_PATH = default_catalogue_path(JSON_FILE_PATH)
+GAMES_INDEX_FILE_PATH = default_games_index_path(JSON_FILE_PATH)
+
+# Cache HTTP (navegador y CDN de Vercel), cache LRU de resultados y comprobación
+# de cambios del catálogo (ver config.py)
+try:
+    import config
+    BROWSER_CACHE_MAX_AGE = getattr(config, 'BROWSER_CACHE_MAX_AGE', 300)
+    CDN_CACHE_MAX_AGE = getattr(config, 'CDN_CACHE_MAX_AGE', 86400)
+    CDN_LOOKUP_MAX_AGE = getattr(config, 'CDN_LOOKUP_MAX_AGE', 60)
+    RESULT_CACHE_SIZE = getattr(config, 'RESULT_CACHE_SIZE', 2048)
+    RESULT_CACHE_TTL = getattr(config, 'RESULT_CACHE_TTL', 3600)
+    CATALOGUE_CHECK_INTERVAL = getattr(config, 'CATALOGUE_CHECK_INTERVAL', 30)
+    BATCH_LOOKUP_MAX_ITEMS = getattr(config, 'BATCH_LOOKUP_MAX_ITEMS', 500)
+except ImportError:
+    BROWSER_CACHE_MAX_AGE = 300
+    CDN_CACHE_MAX_AGE = 86400
+    CDN_LOOKUP_MAX_AGE = 60
+    RESULT_CACHE_SIZE = 2048
+    RESULT_CACHE_TTL = 3600
+    CATALOGUE_CHECK_INTERVAL = 30
+    BATCH_LOOKUP_MAX_ITEMS = 500
+
+search_results_cache = LRUResultCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+versions_results_cache = LRUResultCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
 
 cached_json_data = None
+cached_catalogue_version = None  # Versión del catálogo usada en los ETag
 cached_games_index = None  # Índice cacheado para listados
+cached_name_index = None  # Índice invertido de nombres (ver build_name_index)
+cached_console_facets = None  # Posiciones y conteos por consola (ver build_console_facets)
+cached_hash_index = None  # Índices hash/juego/versiones (ver build_hash_index)
+cached_files_signature = None  # (tamaño, mtime_ns) del JSON y del catálogo al cargarlos
+last_catalogue_check = 0.0
 
-# Cargar el archivo JSON local
+# Cargar el catálogo binario o, si falta o está desactualizado, el archivo JSON local
 def load_json_file():
-    global cached_json_data
+    global cached_json_data, cached_files_signature
     if cached_json_data is None:
+        cached_files_signature = catalogue_files_signature()
+        # mmap: los workers de gunicorn comparten las páginas del catálogo
+        catalogue = load_catalogue(CATALOGUE_FILE_PATH, JSON_FILE_PATH, use_mmap=True)
+        if catalogue is not None:
+            print(f"Catálogo binario cargado desde {CATALOGUE_FILE_PATH}.")
+            cached_json_data = catalogue
+            return cached_json_data
         try:
             print(f"Cargando JSON desde {JSON_FILE_PATH}...")
             with open(JSON_FILE_PATH, 'r', encoding='utf-8') as file:
@@ -34,334 +87,267 @@ def load_json_file():
             return None
     return cached_json_data
 
+# Tamaño y fecha de modificación del JSON y del catálogo binario (None si no existen)
+def catalogue_files_signature():
+    signature = []
+    for path in (JSON_FILE_PATH, CATALOGUE_FILE_PATH):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+# Recargar el catálogo: descarta datos, índices y caches de resultados
+def reload_catalogue():
+    global cached_json_data, cached_catalogue_version, cached_games_index
+    global cached_name_index, cached_console_facets, cached_hash_index
+    # Sin close(): otras peticiones en curso pueden seguir leyendo el mmap anterior;
+    # se libera cuando deja de usarse
+    cached_json_data = None
+    cached_catalogue_version = None
+    cached_games_index = None
+    cached_name_index = None
+    cached_console_facets = None
+    cached_hash_index = None
+    search_results_cache.clear()
+    versions_results_cache.clear()
+    return load_json_file()
+
+# Antes de cada petición (como mucho cada CATALOGUE_CHECK_INTERVAL segundos): si el
+# JSON o el catálogo cambiaron en disco, recargar para no servir índices ni resultados viejos
+@app.before_request
+def check_catalogue_changed():
+    global last_catalogue_check
+    now = time.monotonic()
+    if cached_json_data is None or now - last_catalogue_check < CATALOGUE_CHECK_INTERVAL:
+        return
+    last_catalogue_check = now
+    if catalogue_files_signature() != cached_files_signature:
+        print("El catálogo cambió en disco; recargando.")
+        reload_catalogue()
+
+# Versión del catálogo: sha256 del JSON de origen (cambia sólo si cambia el catálogo)
+def get_catalogue_version():
+    global cached_catalogue_version
+    if cached_catalogue_version is None:
+        data = load_json_file()
+        if isinstance(data, Catalogue):
+            digest = data.source_sha256
+        else:
+            try:
+                digest = source_fingerprint(JSON_FILE_PATH)[2]
+            except OSError:
+                digest = b''
+        cached_catalogue_version = digest.hex()[:16]
+    return cached_catalogue_version
+
+# Decoradores: ETag versionado por catálogo, Cache-Control y respuestas 304.
+# El ETag depende de la versión del catálogo, la ruta, los parámetros y el cuerpo
+# JSON (si lo hay), por lo que una petición condicional se responde sin recalcular nada.
+# La CDN no revalida hasta que expira s-maxage, así que el TTL largo queda para los
+# listados; las consultas y redirecciones se revalidan siempre en el navegador y
+# duran poco en la CDN, para no servir una URL o un resultado de otro catálogo.
+# Sólo GET/HEAD: las respuestas a POST no llevan ETag ni se guardan en cachés.
+def _catalogue_cache(cache_control):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                response = make_response(view(*args, **kwargs))
+                response.headers['Cache-Control'] = 'no-store'
+                return response
+            params = sorted(request.values.items(multi=True))
+            key = json.dumps([request.path, params, request.get_json(silent=True)], ensure_ascii=False, sort_keys=True)
+            etag = f"{get_catalogue_version()}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}"
+
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code not in (200, 301, 302):
+                    return response  # Los errores no se cachean
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            response.vary.add('Accept-Encoding')
+            return response
+        return wrapper
+    return decorator
+
+# Listados del catálogo
+catalogue_cached = _catalogue_cache(f"public, max-age={BROWSER_CACHE_MAX_AGE}, s-maxage={CDN_CACHE_MAX_AGE}")
+# Consultas (hashes, versiones, búsquedas) y redirecciones de descarga
+catalogue_lookup_cached = _catalogue_cache(f"public, max-age=0, must-revalidate, s-maxage={CDN_LOOKUP_MAX_AGE}")
+
 # Función para contar total de juegos en la base de datos (optimizada)
 def count_total_games(json_data):
     # Simplemente contar el número de IDs únicos de juegos
     return len(json_data) if json_data else 0
 
-# Función para extraer el nombre del juego de la ruta
-def extract_game_name(rom_path):
-    # Extraer nombre del juego usando la carpeta inmediatamente anterior al archivo;
-    # si no es válida (p.ej. !_flycast o consola raíz), usar el nombre del archivo sin extensión.
-    path = rom_path.replace('\\', '/').strip()
-    parts = [p for p in path.split('/') if p]
-    if not parts:
-        return rom_path
-    filename = parts[-1]
-    root = parts[0]
-    folder = parts[-2] if len(parts) >= 2 else ''
-
-    def clean(name: str) -> str:
-        # Quitar extensión y normalizar espacios/guiones bajos
-        base = name.rsplit('.', 1)[0]
-        base = base.replace('_', ' ').strip()
-        # Compactar múltiples espacios
-        return ' '.join(base.split())
-
-    invalid_folder_names = {root.lower(), 'arcade'}
-    is_invalid = (not folder) or folder.lower() in invalid_folder_names or folder.startswith('!_')
-    candidate = folder if not is_invalid else clean(filename)
-    return candidate
-
-# Función para extraer información detallada de un ROM
-def analyze_rom_info(rom_path):
-    parts = rom_path.split('/')
-    filename = parts[-1] if parts else rom_path
-    
-    # Determinar tipo de ROM
-    is_hack = "[Hack]" in filename
-    is_translation = "[T+" in filename
-    is_original = "[!]" in filename
-    
-    # Extraer región
-    region = "Unknown"
-    if "(U)" in filename:
-        region = "USA"
-    elif "(E)" in filename:
-        region = "Europe"
-    elif "(J)" in filename:
-        region = "Japan"
-    elif "(UE)" in filename:
-        region = "USA/Europe"
-    
-    # Determinar prioridad (menor número = mayor prioridad)
-    priority = 0
-    if is_original and not is_hack and not is_translation:
-        priority = 1  # ROMs originales tienen máxima prioridad
-    elif is_original and is_translation:
-        priority = 2  # Traducciones oficiales
-    elif is_hack:
-        priority = 3  # Hacks tienen menor prioridad
-    else:
-        priority = 4  # Otros
-    
-    return {
-        'filename': filename,
-        'region': region,
-        'is_hack': is_hack,
-        'is_translation': is_translation,
-        'is_original': is_original,
-        'priority': priority
-    }
-
-# Deducir consola a partir de la carpeta raíz del rom_path
-def get_console_from_rom_path(rom_path: str) -> str:
-    """Devuelve el nombre canónico de consola a partir de la carpeta raíz.
-    Unifica alias, abreviaturas y variaciones (p.ej. nes/NES, megadriv -> Genesis/Mega Drive, npg -> Neo Geo Pocket).
-    """
-    norm = rom_path.replace('\\', '/').strip()
-    root = norm.split('/', 1)[0] if '/' in norm else norm
-    raw = root.strip()
-
-    # Normalización básica del texto del root
-    t = raw.lower()
-    for ch in ['_', '-', '&', '(', ')', '[', ']', ',', '.']:
-        t = t.replace(ch, ' ')
-    t = ' '.join(t.split())  # compactar espacios
-
-    # Mapa de alias -> nombre canónico
-    aliases = {
-        # Arcade
-        'arcade': 'ARCADE',
-
-        # Nintendo
-        'snes': 'SNES',
-        'snes super famicom': 'SNES',
-        'super nintendo': 'SNES',
-        'nes': 'NES',
-        'nes famicom': 'NES',
-        'nintendo 64': 'N64',
-        'n64': 'N64',
-        'nintendo ds': 'Nintendo DS',
-        'nds': 'Nintendo DS',
-        'game boy': 'Game Boy',
-        'gb': 'Game Boy',
-        'game boy color': 'Game Boy Color',
-        'gbc': 'Game Boy Color',
-        'game boy advance': 'Game Boy Advance',
-        'gba': 'Game Boy Advance',
-
-        # Sega
-        'genesis': 'Genesis/Mega Drive',
-        'mega drive': 'Genesis/Mega Drive',
-        'megadrive': 'Genesis/Mega Drive',
-        'megadriv': 'Genesis/Mega Drive',
-        'md': 'Genesis/Mega Drive',
-        'genesis mega drive': 'Genesis/Mega Drive',
-        'mega drive genesis': 'Genesis/Mega Drive',
-        'sega master system': 'Master System',
-        'master system': 'Master System',
-        'sms': 'Master System',
-        'game gear': 'Game Gear',
-        'gg': 'Game Gear',
-        'sega cd': 'Sega CD',
-        'sega 32x': 'Sega 32X',
-        '32x': 'Sega 32X',
-        'dreamcast': 'Dreamcast',
-        'dc': 'Dreamcast',
-
-        # PlayStation
-        'playstation': 'PS1',
-        'psx': 'PS1',
-        'ps1': 'PS1',
-        'playstation 2': 'PS2',
-        'ps2': 'PS2',
-        'playstation portable': 'PSP',
-        'psp': 'PSP',
-
-        # NEC / PC Engine family
-        'pc engine': 'PC Engine',
-        'pcengine': 'PC Engine',
-        'pce': 'PC Engine',
-        'turbo grafx 16': 'TurboGrafx-16',
-        'turbografx 16': 'TurboGrafx-16',
-        'tg16': 'TurboGrafx-16',
-        'supergrafx': 'SuperGrafx',
-        'super grafx': 'SuperGrafx',
-
-        # SNK Neo Geo Pocket
-        'neo geo pocket': 'Neo Geo Pocket',
-    'npg': 'Neo Geo Pocket',  # posible typo invertido
-    'ngp': 'Neo Geo Pocket',
-        'neo geo pocket color': 'Neo Geo Pocket Color',
-        'ngpc': 'Neo Geo Pocket Color',
-
-        # Atari
-        'atari 2600': 'Atari 2600',
-        'atari 7800': 'Atari 7800',
-        'atari lynx': 'Atari Lynx',
-        'atari jaguar': 'Atari Jaguar',
-
-        # MSX
-        'msx': 'MSX',
-        'msx2': 'MSX2',
-
-        # WonderSwan
-        'wonderswan': 'WonderSwan',
-        'ws': 'WonderSwan',
-        'wonderswan color': 'WonderSwan Color',
-        'wsc': 'WonderSwan Color',
-
-        # Otros
-        '3do': '3DO',
-        'amiga': 'Amiga',
-        'amiga cd32': 'Amiga CD32',
-    # Sega SG-1000
-    'sg 1000': 'SG-1000',
-    'sg1000': 'SG-1000',
-    'sg': 'SG-1000',  # solo si raíz es exactamente "sg", poco probable pero inofensivo
-    'sega 1000': 'SG-1000',
-    'sega1000': 'SG-1000',
-    }
-
-    # Devolver mapeo canónico si existe, si no, devolver la raíz original "bonita"
-    if t in aliases:
-        return aliases[t]
-
-    # Como fallback, capitalizar palabras (evita duplicados por mayúsculas/minúsculas)
-    pretty = ' '.join(w.capitalize() for w in t.split()) if t else raw
-    return pretty or raw
-
-# Construir índice de juegos para listados/filtrado
+# Construir índice de juegos para listados/filtrado.
+# Se lee del archivo auxiliar precalculado (build_catalogue.py); si falta o está
+# desactualizado respecto al JSON, se recalcula y se intenta guardar.
 def build_games_index():
     global cached_games_index
     if cached_games_index is not None:
         return cached_games_index
-    data = load_json_file()
-    if not data:
-        cached_games_index = []
-        return cached_games_index
-    games = []
-    for game_id, hash_list in data.items():
-        game_name = None
-        consoles = set()
-        total_versions = 0
-        sample_rom_path = None
-        for item in hash_list:
-            for _hash, rom_path in item.items():
-                if sample_rom_path is None:
-                    sample_rom_path = rom_path
-                total_versions += 1
-                current_name = extract_game_name(rom_path)
-                if not game_name:
-                    game_name = current_name
-                consoles.add(get_console_from_rom_path(rom_path))
-        games.append({
-            'id': game_id,
-            'name': game_name or f'Game {game_id}',
-            'consoles': sorted(list(consoles)),
-            'versions': total_versions,
-            'sample_rom_path': sample_rom_path
-        })
-    games.sort(key=lambda g: (g['name'] or '').lower())
+    games = load_games_index(GAMES_INDEX_FILE_PATH, JSON_FILE_PATH)
+    if games is None:
+        data = load_json_file()
+        if not data:
+            cached_games_index = []
+            return cached_games_index
+        games = compute_games_index(data)
+        save_games_index(games, GAMES_INDEX_FILE_PATH, JSON_FILE_PATH)
     cached_games_index = games
     return cached_games_index
 
+# Construir índice invertido de nombres sobre el índice de juegos
+def build_name_index():
+    global cached_name_index
+    if cached_name_index is None:
+        cached_name_index = NameIndex(build_games_index())
+    return cached_name_index
+
+# Construir listas por consola y conteos de facetas sobre el índice de juegos
+def build_console_facets():
+    global cached_console_facets
+    if cached_console_facets is None:
+        cached_console_facets = ConsoleFacets(build_games_index())
+    return cached_console_facets
+
 # Función para buscar juegos por nombre (mejorada con múltiples versiones)
-def search_games_by_name(json_data, search_term):
-    search_term = search_term.lower()
+def search_games_by_name(search_term, limit=10):
+    key = (normalize_name(search_term), limit)
+    return search_results_cache.get_or_compute(key, lambda: _search_games_by_name(search_term, limit))
+
+def _search_games_by_name(search_term, limit):
+    query = normalize_name(search_term)
     matching_games = []
-    
-    for game_id, hash_list in json_data.items():
-        if len(matching_games) >= 10:  # Limitar a 10 juegos diferentes
-            break
-            
+    for game in build_name_index().search(search_term, limit=limit):
+        # Sólo las versiones cuyo nombre de ROM contiene la búsqueda (ya ordenadas por prioridad)
+        versions = [
+            version for version in get_versions_for_game(game['id']) or []
+            if query in normalize_name(extract_game_name(version['rom_path']))
+        ]
+        if not versions:
+            continue
+        matching_games.append({
+            'id': game['id'],
+            'name': game['name'],
+            'versions': versions,
+            'primary_version': versions[0],  # La versión de mayor prioridad
+            'total_versions': len(versions)
+        })
+    return matching_games
+
+# Construir índices de búsqueda por hash y por juego (una vez por proceso)
+def build_hash_index():
+    """Devuelve un dict con los índices:
+    - 'rom_path': hash -> rom_path
+    - 'game_id': hash -> game_id
+    - 'versions': game_id -> versiones ordenadas por prioridad
+    """
+    global cached_hash_index
+    if cached_hash_index is not None:
+        return cached_hash_index
+    data = load_json_file()
+    rom_paths = {}
+    game_ids = {}
+    versions_by_game = {}
+    for game_id, hash_list in (data or {}).items():
+        versions = []
         for item in hash_list:
-            versions = []
-            game_name = None
-            
             for hash_key, rom_path in item.items():
-                current_game_name = extract_game_name(rom_path)
-                if not game_name:
-                    game_name = current_game_name
-                
-                if search_term in current_game_name.lower():
-                    rom_info = analyze_rom_info(rom_path)
-                    versions.append({
-                        'hash': hash_key,
-                        'rom_path': rom_path,
-                        'info': rom_info
-                    })
-            
-            if versions and game_name:
-                # Ordenar versiones por prioridad
-                versions.sort(key=lambda x: x['info']['priority'])
-                
-                matching_games.append({
-                    'id': game_id,
-                    'name': game_name,
-                    'versions': versions,
-                    'primary_version': versions[0],  # La versión de mayor prioridad
-                    'total_versions': len(versions)
+                hash_upper = hash_key.upper()
+                # Conservar la primera aparición, igual que el recorrido lineal
+                rom_paths.setdefault(hash_upper, rom_path)
+                game_ids.setdefault(hash_upper, game_id)
+                versions.append({
+                    'hash': hash_key,
+                    'rom_path': rom_path,
+                    'info': analyze_rom_info(rom_path)
                 })
-                break  # Solo tomar el primer resultado por juego
-        
-    return matching_games[:10]  # Asegurar que no se excedan 10 resultados
+        versions.sort(key=lambda x: x['info']['priority'])
+        versions_by_game[game_id] = versions
+    index = {
+        'rom_path': rom_paths,
+        'game_id': game_ids,
+        'versions': versions_by_game
+    }
+    if data:
+        cached_hash_index = index
+    return index
 
 # Función para buscar por hash
 def find_hash_in_json(json_data, hash_value):
-    hash_value = hash_value.upper()
-    print(f"Buscando hash: {hash_value}")  # Log de búsqueda
-    for hash_list in json_data.values():
-        for item in hash_list:
-            if hash_value in item:
-                print(f"Hash encontrado: {item[hash_value]}")  # Log si se encuentra el hash
-                return item[hash_value]
-    print("Hash no encontrado.")  # Log si no se encuentra
-    return None
-
-# Función para obtener la URL de descarga
+    if isinstance(json_data, Catalogue):
+        # Búsqueda binaria sobre el catálogo, sin materializar índices
+        entry = json_data.find_hash(hash_value)
+        return entry[1] if entry else None
+    return build_hash_index()['rom_path'].get(hash_value.strip().upper())
+
+# Función para obtener las versiones de un juego (ordenadas por prioridad)
+def get_versions_for_game(game_id):
+    json_data = load_json_file()
+    if isinstance(json_data, Catalogue):
+        game_id = str(game_id).strip()
+        return versions_results_cache.get_or_compute(game_id, lambda: _catalogue_versions(json_data, game_id))
+    return build_hash_index()['versions'].get(game_id)
+
+def _catalogue_versions(catalogue, game_id):
+    raw_versions = catalogue.game_versions(game_id)
+    if raw_versions is None:
+        return None
+    versions = [
+        {'hash': hash_key, 'rom_path': rom_path, 'info': analyze_rom_info(rom_path)}
+        for hash_key, rom_path in raw_versions
+    ]
+    versions.sort(key=lambda x: x['info']['priority'])
+    return versions
+
+# Función para obtener la URL de descarga (mismas reglas que la consola)
 def get_download_url(rom_path: str) -> str:
-    # Helpers locales (alineados con src/factories/url_factory.py)
-    def _normalize_slashes(path: str) -> str:
-        return path.replace("\\", "/").lstrip("/")
-
-    def _encode_rel_path(path: str) -> str:
-        return quote(path, safe="/-_.")
-
-    def _strip_first_segment_if_matches(path: str, segment: str) -> str:
-        norm = _normalize_slashes(path)
-        if norm.lower().startswith(segment.lower() + "/"):
-            return norm.split("/", 1)[1]
-        return norm
-
-    # Definir los prefix URLs para cada tipo de juego
-    base_urls = {
-        "ARCADE": "https://archive.org/download/fbnarcade-fullnonmerged/arcade/",
-        "SNES": "https://archive.org/download/retroachievements_collection_SNES-Super_Famicom/",
-        "NES": "https://archive.org/download/retroachievements_collection_NES-Famicom/",
-        "PSP": "https://dn720005.ca.archive.org/0/items/retroachievements_collection_PlayStation_Portable/PlayStation%20Portable/",
-        "PS1": "https://archive.org/download/retroachievements_collection_PlayStation/PlayStation/",
-        "PS2_A_M": "https://archive.org/download/retroachievements_collection_PlayStation_2_A-M/PlayStation%202/",
-        "PS2_N_Z": "https://archive.org/download/retroachievements_collection_PlayStation_2_N-Z/PlayStation%202/",
-        "DC": "https://archive.org/download/retroachievements_collection_v5/"
-    }
-
-    # Determinar el tipo de juego a partir del rom_path
-    print(f"Obteniendo URL de descarga para: {rom_path}")  # Log de descarga
-    norm = _normalize_slashes(rom_path)
-
-    if "SNES-Super Famicom" in norm:
-        return base_urls["SNES"] + _encode_rel_path(norm)
-    elif "NES-Famicom" in norm:
-        return base_urls["NES"] + _encode_rel_path(norm)
-    # Arcade: si el primer segmento es 'arcade', quitarlo
-    elif (norm.split("/", 1)[0].lower() == "arcade"):
-        rel = norm.split("/", 1)[1] if "/" in norm else ""
-        return base_urls["ARCADE"] + _encode_rel_path(rel)
-    elif "playstation portable" in norm.lower():
-        rel = _strip_first_segment_if_matches(norm, "PlayStation Portable")
-        return base_urls["PSP"] + _encode_rel_path(rel)
-    elif "playstation 2" in norm.lower():
-        rel = _strip_first_segment_if_matches(norm, "PlayStation 2")
-        game_name = rel.split('/')[-1] if '/' in rel else rel
-        base = base_urls["PS2_A_M"] if (game_name and game_name[0].upper() < 'N') else base_urls["PS2_N_Z"]
-        return base + _encode_rel_path(rel)
-    elif "playstation" in norm.lower():
-        rel = _strip_first_segment_if_matches(norm, "PlayStation")
-        return base_urls["PS1"] + _encode_rel_path(rel)
+    return URLGeneratorFactory.generate_url(rom_path)
+
+# Búsqueda en bloque de hashes: hash -> (game_id, rom_path) o None
+def find_hashes_in_json(json_data, hash_values):
+    if isinstance(json_data, Catalogue):
+        return json_data.find_hashes(hash_values)
+    index = build_hash_index()
+    results = {}
+    for hash_value in hash_values:
+        key = hash_value.strip().upper()
+        rom_path = index['rom_path'].get(key)
+        results[hash_value] = (index['game_id'][key], rom_path) if rom_path else None
+    return results
+
+# Valores de una consulta en bloque: JSON `{json_field: [...]}` o parámetro repetido
+# (`?param=a&param=b`). Devuelve (valores sin duplicados, respuesta de error o None).
+def get_batch_items(json_field, param):
+    body = request.get_json(silent=True)
+    if body is None and request.is_json:
+        return None, ({'success': False, 'message': "El cuerpo de la petición no es un JSON válido."}, 400)
+    if body is not None:
+        if not isinstance(body, dict):
+            return None, ({'success': False,
+                           'message': f"Se esperaba un objeto JSON con la clave '{json_field}'."}, 400)
+        values = body.get(json_field)
+        if not isinstance(values, list):
+            return None, ({'success': False, 'message': f"Se esperaba una lista en '{json_field}'."}, 400)
+        # Sólo textos o enteros (los booleanos también son int en Python)
+        if any(isinstance(value, bool) or not isinstance(value, (str, int)) for value in values):
+            return None, ({'success': False,
+                           'message': f"Los valores de '{json_field}' deben ser textos o números enteros."}, 400)
     else:
-        return base_urls["DC"] + _encode_rel_path(norm)
+        values = request.values.getlist(param)
+    values = list(dict.fromkeys(str(value).strip() for value in values if str(value).strip()))
+    if not values:
+        return None, ({'success': False, 'message': f"No se indicó ningún valor en '{json_field}'."}, 400)
+    if len(values) > BATCH_LOOKUP_MAX_ITEMS:
+        return None, ({'success': False,
+                       'message': f"Máximo {BATCH_LOOKUP_MAX_ITEMS} valores por petición ({len(values)} recibidos)."}, 413)
+    return values, None
 
 @app.route('/')
 def index():
@@ -372,39 +358,41 @@ def index():
 # Página de listado de juegos con filtros
 @app.route('/games')
 def games_page():
-    games = build_games_index()
-    # Consolas disponibles y conteos
-    console_counts = {}
-    for g in games:
-        for c in g['consoles']:
-            console_counts[c] = console_counts.get(c, 0) + 1
-    consoles = sorted(console_counts.items(), key=lambda x: x[0])
-    total = len(games)
-    return render_template('games.html', consoles=consoles, total_games=total)
-
-# API para obtener juegos filtrados/paginados
+    facets = build_console_facets()
+    return render_template('games.html', consoles=facets.counts, total_games=facets.total)
+
+# API para obtener juegos filtrados/paginados.
+# Acepta `page` o bien `cursor` (posición devuelta en `next_cursor`).
 @app.route('/api/games')
+@catalogue_cached
 def api_games():
     games = build_games_index()
-    q = request.args.get('q', '', type=str).strip().lower()
+    facets = build_console_facets()
+    q = request.args.get('q', '', type=str).strip()
     console = request.args.get('console', '', type=str).strip()
     page = max(1, request.args.get('page', 1, type=int))
     page_size = min(400, max(10, request.args.get('page_size', 50, type=int)))
+    cursor = request.args.get('cursor', None, type=int)
 
-    filtered = games
-    if console:
-        c_l = console.lower()
-        filtered = [g for g in filtered if any((cc or '').lower() == c_l for cc in g['consoles'])]
     if q:
-        filtered = [g for g in filtered if q in (g['name'] or '').lower()]
+        # Coincidencias por nombre (índice invertido), filtradas por consola si aplica
+        filtered = build_name_index().matching_positions(q)
+        if console:
+            filtered = [p for p in filtered if facets.has_console(p, console)]
+    else:
+        filtered = facets.positions(console)
 
     total = len(filtered)
     total_pages = (total + page_size - 1) // page_size if page_size else 1
-    if page > total_pages and total_pages > 0:
-        page = total_pages
-    start = (page - 1) * page_size
+    if cursor is not None:
+        start = min(max(0, cursor), total)
+        page = start // page_size + 1
+    else:
+        if page > total_pages and total_pages > 0:
+            page = total_pages
+        start = (page - 1) * page_size
     end = start + page_size
-    items = filtered[start:end]
+    items = [games[p] for p in filtered[start:end]]
 
     return {
         'success': True,
@@ -412,10 +400,12 @@ def api_games():
         'page': page,
         'page_size': page_size,
         'total': total,
-        'total_pages': total_pages
+        'total_pages': total_pages,
+        'next_cursor': end if end < total else None
     }
 
 @app.route('/dl')
+@catalogue_lookup_cached
 def dl_redirect():
     """Redirige al enlace de descarga a partir de un hash."""
     hash_value = request.args.get('hash', '', type=str)
@@ -428,36 +418,81 @@ def dl_redirect():
     url = get_download_url(rom_path)
     return redirect(url)
 
-@app.route('/get_game_versions', methods=['POST'])
-def get_game_versions():
-    game_id = request.form.get('game_id', '')
+# Consulta en bloque de hashes: ROM, juego, consola y URL de descarga de cada uno
+@app.route('/api/lookup/hashes', methods=['GET', 'POST'])
+@catalogue_lookup_cached
+def lookup_hashes():
+    hash_values, error = get_batch_items('hashes', 'hash')
+    if error:
+        return error
     json_data = load_json_file()
+    if not json_data:
+        return {'success': False, 'message': "Error al cargar el archivo JSON local."}, 500
+
+    results = {}
+    for hash_value, entry in find_hashes_in_json(json_data, hash_values).items():
+        if entry is None:
+            results[hash_value] = None
+            continue
+        game_id, rom_path = entry
+        results[hash_value] = {
+            'game_id': game_id,
+            'rom_path': rom_path,
+            'console': get_console_from_rom_path(rom_path),
+            'info': analyze_rom_info(rom_path),
+            'download_url': get_download_url(rom_path)
+        }
+    return {
+        'success': True,
+        'results': results,
+        'found': sum(1 for result in results.values() if result),
+        'missing': [hash_value for hash_value, result in results.items() if result is None]
+    }
+
+# Consulta en bloque de juegos: versiones (ordenadas por prioridad) con su URL de descarga
+@app.route('/api/lookup/games', methods=['GET', 'POST'])
+@catalogue_lookup_cached
+def lookup_games():
+    game_ids, error = get_batch_items('game_ids', 'game_id')
+    if error:
+        return error
+    if not load_json_file():
+        return {'success': False, 'message': "Error al cargar el archivo JSON local."}, 500
+
+    games = {}
+    for game_id in game_ids:
+        versions = get_versions_for_game(game_id)
+        if versions is None:
+            games[game_id] = None
+            continue
+        games[game_id] = {
+            'versions': [dict(version, download_url=get_download_url(version['rom_path'])) for version in versions]
+        }
+    return {
+        'success': True,
+        'games': games,
+        'missing': [game_id for game_id, game in games.items() if game is None]
+    }
+
+@app.route('/get_game_versions', methods=['GET', 'POST'])
+@catalogue_lookup_cached
+def get_game_versions():
+    game_id = request.values.get('game_id', '')
+    versions = get_versions_for_game(game_id)
     
-    if json_data and game_id in json_data:
-        versions = []
-        for item in json_data[game_id]:
-            for hash_key, rom_path in item.items():
-                rom_info = analyze_rom_info(rom_path)
-                versions.append({
-                    'hash': hash_key,
-                    'rom_path': rom_path,
-                    'info': rom_info
-                })
-        
-        # Ordenar por prioridad
-        versions.sort(key=lambda x: x['info']['priority'])
-        
+    if versions is not None:
         return {'success': True, 'versions': versions}
     else:
         return {'success': False, 'versions': []}
 
-@app.route('/search_games', methods=['POST'])
+@app.route('/search_games', methods=['GET', 'POST'])
+@catalogue_lookup_cached
 def search_games():
-    search_term = request.form.get('search_term', '')
+    search_term = request.values.get('search_term', '')
     json_data = load_json_file()
     
     if json_data and search_term:
-        matching_games = search_games_by_name(json_data, search_term)
+        matching_games = search_games_by_name(search_term)
         # Simplificar para el frontend
         simplified_games = []
         for game in matching_games:
@@ -473,9 +508,10 @@ def search_games():
     else:
         return {'success': False, 'games': []}
 
-@app.route('/search', methods=['POST'])
+@app.route('/search', methods=['GET', 'POST'])
+@catalogue_lookup_cached
 def search():
-    search_term = request.form['search_term']
+    search_term = request.values.get('search_term', '')
     json_data = load_json_file()
     
     if json_data:
@@ -496,6 +532,17 @@ def open_browser(download_url):
     flash("El juego se está descargando...", 'success')  # Mensaje de éxito al abrir el navegador
     return redirect(url_for('index'))
 
+# Estadísticas de las caches de resultados (tamaño, aciertos y fallos); sólo en modo debug
+@app.route('/api/cache_stats')
+def cache_stats():
+    if not app.debug:
+        abort(404)
+    return {
+        'success': True,
+        'search': search_results_cache.stats(),
+        'versions': versions_results_cache.stats()
+    }
+
 @app.errorhandler(404)
 def page_not_found(e):
     return render_template('404.html'), 404
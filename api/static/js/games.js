@@ -17,13 +17,45 @@
     renderList(data);
   }
 
-  async function fetchVersions(gameId){
-    const form = new FormData();
-    form.append('game_id', gameId);
-    const res = await fetch('/get_game_versions', { method: 'POST', body: form });
+  // Versiones por juego: se piden en bloque para toda la página (una sola petición)
+  // y se guardan como promesas, así abrir un modal no vuelve a consultar al servidor.
+  const versionsCache = new Map();
+
+  async function fetchVersionsSingle(gameId){
+    // GET para que el navegador y la CDN puedan cachear la respuesta
+    const res = await fetch(`/get_game_versions?game_id=${encodeURIComponent(gameId)}`);
     return await res.json();
   }
 
+  function prefetchVersions(gameIds){
+    const missing = [...new Set(gameIds.filter(id => id && !versionsCache.has(id)))];
+    if (missing.length === 0) return;
+    const batch = fetch('/api/lookup/games', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ game_ids: missing })
+    }).then(res => {
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+      return res.json();
+    });
+    missing.forEach(id => {
+      const entry = batch
+        .then(data => {
+          const game = data.games ? data.games[id] : null;
+          return { success: !!game, versions: game ? game.versions : [] };
+        })
+        .catch(() => { versionsCache.delete(id); return fetchVersionsSingle(id); });
+      versionsCache.set(id, entry);
+    });
+  }
+
+  async function fetchVersions(gameId){
+    if (!versionsCache.has(gameId)){
+      versionsCache.set(gameId, fetchVersionsSingle(gameId).catch(e => { versionsCache.delete(gameId); throw e; }));
+    }
+    return await versionsCache.get(gameId);
+  }
+
   function openModal(id){
     const el = document.getElementById(id);
     if (el){ el.classList.remove('hidden'); el.classList.add('flex'); document.body.classList.add('overflow-hidden'); }
@@ -145,6 +177,8 @@
       list.appendChild(row);
     }
 
+    prefetchVersions(data.items.map(g => (g.id || '').toString()));
+
     const { page, total_pages } = data;
     const btn = (p, label, disabled=false) => `<button ${disabled?'disabled':''} class="px-3 py-1 border rounded ${disabled?'opacity-50 cursor-not-allowed':'hover:bg-gray-100'}" data-page="${p}" aria-label="${label}">${label}</button>`;
     pag.innerHTML = `
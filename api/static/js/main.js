@@ -1,6 +1,7 @@
 class RetroDownloader {
     constructor() {
         this.searchTimeout = null;
+        this.searchRequest = null;
         this.currentSearchMode = 'name';
         this.init();
     }
@@ -99,8 +100,15 @@ class RetroDownloader {
     }
 
     async searchGames(searchTerm) {
+        // Cancelar la búsqueda anterior si el usuario siguió escribiendo
+        if (this.searchRequest) {
+            this.searchRequest.abort();
+        }
+        const request = $.get('/search_games', { search_term: searchTerm });
+        this.searchRequest = request;
+
         try {
-            const response = await $.post('/search_games', { search_term: searchTerm });
+            const response = await request;
             
             if (response.success && response.games.length > 0) {
                 this.displaySearchResults(response.games);
@@ -108,8 +116,13 @@ class RetroDownloader {
                 this.displayNoResults();
             }
         } catch (error) {
+            if (request.statusText === 'abort') return;
             console.error('Search error:', error);
             this.displaySearchError();
+        } finally {
+            if (this.searchRequest === request) {
+                this.searchRequest = null;
+            }
         }
     }
 
@@ -204,7 +217,7 @@ class RetroDownloader {
         this.openModal('versionsModal');
         
         try {
-            const response = await $.post('/get_game_versions', { game_id: gameId });
+            const response = await $.get('/get_game_versions', { game_id: gameId });
             
             if (response.success && response.versions.length > 0) {
                 this.displayVersions(response.versions);
@@ -287,7 +300,7 @@ class RetroDownloader {
         this.showSpinner();
 
         try {
-            const response = await $.post("/search", { search_term: hash });
+            const response = await $.get("/search", { search_term: hash });
             
             if (response.success) {
                 this.setStatus("Descargando...", 'info');
@@ -0,0 +1,43 @@
+"""
+Compila el JSON de RetroAchievements a un catálogo binario compacto y genera
+el índice de juegos precalculado que usa la web.
+Ejecutar cada vez que se actualice Data/TamperMonkeyRetroachievements.json.
+"""
+import argparse
+
+from rich.console import Console
+
+import config
+from src.core.catalogue import build_catalogue, Catalogue
+from src.core.games_index import compute_games_index, default_games_index_path, save_games_index
+
+
+def main():
+    """Función principal para generar el catálogo binario y el índice de juegos."""
+    parser = argparse.ArgumentParser(description="Genera el catálogo binario a partir del JSON.")
+    parser.add_argument("--json", default=config.JSON_FILE_PATH, help="Ruta del JSON de origen")
+    parser.add_argument("--output", default=config.CATALOGUE_FILE_PATH, help="Ruta del catálogo a generar")
+    args = parser.parse_args()
+
+    console = Console()
+    try:
+        path = build_catalogue(args.json, args.output)
+    except Exception as e:
+        console.print(f"[bold red]Error generando el catálogo: {e}[/bold red]")
+        raise SystemExit(1)
+
+    catalogue = Catalogue.open(path)
+    console.print(
+        f"[bold green]Catálogo generado en {path}: "
+        f"{len(catalogue)} juegos, {catalogue.entry_count} hashes.[/bold green]"
+    )
+
+    games_index_path = default_games_index_path(args.json)
+    if save_games_index(compute_games_index(catalogue), games_index_path, args.json):
+        console.print(f"[bold green]Índice de juegos generado en {games_index_path}.[/bold green]")
+    else:
+        console.print(f"[bold red]No se pudo escribir el índice de juegos en {games_index_path}[/bold red]")
+
+
+if __name__ == "__main__":
+    main()
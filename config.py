@@ -2,6 +2,8 @@
 
 ## Rutas de archivos
 JSON_FILE_PATH = "Data/TamperMonkeyRetroachievements.json"
+CATALOGUE_FILE_PATH = "Data/TamperMonkeyRetroachievements.racat"  # Generado con build_catalogue.py
+CATALOGUE_USE_MMAP = True  # Mapear el catálogo en memoria en lugar de leerlo completo
 WANT_TO_PLAY_FILE = "game_hashes.json"
 MISSING_GAMES_FILE = "missing_games.txt"
 ENV_FILE = ".env"
@@ -16,7 +18,7 @@ PREFERRED_REGIONS = {
     "JPN": 5      # Por último Japón
 }
 
-## URLs base para diferentes consolas
+## URLs base para diferentes consolas (las usa src/factories/url_factory.py)
 BASE_URLS = {
     "ARCADE": "https://archive.org/download/fbnarcade-fullnonmerged/arcade/",
     "SNES": "https://archive.org/download/retroachievements_collection_SNES-Super_Famicom/",
@@ -25,9 +27,59 @@ BASE_URLS = {
     "PS1": "https://archive.org/download/retroachievements_collection_PlayStation/PlayStation/",
     "PS2_A_M": "https://archive.org/download/retroachievements_collection_PlayStation_2_A-M/PlayStation%202/",
     "PS2_N_Z": "https://archive.org/download/retroachievements_collection_PlayStation_2_N-Z/PlayStation%202/",
-    "DC": "https://archive.org/download/retroachievements_collection_v5/"
+    "SEGA": "https://archive.org/download/retroachievements_collection_v5/",  # Genesis/Mega Drive y Sega CD
+    "DEFAULT": "https://archive.org/download/retroachievements_collection_v5/"  # Resto de consolas
 }
 
+## Descarga directa (modo lote)
+BATCH_DOWNLOAD_MODE = "http"  # "http": descarga directa a disco; "browser": abre pestañas
+DOWNLOAD_DIR = "downloads"
+DOWNLOAD_MAX_WORKERS = 4  # Descargas simultáneas en total
+DOWNLOAD_MAX_PER_HOST = 2  # Descargas simultáneas por host al empezar
+DOWNLOAD_MAX_PER_HOST_CEILING = 4  # Máximo por host (sube sin errores, baja a la mitad con 429/503)
+DOWNLOAD_HOST_RATE = 2.0  # Peticiones por segundo por host (0 = sin límite)
+DOWNLOAD_HOST_BURST = 4  # Peticiones seguidas permitidas antes de aplicar el ritmo
+DOWNLOAD_RETRY_BASE_DELAY = 1.0  # Segundos; la espera se duplica en cada intento (con jitter)
+DOWNLOAD_RETRY_MAX_DELAY = 60.0  # Segundos
+DOWNLOAD_USE_MIRRORS = True  # Elegir entre los datanodes de archive.org que tienen cada item
+MIRROR_PROBE_TIMEOUT = 5  # Segundos para las consultas HEAD de medición
+MIRROR_METADATA_TTL = 3600  # Segundos que se recuerda la lista de datanodes de un item
+MIRROR_FAILURE_COOLDOWN = 30  # Segundos de cuarentena tras un fallo (se duplica si se repite)
+DOWNLOAD_MANIFEST_FILE = "Data/downloads.sqlite3"  # Registro de ROMs descargadas por hash (None lo desactiva)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes por bloque escrito a disco
+DOWNLOAD_TIMEOUT = 30  # Segundos
+DOWNLOAD_JOURNAL_INTERVAL = 8 * 1024 * 1024  # Bytes entre puntos de reanudación guardados
+DOWNLOAD_SEGMENT_THRESHOLD = 64 * 1024 * 1024  # Archivos mayores se piden por rangos en paralelo
+DOWNLOAD_PIECE_SIZE = 16 * 1024 * 1024  # Tamaño de cada rango
+DOWNLOAD_MIN_SEGMENTS = 2  # Conexiones iniciales por archivo segmentado
+DOWNLOAD_MAX_SEGMENTS = 8  # Máximo de conexiones por archivo (se ajusta según el rendimiento)
+DOWNLOAD_VERIFY_MD5 = True  # Comprobar el MD5 del catálogo mientras se descarga
+DOWNLOAD_VERIFY_ZIP_CONTENT = True  # En .zip, verificar la ROM de dentro (descompresión al vuelo)
+DOWNLOAD_VERIFY_ATTEMPTS = 2  # Descargas totales si el MD5 no coincide (la última se conserva como .mismatch)
+PIPELINE_QUEUE_SIZE = 8  # Elementos en espera entre etapas (resolver, HEAD, descarga)
+PIPELINE_RESOLVE_WORKERS = 2  # Hilos resolviendo juegos de la lista de deseos
+PIPELINE_PROBE_WORKERS = 4  # Consultas HEAD simultáneas para conocer el tamaño
+
+## Escaneo de biblioteca local
+SCAN_WORKERS = None  # Procesos calculando hashes (None = uno por núcleo)
+SCAN_READ_SIZE = 8 * 1024 * 1024  # Bytes por lectura
+SCAN_MMAP_THRESHOLD = 64 * 1024 * 1024  # Archivos mayores se leen con mmap
+SCAN_REPORT_FILE = "scan_report.csv"
+SCAN_HASH_CACHE_FILE = "Data/scan_cache.sqlite3"  # Hashes por (ruta, tamaño, mtime, inodo); None la desactiva
+# SCAN_EXTENSIONS = None  # Descomentar para escanear todos los archivos (por defecto, extensiones de ROM)
+
+## API web (api/index.py)
+BROWSER_CACHE_MAX_AGE = 300  # Segundos de cache en el navegador para los listados
+CDN_CACHE_MAX_AGE = 86400  # Segundos de cache en la CDN para los listados (/api/games)
+CDN_LOOKUP_MAX_AGE = 60  # Segundos en la CDN para consultas y redirecciones (/dl, /search, /api/lookup/*)
+RESULT_CACHE_SIZE = 2048  # Entradas por cache de resultados (búsquedas por nombre y versiones)
+RESULT_CACHE_TTL = 3600  # Segundos de validez de cada resultado cacheado
+CATALOGUE_CHECK_INTERVAL = 30  # Segundos entre comprobaciones de cambios del catálogo en disco
+BATCH_LOOKUP_MAX_ITEMS = 500  # Máximo de hashes o juegos por petición en /api/lookup/*
+
+## Resolución masiva sin interfaz (resolve_hashes.py)
+BULK_RESOLVE_BATCH_SIZE = 5000  # Hashes leídos y resueltos por lote
+
 ## Configuración de validación
 MIN_HASH_LENGTH = 8
-MAX_DOWNLOAD_ATTEMPTS = 5
+MAX_DOWNLOAD_ATTEMPTS = 5  # Intentos por archivo ante errores de red o del servidor
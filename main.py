@@ -16,17 +16,20 @@ def main():
     console.print("\nSeleccione el modo de operación:", style="bold blue")
     console.print("1. Búsqueda directa por hash", style="bold cyan")
     console.print("2. Lista de deseos (Want to Play)", style="bold cyan")
+    console.print("3. Escanear biblioteca local de ROMs", style="bold cyan")
     
     choice = Prompt.ask(
         "Ingrese el número del modo que desea usar", 
-        choices=["1", "2"], 
+        choices=["1", "2", "3"], 
         default="1"
     )
     
     if choice == "1":
         app = RetroAchievementsDownloader(AppMode.DIRECT_HASH)
-    else:
+    elif choice == "2":
         app = RetroAchievementsDownloader(AppMode.WANT_TO_PLAY)
+    else:
+        app = RetroAchievementsDownloader(AppMode.LIBRARY_SCAN)
     
     app.run()
 
@@ -0,0 +1,157 @@
+"""
+Modo sin interfaz - Resolución masiva de hashes.
+Lee hashes (uno por línea) de archivos o de la entrada estándar y escribe, por
+cada uno, el juego, la ROM, la consola y la URL de descarga en NDJSON o CSV.
+
+La entrada se procesa por lotes a medida que llega, así que la memoria no
+depende del número de líneas y la salida se puede encadenar con otras
+herramientas:
+
+    cat hashes.txt | python resolve_hashes.py --only-found > roms.ndjson
+    python resolve_hashes.py lista1.txt lista2.txt --format csv -o roms.csv
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from rich.console import Console
+
+from src.core.data_manager import RetroAchievementsDataManager
+from src.factories.url_factory import URLGeneratorFactory
+from src.utils.rom_info import get_console_from_rom_path
+
+FIELDS = ["hash", "found", "game_id", "rom_path", "console", "url", "error"]
+
+# Mismo criterio que ValidationHelper.is_valid_hash, compilado: se evalúa por cada línea
+_VALID_HASH = re.compile(r"[0-9A-Fa-f]{8,}\Z")
+_JSON = json.JSONEncoder(ensure_ascii=False)  # Un solo codificador para todas las líneas
+
+
+def read_hashes(sources: List[str]) -> Iterator[str]:
+    """Devuelve los hashes de cada fuente ('-' = entrada estándar), línea a línea.
+
+    Se toma el primer campo de cada línea (separado por espacios, comas o
+    tabuladores) y se ignoran las líneas vacías y los comentarios (#).
+    """
+    for source in sources:
+        stream = sys.stdin if source == "-" else open(source, "r", encoding="utf-8", errors="replace")
+        try:
+            for line in stream:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                yield line.replace(",", " ").replace("\t", " ").split(None, 1)[0]
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def batched(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@lru_cache(maxsize=16384)
+def _rom_fields(rom_path: str) -> Tuple[str, str]:
+    """(consola, URL de descarga) de una ROM; las listas grandes repiten muchas."""
+    return get_console_from_rom_path(rom_path), URLGeneratorFactory.generate_url(rom_path)
+
+
+def resolve_batch(data_manager: RetroAchievementsDataManager, hashes: List[str]) -> Iterator[Dict]:
+    """Resuelve un lote contra el catálogo y devuelve un registro por hash, en orden."""
+    valid = {hash_value for hash_value in hashes if _VALID_HASH.match(hash_value)}
+    entries = data_manager.find_hash_entries(valid)
+    for hash_value in hashes:
+        entry = entries.get(hash_value)
+        if entry is None:
+            yield {"hash": hash_value, "found": False, "game_id": None, "rom_path": None,
+                   "console": None, "url": None,
+                   "error": None if hash_value in valid else "hash inválido"}
+            continue
+        game_id, rom_path = entry
+        console_name, url = _rom_fields(rom_path)
+        yield {"hash": hash_value, "found": True, "game_id": game_id, "rom_path": rom_path,
+               "console": console_name, "url": url, "error": None}
+
+
+class RecordWriter:
+    """Escribe registros en NDJSON o CSV sobre un flujo de texto."""
+
+    def __init__(self, stream: TextIO, output_format: str):
+        self.stream = stream
+        self.output_format = output_format
+        self._csv = None
+        if output_format == "csv":
+            self._csv = csv.writer(stream)
+            self._csv.writerow(FIELDS)
+
+    def write(self, record: Dict):
+        if self._csv is not None:
+            self._csv.writerow(["" if record[field] is None else record[field] for field in FIELDS])
+        else:
+            self.stream.write(_JSON.encode(record) + "\n")
+
+
+def main(argv: Optional[List[str]] = None):
+    """Función principal para la resolución masiva de hashes."""
+    try:
+        import config
+        default_batch = getattr(config, "BULK_RESOLVE_BATCH_SIZE", 5000)
+    except ImportError:
+        default_batch = 5000
+
+    parser = argparse.ArgumentParser(description="Resuelve hashes de RetroAchievements sin interfaz interactiva.")
+    parser.add_argument("inputs", nargs="*", default=["-"],
+                        help="Archivos con un hash por línea ('-' o nada = entrada estándar)")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson", help="Formato de salida")
+    parser.add_argument("-o", "--output", default="-", help="Archivo de salida ('-' = salida estándar)")
+    parser.add_argument("--batch-size", type=int, default=default_batch, help="Hashes resueltos por lote")
+    parser.add_argument("--only-found", action="store_true", help="Omitir los hashes que no están en el catálogo")
+    parser.add_argument("--quiet", action="store_true", help="No mostrar el resumen final")
+    args = parser.parse_args(argv)
+
+    # Los mensajes van a stderr: stdout queda sólo para los registros
+    console = Console(stderr=True)
+    data_manager = RetroAchievementsDataManager()
+    data_manager.console = console
+    if not data_manager.load_data():
+        raise SystemExit(1)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    writer = RecordWriter(output, args.format)
+    total = found = 0
+    try:
+        for batch in batched(read_hashes(args.inputs), max(1, args.batch_size)):
+            for record in resolve_batch(data_manager, batch):
+                total += 1
+                found += record["found"]
+                if record["found"] or not args.only_found:
+                    writer.write(record)
+            output.flush()
+    except BrokenPipeError:
+        # El consumidor cerró la tubería (p.ej. `| head`): terminar sin traza
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        raise SystemExit(0)
+    except OSError as e:
+        console.print(f"[bold red]Error de lectura/escritura: {e}[/bold red]")
+        raise SystemExit(1)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if not args.quiet:
+        console.print(f"[bold green]{found}/{total} hashes encontrados en el catálogo.[/bold green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,21 @@
 """
 Aplicación principal que maneja ambos modos de operación.
 """
+import os
 from typing import Optional, List
 from enum import Enum
 
-from .core.interfaces import HashSearchStrategy, GameInfo
-from .strategies.search_strategies import DirectHashSearchStrategy, WantToPlaySearchStrategy
-from .commands.download_commands import OpenInBrowserCommand, BatchDownloadCommand, DisplayURLCommand
+from rich.progress import BarColumn, DownloadColumn, Progress, TextColumn, TimeRemainingColumn
+from rich.table import Table
+
+from .core.interfaces import DownloadCommand, HashSearchStrategy, GameInfo
+from .strategies.search_strategies import (
+    DirectHashSearchStrategy, WantToPlaySearchStrategy, LibraryScanSearchStrategy
+)
+from .core.library_scan import ScanReport
+from .commands.download_commands import (
+    OpenInBrowserCommand, BatchDownloadCommand, PipelineBatchDownloadCommand, DisplayURLCommand
+)
 from .utils.helpers import UIHelper, ValidationHelper
 
 
@@ -14,6 +23,7 @@ class AppMode(Enum):
     """Modos de operación de la aplicación."""
     DIRECT_HASH = "direct_hash"
     WANT_TO_PLAY = "want_to_play"
+    LIBRARY_SCAN = "library_scan"
 
 
 class RetroAchievementsDownloader:
@@ -31,6 +41,8 @@ class RetroAchievementsDownloader:
             self.search_strategy = DirectHashSearchStrategy()
         elif self.mode == AppMode.WANT_TO_PLAY:
             self.search_strategy = WantToPlaySearchStrategy()
+        elif self.mode == AppMode.LIBRARY_SCAN:
+            self.search_strategy = LibraryScanSearchStrategy()
     
     def run(self):
         """Ejecuta la aplicación en el modo configurado."""
@@ -40,6 +52,8 @@ class RetroAchievementsDownloader:
             self._run_direct_hash_mode()
         elif self.mode == AppMode.WANT_TO_PLAY:
             self._run_want_to_play_mode()
+        elif self.mode == AppMode.LIBRARY_SCAN:
+            self._run_library_scan_mode()
     
     def _run_direct_hash_mode(self):
         """Ejecuta el modo de búsqueda directa por hash."""
@@ -94,6 +108,67 @@ class RetroAchievementsDownloader:
         else:
             self._process_single_game(selected_game)
     
+    def _run_library_scan_mode(self):
+        """Ejecuta el modo de escaneo de la biblioteca local."""
+        self.ui_helper.display_info_message("Modo: Escaneo de biblioteca local")
+        
+        directory = self.ui_helper.get_directory_input()
+        if directory is None:
+            return
+        if not os.path.isdir(directory):
+            self.ui_helper.display_error_message(f"No existe el directorio: {directory}")
+            return
+        
+        with Progress(
+            TextColumn("[bold blue]Escaneando"), BarColumn(), DownloadColumn(),
+            TextColumn("{task.fields[files]}"), TimeRemainingColumn()
+        ) as progress:
+            task = progress.add_task("scan", total=None, files="")
+            
+            def on_progress(files, done, total_files, total_bytes):
+                progress.update(task, completed=done, total=total_bytes,
+                                files=f"{files}/{total_files} archivos")
+            
+            report = self.search_strategy.scan(directory, on_progress)
+        
+        self._show_scan_report(report)
+    
+    def _show_scan_report(self, report: ScanReport):
+        """Muestra el resumen del escaneo y guarda el informe completo."""
+        speed = report.hashed_bytes / report.elapsed / (1024 * 1024) if report.elapsed else 0
+        self.ui_helper.display_success_message(
+            f"{report.files} archivos escaneados ({report.bytes / (1024 ** 3):.2f} GB "
+            f"en {report.elapsed:.1f} s, lectura a {speed:.0f} MB/s)"
+        )
+        self.ui_helper.display_info_message(
+            f"⚡ Caché de hashes: {report.cache_hits} sin cambios, {report.cache_misses} leídos "
+            f"({report.hashed_bytes / (1024 ** 3):.2f} GB)"
+        )
+        self.ui_helper.display_info_message(
+            f"✅ Con logros: {len(report.matches)}  ❔ Sin coincidencia: {len(report.unmatched)}  "
+            f"❌ Errores: {len(report.errors)}"
+        )
+        
+        by_console = report.matches_by_console()
+        if by_console:
+            table = Table(title="ROMs compatibles por consola")
+            table.add_column("Consola")
+            table.add_column("ROMs", justify="right")
+            for console_name, count in by_console.items():
+                table.add_row(console_name, str(count))
+            self.ui_helper.console.print(table)
+        
+        try:
+            import config
+            report_file = getattr(config, "SCAN_REPORT_FILE", "scan_report.csv")
+        except ImportError:
+            report_file = "scan_report.csv"
+        try:
+            report.write_csv(report_file)
+            self.ui_helper.display_info_message(f"Informe completo guardado en {report_file}")
+        except OSError as e:
+            self.ui_helper.display_error_message(f"No se pudo guardar el informe: {e}")
+    
     def _process_single_game(self, game_name: str):
         """Procesa un solo juego."""
         game_info = self.search_strategy.search(game_name)
@@ -106,20 +181,34 @@ class RetroAchievementsDownloader:
     
     def _process_all_games(self, game_names: List[str]):
         """Procesa todos los juegos de una consola."""
-        games_info = []
+        command = self._create_batch_command(game_names)
+        if command:
+            command.execute()
+        else:
+            self.ui_helper.display_error_message("No se pudieron procesar los juegos seleccionados.")
+    
+    def _batch_mode(self) -> str:
+        """Modo de descarga en lote (config.BATCH_DOWNLOAD_MODE)."""
+        try:
+            import config
+            return getattr(config, "BATCH_DOWNLOAD_MODE", "http")
+        except ImportError:
+            return "http"
+    
+    def _create_batch_command(self, game_names: List[str]) -> Optional[DownloadCommand]:
+        """Crea el comando de lote según config.BATCH_DOWNLOAD_MODE."""
+        if self._batch_mode() != "browser":
+            # Resolución y descarga solapadas en un pipeline asíncrono
+            return PipelineBatchDownloadCommand(game_names, self.search_strategy.search)
         
+        games_info = []
         for game_name in game_names:
             game_info = self.search_strategy.search(game_name)
             if game_info:
                 games_info.append(game_info)
             else:
                 self.ui_helper.display_error_message(f"No se pudo procesar: {game_name}")
-        
-        if games_info:
-            command = BatchDownloadCommand(games_info)
-            command.execute()
-        else:
-            self.ui_helper.display_error_message("No se pudieron procesar los juegos seleccionados.")
+        return BatchDownloadCommand(games_info) if games_info else None
     
     def search_hash(self, hash_value: str) -> Optional[GameInfo]:
         """Busca un hash específico (API pública)."""
@@ -140,3 +229,8 @@ def create_direct_hash_app() -> RetroAchievementsDownloader:
 def create_want_to_play_app() -> RetroAchievementsDownloader:
     """Crea una instancia de la app en modo lista de deseos."""
     return RetroAchievementsDownloader(AppMode.WANT_TO_PLAY)
+
+
+def create_library_scan_app() -> RetroAchievementsDownloader:
+    """Crea una instancia de la app en modo escaneo de biblioteca."""
+    return RetroAchievementsDownloader(AppMode.LIBRARY_SCAN)
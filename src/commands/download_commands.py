@@ -1,11 +1,15 @@
 """
 Comandos para operaciones de descarga.
 """
+import asyncio
 import webbrowser
-from typing import List
+from typing import Callable, List, Optional
 from rich.console import Console
 
 from ..core.interfaces import DownloadCommand, GameInfo
+from ..core.downloader import HTTPDownloader, DownloadTask, DownloadResult, destination_for
+from ..core.manifest import DownloadManifest
+from ..core.pipeline import BatchPipeline
 from ..factories.url_factory import URLGeneratorFactory
 
 
@@ -88,6 +92,170 @@ class BatchDownloadCommand(DownloadCommand):
             self.console.print(f"[bold red]Error guardando lista de juegos faltantes: {e}[/bold red]")
 
 
+class HTTPBatchDownloadCommand(BatchDownloadCommand):
+    """Comando para descarga en lote directa a disco (sin navegador)."""
+    
+    def __init__(self, games: List[GameInfo], download_dir: str = None,
+                 downloader: HTTPDownloader = None):
+        super().__init__(games)
+        try:
+            import config
+        except ImportError:
+            config = None
+        self.download_dir = download_dir or getattr(config, "DOWNLOAD_DIR", "downloads")
+        # El manifiesto sólo se abre (y se cierra al terminar) si el downloader es propio
+        manifest_file = getattr(config, "DOWNLOAD_MANIFEST_FILE", None)
+        self.manifest = DownloadManifest(manifest_file) if manifest_file and downloader is None else None
+        self.downloader = downloader or HTTPDownloader(
+            max_workers=getattr(config, "DOWNLOAD_MAX_WORKERS", 4),
+            max_per_host=getattr(config, "DOWNLOAD_MAX_PER_HOST", 2),
+            chunk_size=getattr(config, "DOWNLOAD_CHUNK_SIZE", 1024 * 1024),
+            timeout=getattr(config, "DOWNLOAD_TIMEOUT", 30),
+            journal_interval=getattr(config, "DOWNLOAD_JOURNAL_INTERVAL", 8 * 1024 * 1024),
+            segment_threshold=getattr(config, "DOWNLOAD_SEGMENT_THRESHOLD", 64 * 1024 * 1024),
+            piece_size=getattr(config, "DOWNLOAD_PIECE_SIZE", 16 * 1024 * 1024),
+            min_segments=getattr(config, "DOWNLOAD_MIN_SEGMENTS", 2),
+            max_segments=getattr(config, "DOWNLOAD_MAX_SEGMENTS", 8),
+            verify=getattr(config, "DOWNLOAD_VERIFY_MD5", True),
+            verify_zip_content=getattr(config, "DOWNLOAD_VERIFY_ZIP_CONTENT", True),
+            verify_attempts=getattr(config, "DOWNLOAD_VERIFY_ATTEMPTS", 2),
+            max_attempts=getattr(config, "MAX_DOWNLOAD_ATTEMPTS", 5),
+            max_per_host_ceiling=getattr(config, "DOWNLOAD_MAX_PER_HOST_CEILING", 4),
+            requests_per_second=getattr(config, "DOWNLOAD_HOST_RATE", 2.0),
+            request_burst=getattr(config, "DOWNLOAD_HOST_BURST", 4),
+            retry_base_delay=getattr(config, "DOWNLOAD_RETRY_BASE_DELAY", 1.0),
+            retry_max_delay=getattr(config, "DOWNLOAD_RETRY_MAX_DELAY", 60.0),
+            use_mirrors=getattr(config, "DOWNLOAD_USE_MIRRORS", True),
+            mirror_probe_timeout=getattr(config, "MIRROR_PROBE_TIMEOUT", 5),
+            mirror_metadata_ttl=getattr(config, "MIRROR_METADATA_TTL", 3600),
+            mirror_cooldown=getattr(config, "MIRROR_FAILURE_COOLDOWN", 30),
+            manifest=self.manifest,
+        )
+    
+    def _build_tasks(self) -> List[DownloadTask]:
+        urls = URLGeneratorFactory.generate_urls(game.rom_path for game in self.games)
+        return [
+            DownloadTask(url=url, destination=destination_for(game.rom_path, self.download_dir), game=game)
+            for game, url in zip(self.games, urls)
+        ]
+    
+    def _report(self, result: DownloadResult):
+        game = result.task.game
+        if result.linked_from:
+            self.console.print(f"🔗 {game.name} enlazado desde {result.linked_from}")
+        elif result.skipped:
+            self.console.print(f"⏭️  {game.name} ya estaba descargado")
+        elif result.success:
+            resumed = (
+                f", reanudado desde {result.resumed_from / (1024 * 1024):.1f} MB" if result.resumed_from else ""
+            )
+            verified = ", MD5 verificado" if result.verified else ""
+            self.console.print(
+                f"✅ {game.name} descargado ({result.bytes_written / (1024 * 1024):.1f} MB{resumed}{verified})"
+            )
+        elif result.cancelled:
+            self.console.print(f"⏸️  {game.name} interrumpido (se reanudará en la próxima ejecución)")
+        else:
+            self.missing_games.append(game.name)
+            self.console.print(f"❌ Error descargando {game.name}: {result.error}")
+    
+    def _close_manifest(self):
+        if self.manifest is not None:
+            self.manifest.close()
+            self.manifest = None
+    
+    def execute(self) -> bool:
+        """Ejecuta la descarga en lote."""
+        tasks = self._build_tasks()
+        self.console.print(
+            f"[bold blue]Descargando {len(tasks)} juegos en {self.download_dir}...[/bold blue]"
+        )
+        
+        try:
+            with self.downloader:
+                results = self.downloader.download_all(tasks, on_result=self._report)
+        finally:
+            self._close_manifest()
+        success_count = sum(1 for result in results if result.success)
+        
+        if self.missing_games:
+            self._save_missing_games()
+        
+        self.console.print(
+            f"[bold green]Proceso completado: {success_count}/{len(self.games)} juegos descargados[/bold green]"
+        )
+        
+        return success_count > 0
+
+
+class PipelineBatchDownloadCommand(HTTPBatchDownloadCommand):
+    """Descarga en lote que resuelve y descarga a la vez (pipeline asíncrono).
+
+    Recibe nombres de la lista de deseos en vez de juegos ya resueltos: la
+    primera descarga empieza mientras se resuelven los siguientes.
+    """
+    
+    def __init__(self, game_names: List[str], resolve: Callable[[str], Optional[GameInfo]],
+                 download_dir: str = None, downloader: HTTPDownloader = None):
+        super().__init__([], download_dir, downloader)
+        self.game_names = game_names
+        self.resolve = resolve
+        try:
+            import config
+        except ImportError:
+            config = None
+        self.queue_size = getattr(config, "PIPELINE_QUEUE_SIZE", 8)
+        self.resolve_workers = getattr(config, "PIPELINE_RESOLVE_WORKERS", 2)
+        self.probe_workers = getattr(config, "PIPELINE_PROBE_WORKERS", 4)
+    
+    def _report_unresolved(self, name: str):
+        self.missing_games.append(name)
+        self.console.print(f"[bold red]No se pudo procesar: {name}[/bold red]")
+    
+    def execute(self) -> bool:
+        """Ejecuta el pipeline hasta terminar o hasta que el usuario lo interrumpa."""
+        self.console.print(
+            f"[bold blue]Descargando {len(self.game_names)} juegos en {self.download_dir}...[/bold blue]"
+        )
+        pipeline = BatchPipeline(
+            self.resolve, self.downloader, self.download_dir,
+            queue_size=self.queue_size,
+            resolve_workers=self.resolve_workers,
+            probe_workers=self.probe_workers,
+            on_unresolved=self._report_unresolved,
+            on_result=self._report
+        )
+        interrupted = False
+        with self.downloader:
+            try:
+                asyncio.run(pipeline.run(self.game_names))
+            except KeyboardInterrupt:
+                interrupted = True
+                self.downloader.cancel()
+            except Exception as e:
+                # Error en una etapa del pipeline: se guarda lo pendiente igualmente
+                interrupted = True
+                self.console.print(f"[bold red]Error en la descarga en lote: {e}[/bold red]")
+            finally:
+                self._close_manifest()
+        results = pipeline.results
+        success_count = sum(1 for result in results if result.success)
+        
+        if self.missing_games:
+            self._save_missing_games()
+        
+        if interrupted:
+            self.console.print(
+                "[bold yellow]Descarga interrumpida: los archivos parciales se reanudarán "
+                "en la próxima ejecución[/bold yellow]"
+            )
+        self.console.print(
+            f"[bold green]Proceso completado: {success_count}/{len(self.game_names)} juegos descargados[/bold green]"
+        )
+        
+        return success_count > 0
+
+
 class DisplayURLCommand(DownloadCommand):
     """Comando para mostrar URL sin abrir navegador."""
     
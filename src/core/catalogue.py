@@ -0,0 +1,346 @@
+"""
+Catálogo binario compacto de RetroAchievements.
+
+Compila el JSON `{game_id: [{hash: rom_path, ...}]}` a un archivo binario que
+se puede leer sin `json.load`. Estructura (little-endian):
+
+    cabecera      magic, versión, n_juegos, n_entradas, tamaño/mtime/sha256 del JSON
+    juegos        n_juegos x (id_off, id_len, primera_entrada, n_entradas)
+    orden_juegos  n_juegos x índice de juego, ordenados por game_id
+    entradas      n_entradas x (hash 16 bytes, path_off, path_len)
+    claves        n_entradas x hash de 16 bytes, ordenados
+    clave_entrada n_entradas x índice de entrada para cada clave ordenada
+    cadenas       ids de juego y rom_paths en UTF-8
+
+Las entradas de cada juego son contiguas (rango por juego) y conservan el
+orden del JSON original. El lector puede trabajar sobre `bytes` o sobre un
+`mmap` del archivo: las búsquedas son binarias sobre las claves crudas y los
+rom_paths sólo se decodifican al devolverlos.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"RACATLG\0"
+VERSION = 1
+CATALOGUE_SUFFIX = ".racat"
+
+_HEADER = struct.Struct("<8sIIIQQ32s")
+_GAME = struct.Struct("<IIII")
+_INDEX = struct.Struct("<I")
+_ENTRY = struct.Struct("<16sII")
+_KEY_SIZE = 16
+
+
+def default_catalogue_path(json_file_path: str) -> str:
+    """Ruta del catálogo binario asociado a un JSON (misma ruta, otra extensión)."""
+    return str(Path(json_file_path).with_suffix(CATALOGUE_SUFFIX))
+
+
+def _file_sha256(path: str) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def source_fingerprint(json_file_path: str) -> Tuple[int, int, bytes]:
+    """Huella del JSON de origen: (tamaño, mtime_ns, sha256)."""
+    stat = os.stat(json_file_path)
+    return stat.st_size, stat.st_mtime_ns, _file_sha256(json_file_path)
+
+
+def source_matches(json_file_path: str, size: int, mtime_ns: int, sha256: bytes) -> bool:
+    """Indica si el JSON actual coincide con una huella guardada."""
+    try:
+        stat = os.stat(json_file_path)
+    except FileNotFoundError:
+        return True  # Sin JSON, el artefacto generado es la única fuente
+    if stat.st_size != size:
+        return False
+    if stat.st_mtime_ns == mtime_ns:
+        return True
+    # Mismo tamaño pero otro mtime (p.ej. tras un checkout): comparar contenido
+    return _file_sha256(json_file_path) == sha256
+
+
+def build_catalogue(json_file_path: str, catalogue_path: Optional[str] = None) -> str:
+    """Compila el JSON a un catálogo binario. Devuelve la ruta generada."""
+    if catalogue_path is None:
+        catalogue_path = default_catalogue_path(json_file_path)
+
+    source_size, source_mtime_ns, source_sha256 = source_fingerprint(json_file_path)
+    with open(json_file_path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+
+    strings = bytearray()
+
+    def add_string(value: str) -> Tuple[int, int]:
+        raw = value.encode("utf-8")
+        offset = len(strings)
+        strings.extend(raw)
+        return offset, len(raw)
+
+    games = []
+    entries = []
+    for game_id, hash_list in data.items():
+        id_off, id_len = add_string(str(game_id))
+        first_entry = len(entries)
+        for item in hash_list:
+            for hash_key, rom_path in item.items():
+                try:
+                    key = bytes.fromhex(hash_key)
+                except ValueError:
+                    key = b""
+                if len(key) != _KEY_SIZE:
+                    raise ValueError(f"Hash no válido para el catálogo: {hash_key!r}")
+                path_off, path_len = add_string(rom_path)
+                entries.append((key, path_off, path_len))
+        games.append((id_off, id_len, first_entry, len(entries) - first_entry, str(game_id)))
+
+    game_order = sorted(range(len(games)), key=lambda i: games[i][4].encode("utf-8"))
+    # Orden estable: ante hashes repetidos gana la primera aparición
+    key_order = sorted(range(len(entries)), key=lambda i: entries[i][0])
+
+    out = bytearray(_HEADER.pack(
+        MAGIC, VERSION, len(games), len(entries),
+        source_size, source_mtime_ns, source_sha256
+    ))
+    for id_off, id_len, first_entry, count, _ in games:
+        out += _GAME.pack(id_off, id_len, first_entry, count)
+    for index in game_order:
+        out += _INDEX.pack(index)
+    for key, path_off, path_len in entries:
+        out += _ENTRY.pack(key, path_off, path_len)
+    for index in key_order:
+        out += entries[index][0]
+    for index in key_order:
+        out += _INDEX.pack(index)
+    out += strings
+
+    tmp_path = catalogue_path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(out)
+    os.replace(tmp_path, catalogue_path)
+    return catalogue_path
+
+
+class Catalogue(Mapping):
+    """Vista de solo lectura del catálogo binario.
+
+    Se comporta como el dict del JSON original (`game_id -> [{hash: rom_path}]`),
+    decodificando cada juego sólo cuando se accede a él.
+    """
+
+    def __init__(self, buffer):
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Catálogo truncado")
+        (magic, version, self.game_count, self.entry_count,
+         self.source_size, self.source_mtime_ns, self.source_sha256) = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Formato de catálogo no reconocido")
+
+        self._buffer = buffer
+        self._games_off = _HEADER.size
+        self._order_off = self._games_off + self.game_count * _GAME.size
+        self._entries_off = self._order_off + self.game_count * _INDEX.size
+        self._keys_off = self._entries_off + self.entry_count * _ENTRY.size
+        self._key_entry_off = self._keys_off + self.entry_count * _KEY_SIZE
+        self._strings_off = self._key_entry_off + self.entry_count * _INDEX.size
+        if self._strings_off > len(buffer):
+            raise ValueError("Catálogo truncado")
+        self._bulk = None  # Índices para búsquedas en bloque, creados en la primera
+
+    @classmethod
+    def open(cls, catalogue_path: str, use_mmap: bool = False) -> "Catalogue":
+        """Abre un catálogo. Con `use_mmap` el archivo se mapea en vez de leerse,
+        de modo que varios procesos comparten las mismas páginas en memoria."""
+        with open(catalogue_path, "rb") as file:
+            if not use_mmap:
+                return cls(file.read())
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(buffer)
+        except ValueError:
+            buffer.close()
+            raise
+
+    def close(self):
+        """Libera el mapeo de memoria (si lo hay)."""
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def is_fresh(self, json_file_path: str) -> bool:
+        """Indica si el catálogo corresponde al JSON actual."""
+        return source_matches(json_file_path, self.source_size, self.source_mtime_ns, self.source_sha256)
+
+    # --- Acceso de bajo nivel -------------------------------------------------
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_off + offset
+        return bytes(self._buffer[start:start + length]).decode("utf-8")
+
+    def _game(self, index: int) -> Tuple[int, int, int, int]:
+        return _GAME.unpack_from(self._buffer, self._games_off + index * _GAME.size)
+
+    def _game_id(self, index: int) -> str:
+        id_off, id_len, _, _ = self._game(index)
+        return self._string(id_off, id_len)
+
+    def _entry(self, index: int) -> Tuple[str, str]:
+        key, path_off, path_len = _ENTRY.unpack_from(self._buffer, self._entries_off + index * _ENTRY.size)
+        return key.hex().upper(), self._string(path_off, path_len)
+
+    def _find_game(self, game_id: str) -> Optional[int]:
+        target = game_id.encode("utf-8")
+        lo, hi = 0, self.game_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            index = _INDEX.unpack_from(self._buffer, self._order_off + mid * _INDEX.size)[0]
+            id_off, id_len, _, _ = self._game(index)
+            start = self._strings_off + id_off
+            current = bytes(self._buffer[start:start + id_len])
+            if current < target:
+                lo = mid + 1
+            elif current > target:
+                hi = mid
+            else:
+                return index
+        return None
+
+    def _find_entry(self, key: bytes) -> Optional[int]:
+        lo, hi = 0, self.entry_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self._keys_off + mid * _KEY_SIZE
+            if self._buffer[start:start + _KEY_SIZE] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.entry_count:
+            start = self._keys_off + lo * _KEY_SIZE
+            if self._buffer[start:start + _KEY_SIZE] == key:
+                return _INDEX.unpack_from(self._buffer, self._key_entry_off + lo * _INDEX.size)[0]
+        return None
+
+    def _game_of_entry(self, entry_index: int) -> int:
+        # Los rangos por juego son contiguos y crecientes: búsqueda binaria
+        lo, hi = 0, self.game_count - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self._game(mid)[2] <= entry_index:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    # --- API pública -----------------------------------------------------------
+
+    def find_hash(self, hash_value: str) -> Optional[Tuple[str, str]]:
+        """Busca un hash y devuelve (game_id, rom_path) o None."""
+        try:
+            key = bytes.fromhex(hash_value.strip())
+        except ValueError:
+            return None
+        if len(key) != _KEY_SIZE:
+            return None
+        entry_index = self._find_entry(key)
+        if entry_index is None:
+            return None
+        _, rom_path = self._entry(entry_index)
+        return self._game_id(self._game_of_entry(entry_index)), rom_path
+
+    def _bulk_index(self) -> Tuple[Dict[bytes, int], List[int], Dict[int, str]]:
+        """Índices para `find_hashes`: clave -> entrada, entrada -> juego y caché de ids.
+
+        Se leen las tablas de claves y de juegos de una sola pasada; compensa en
+        cuanto un lote tiene unos cientos de hashes.
+        """
+        if self._bulk is None:
+            keys = bytes(self._buffer[self._keys_off:self._key_entry_off])
+            key_entries = [index for (index,) in _INDEX.iter_unpack(
+                self._buffer[self._key_entry_off:self._strings_off])]
+            key_index = {
+                keys[i * _KEY_SIZE:(i + 1) * _KEY_SIZE]: key_entries[i] for i in range(self.entry_count)
+            }
+            entry_games = [0] * self.entry_count
+            games = self._buffer[self._games_off:self._order_off]
+            for game, (_, _, first_entry, count) in enumerate(_GAME.iter_unpack(games)):
+                entry_games[first_entry:first_entry + count] = [game] * count
+            self._bulk = (key_index, entry_games, {})
+        return self._bulk
+
+    def find_hashes(self, hash_values) -> Dict[str, Optional[Tuple[str, str]]]:
+        """Busca varios hashes de una vez. Devuelve hash -> (game_id, rom_path) o None."""
+        key_index, entry_games, game_ids = self._bulk_index()
+        results = {}
+        for hash_value in hash_values:
+            try:
+                entry_index = key_index.get(bytes.fromhex(hash_value.strip()))
+            except ValueError:
+                entry_index = None
+            if entry_index is None:
+                results[hash_value] = None
+                continue
+            game = entry_games[entry_index]
+            game_id = game_ids.get(game)
+            if game_id is None:
+                game_id = game_ids[game] = self._game_id(game)
+            results[hash_value] = game_id, self._entry(entry_index)[1]
+        return results
+
+    def game_versions(self, game_id: str) -> Optional[List[Tuple[str, str]]]:
+        """Devuelve la lista (hash, rom_path) de un juego, en el orden original."""
+        index = self._find_game(str(game_id))
+        if index is None:
+            return None
+        _, _, first_entry, count = self._game(index)
+        return [self._entry(i) for i in range(first_entry, first_entry + count)]
+
+    def items(self) -> Iterator[Tuple[str, List[Dict[str, str]]]]:
+        """Recorre los juegos en el orden del JSON original."""
+        for index in range(self.game_count):
+            id_off, id_len, first_entry, count = self._game(index)
+            hashes = dict(self._entry(i) for i in range(first_entry, first_entry + count))
+            yield self._string(id_off, id_len), [hashes]
+
+    def values(self) -> Iterator[List[Dict[str, str]]]:
+        for _, hash_list in self.items():
+            yield hash_list
+
+    # --- Protocolo Mapping ----------------------------------------------------
+
+    def __getitem__(self, game_id: str) -> List[Dict[str, str]]:
+        versions = self.game_versions(game_id)
+        if versions is None:
+            raise KeyError(game_id)
+        return [dict(versions)]
+
+    def __contains__(self, game_id) -> bool:
+        return isinstance(game_id, str) and self._find_game(game_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self.game_count):
+            yield self._game_id(index)
+
+    def __len__(self) -> int:
+        return self.game_count
+
+
+def load_catalogue(catalogue_path: str, json_file_path: Optional[str] = None,
+                   use_mmap: bool = False) -> Optional[Catalogue]:
+    """Abre el catálogo si existe, es válido y no está desactualizado respecto al JSON."""
+    try:
+        catalogue = Catalogue.open(catalogue_path, use_mmap=use_mmap)
+    except (OSError, ValueError, struct.error):
+        return None
+    if json_file_path and not catalogue.is_fresh(json_file_path):
+        catalogue.close()
+        return None
+    return catalogue
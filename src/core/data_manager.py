@@ -2,11 +2,13 @@
 Singleton para el manejo de datos JSON de RetroAchievements.
 """
 import json
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, Iterable, Tuple
 from pathlib import Path
 from rich.console import Console
 
 from .interfaces import DataProvider
+from .catalogue import Catalogue, load_catalogue, default_catalogue_path
 
 
 class RetroAchievementsDataManager(DataProvider):
@@ -14,55 +16,121 @@ class RetroAchievementsDataManager(DataProvider):
     
     _instance = None
     _data = None
+    _hash_index = None  # hash (mayúsculas) -> (game_id, rom_path)
+    _generation = 0  # Aumenta con cada carga de datos (ver data_generation)
+    _load_lock = threading.RLock()  # Una sola carga aunque la pidan varios hilos
     
     def __new__(cls, json_file_path: str = None):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            try:
+                import config
+                cls._instance.use_mmap = getattr(config, "CATALOGUE_USE_MMAP", True)
+            except ImportError:
+                cls._instance.use_mmap = True
             # Usar configuración centralizada si no se especifica path
             if json_file_path is None:
                 try:
                     import config
                     cls._instance.json_file_path = config.JSON_FILE_PATH
-                except ImportError:
+                    cls._instance.catalogue_file_path = config.CATALOGUE_FILE_PATH
+                except (ImportError, AttributeError):
                     cls._instance.json_file_path = "Data/TamperMonkeyRetroachievements.json"
+                    cls._instance.catalogue_file_path = default_catalogue_path(cls._instance.json_file_path)
             else:
                 cls._instance.json_file_path = json_file_path
+                cls._instance.catalogue_file_path = default_catalogue_path(json_file_path)
             cls._instance.console = Console()
         return cls._instance
     
     def load_data(self) -> Optional[Dict[str, Any]]:
-        """Carga los datos del archivo JSON si no están ya cargados."""
+        """Carga los datos (catálogo binario o, si no hay, el JSON) si no están ya cargados.
+
+        Se puede llamar desde varios hilos: sólo uno de ellos hace la carga.
+        """
         if self._data is None:
-            try:
-                with open(self.json_file_path, 'r', encoding='utf-8') as file:
-                    self._data = json.load(file)
-                self.console.print("[bold green]Datos JSON cargados exitosamente.[/bold green]")
-            except FileNotFoundError:
-                self.console.print(f"[bold red]Archivo JSON no encontrado: {self.json_file_path}[/bold red]")
-                return None
-            except json.JSONDecodeError as e:
-                self.console.print(f"[bold red]Error al decodificar el archivo JSON: {e}[/bold red]")
-                return None
-            except Exception as e:
-                self.console.print(f"[bold red]Error al cargar el archivo JSON: {e}[/bold red]")
-                return None
-        
+            with self._load_lock:
+                if self._data is None:
+                    self._load()
         return self._data
     
+    def _load(self):
+        catalogue = load_catalogue(self.catalogue_file_path, self.json_file_path, use_mmap=self.use_mmap)
+        if catalogue is not None:
+            self._data = catalogue
+            self._generation += 1
+            self.console.print("[bold green]Catálogo binario cargado exitosamente.[/bold green]")
+            return
+        try:
+            with open(self.json_file_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            self._hash_index = self._build_hash_index(data)
+            self._data = data  # Al final: otros hilos lo ven ya con su índice
+            self._generation += 1
+            self.console.print("[bold green]Datos JSON cargados exitosamente.[/bold green]")
+        except FileNotFoundError:
+            self.console.print(f"[bold red]Archivo JSON no encontrado: {self.json_file_path}[/bold red]")
+        except json.JSONDecodeError as e:
+            self.console.print(f"[bold red]Error al decodificar el archivo JSON: {e}[/bold red]")
+        except Exception as e:
+            self.console.print(f"[bold red]Error al cargar el archivo JSON: {e}[/bold red]")
+    
+    @property
+    def data_generation(self) -> int:
+        """Identifica los datos cargados: cambia tras cada carga o recarga.
+
+        Sirve para invalidar resultados derivados del catálogo.
+        """
+        return self._generation
+    
     def reload_data(self) -> Optional[Dict[str, Any]]:
         """Fuerza la recarga de los datos."""
-        self._data = None
-        return self.load_data()
+        with self._load_lock:
+            if isinstance(self._data, Catalogue):
+                self._data.close()
+            self._data = None
+            self._hash_index = None
+            return self.load_data()
+    
+    @staticmethod
+    def _build_hash_index(data: Dict[str, Any]) -> Dict[str, Tuple[str, str]]:
+        """Construye el índice plano hash -> (game_id, rom_path) una sola vez."""
+        index = {}
+        for game_id, hash_list in data.items():
+            for item in hash_list:
+                for hash_key, rom_path in item.items():
+                    # Conservar la primera aparición, igual que el recorrido lineal
+                    index.setdefault(hash_key.upper(), (game_id, rom_path))
+        return index
+    
+    def _lookup(self, hash_value: str) -> Optional[Tuple[str, str]]:
+        """Resuelve un hash sobre los datos ya cargados."""
+        if isinstance(self._data, Catalogue):
+            return self._data.find_hash(hash_value)
+        return self._hash_index.get(hash_value.strip().upper())
+    
+    def find_hash_entry(self, hash_value: str) -> Optional[Tuple[str, str]]:
+        """Busca un hash y devuelve la tupla (game_id, rom_path)."""
+        if not self.load_data():
+            return None
+        return self._lookup(hash_value)
     
     def find_hash(self, hash_value: str) -> Optional[str]:
         """Busca un hash en los datos cargados."""
-        data = self.load_data()
-        if not data:
-            return None
-        
-        hash_upper = hash_value.upper()
-        for console_id, hash_list in data.items():
-            for item in hash_list:
-                if hash_upper in item:
-                    return item[hash_upper]
-        return None
+        entry = self.find_hash_entry(hash_value)
+        return entry[1] if entry else None
+    
+    def find_hashes(self, hash_values: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Busca varios hashes de una vez. Devuelve hash -> rom_path (o None)."""
+        return {
+            hash_value: entry[1] if entry else None
+            for hash_value, entry in self.find_hash_entries(hash_values).items()
+        }
+    
+    def find_hash_entries(self, hash_values: Iterable[str]) -> Dict[str, Optional[Tuple[str, str]]]:
+        """Busca varios hashes de una vez. Devuelve hash -> (game_id, rom_path) (o None)."""
+        if not self.load_data():
+            return {hash_value: None for hash_value in hash_values}
+        if isinstance(self._data, Catalogue):
+            return self._data.find_hashes(hash_values)
+        return {hash_value: self._lookup(hash_value) for hash_value in hash_values}
@@ -0,0 +1,387 @@
+"""
+Hashes de RetroAchievements para imágenes de disco (PS1, PS2, PSP, Sega CD, Saturn).
+
+En estas consolas el hash no es el MD5 de la imagen: RetroAchievements lo
+calcula a partir de sectores concretos del disco (algoritmos de rcheevos):
+
+- PS1: nombre del ejecutable indicado en `BOOT` de SYSTEM.CNF (o PSX.EXE) más
+  el ejecutable, con el tamaño que indica su cabecera `PS-X EXE` + 2048.
+- PS2: nombre del ejecutable de `BOOT2` en SYSTEM.CNF más el ELF completo.
+- PSP: PSP_GAME\\PARAM.SFO seguido de PSP_GAME\\SYSDIR\\EBOOT.BIN.
+- Sega CD y Saturn: los primeros 512 bytes del sector 0 (cabecera de volumen y
+  de ROM); la firma del principio distingue una consola de la otra.
+
+Los archivos se localizan recorriendo el sistema de archivos ISO 9660 y se leen
+sólo los sectores necesarios con seek: identificar una ISO de 4 GB de PS2 lee
+unos pocos MB (el ejecutable), no la imagen entera.
+
+Formatos admitidos: ISO (sectores de 2048 bytes), BIN/IMG en bruto (2352 bytes
+por sector, modo 1 o 2), CUE (se usa la primera pista de datos) y CSO (ISO
+comprimida por bloques con deflate, habitual en PSP).
+
+Una imagen dañada o truncada produce ValueError (o OSError al leerla), nunca
+errores internos de struct o zlib.
+"""
+import hashlib
+import os
+import re
+import shlex
+import struct
+import zlib
+from typing import List, Optional, Tuple
+
+SECTOR_SIZE = 2048  # Datos de usuario por sector
+MAX_HASHED_FILE = 64 * 1024 * 1024  # rcheevos no hashea más de 64 MB de un archivo
+
+DISC_EXTENSIONS = ('.iso', '.cue', '.cso')
+RAW_EXTENSIONS = ('.bin', '.img')  # Pueden ser discos en bruto o ROMs de cartucho
+
+_SYNC = b"\x00" + b"\xff" * 10 + b"\x00"
+_PVD_SECTOR = 16
+_CUE_MODES = {  # Tipo de pista -> (bytes por sector, desplazamiento de los datos de usuario)
+    "MODE1/2048": (2048, 0),
+    "MODE1/2352": (2352, 16),
+    "MODE2/2048": (2048, 0),
+    "MODE2/2336": (2336, 8),
+    "MODE2/2352": (2352, 24),
+}
+_CUE_INDEX = re.compile(r"^INDEX\s+01\s+(\d+):(\d+):(\d+)", re.IGNORECASE)
+
+
+class DiscImage:
+    """Lector de sectores de la pista de datos de una imagen de disco."""
+
+    def __init__(self, path: str, sector_size: int = SECTOR_SIZE, data_offset: int = 0,
+                 start: int = 0):
+        self.path = path
+        self.sector_size = sector_size  # Bytes por sector en el archivo
+        self.data_offset = data_offset  # Posición de los datos de usuario dentro del sector
+        self.start = start  # Byte del archivo donde empieza la pista
+        self.bytes_read = 0  # Bytes leídos del archivo (no el tamaño de la imagen)
+        self._file = open(path, "rb")
+
+    def _read_at(self, offset: int, size: int) -> bytes:
+        self._file.seek(offset)
+        data = self._file.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def read(self, sector: int, length: int) -> bytes:
+        """Lee `length` bytes de datos de usuario a partir de `sector`."""
+        if self.sector_size == SECTOR_SIZE:
+            return self._read_at(self.start + sector * SECTOR_SIZE, length)
+        # Sectores en bruto: se leen en bloques y se descartan cabeceras y códigos de error
+        parts = []
+        batch = 256
+        while length > 0:
+            count = min(batch, (length + SECTOR_SIZE - 1) // SECTOR_SIZE)
+            raw = self._read_at(self.start + sector * self.sector_size, count * self.sector_size)
+            if not raw:
+                break
+            for position in range(0, len(raw), self.sector_size):
+                data = raw[position + self.data_offset:position + self.data_offset + min(SECTOR_SIZE, length)]
+                if not data:
+                    break
+                parts.append(data)
+                length -= len(data)
+            sector += count
+            if len(raw) < count * self.sector_size:
+                break
+        return b"".join(parts)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CsoImage(DiscImage):
+    """ISO comprimida (CISO v0/v1): índice de bloques, cada uno con deflate o sin comprimir."""
+
+    _HEADER = struct.Struct("<4sIQIBB2x")
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        try:
+            header = self._read_at(0, self._HEADER.size)
+            if len(header) < self._HEADER.size:
+                raise ValueError("CSO truncado (cabecera incompleta)")
+            magic, header_size, self.total_bytes, self.block_size, version, self.align = \
+                self._HEADER.unpack(header)
+            if magic != b"CISO" or version > 1 or not self.block_size:
+                raise ValueError("CSO no soportado")
+            blocks = (self.total_bytes + self.block_size - 1) // self.block_size
+            index = self._read_at(max(header_size, self._HEADER.size), 4 * (blocks + 1))
+            if len(index) < 4 * (blocks + 1):
+                raise ValueError("CSO truncado (índice de bloques incompleto)")
+            self._index = struct.unpack(f"<{blocks + 1}I", index)
+        except Exception:
+            self._file.close()
+            raise
+
+    def _block(self, number: int) -> bytes:
+        if number + 1 >= len(self._index):
+            return b""
+        entry, following = self._index[number], self._index[number + 1]
+        offset = (entry & 0x7FFFFFFF) << self.align
+        size = ((following & 0x7FFFFFFF) << self.align) - offset
+        if size < 0:
+            raise ValueError(f"CSO dañado (índice del bloque {number})")
+        data = self._read_at(offset, size)
+        if entry & 0x80000000:
+            return data[:self.block_size]  # Bloque guardado sin comprimir
+        try:
+            return zlib.decompressobj(-zlib.MAX_WBITS).decompress(data, self.block_size)
+        except zlib.error as e:
+            raise ValueError(f"CSO dañado (bloque {number}): {e}") from e
+
+    def read(self, sector: int, length: int) -> bytes:
+        position = sector * SECTOR_SIZE
+        length = max(0, min(length, self.total_bytes - position))
+        parts = []
+        while length > 0:
+            number, skip = divmod(position, self.block_size)
+            data = self._block(number)[skip:skip + length]
+            if not data:
+                break
+            parts.append(data)
+            position += len(data)
+            length -= len(data)
+        return b"".join(parts)
+
+
+# --- Apertura de imágenes --------------------------------------------------------
+
+def _raw_layout(path: str) -> Optional[Tuple[int, int]]:
+    """(bytes por sector, desplazamiento de datos) si el archivo es un disco en bruto."""
+    with open(path, "rb") as file:
+        header = file.read(16)
+    if len(header) == 16 and header[:12] == _SYNC:
+        return 2352, 24 if header[15] == 2 else 16
+    return None
+
+
+def cue_files(cue_path: str) -> List[str]:
+    """Rutas de los archivos a los que hace referencia una hoja CUE."""
+    files = []
+    directory = os.path.dirname(cue_path)
+    try:
+        with open(cue_path, "r", encoding="utf-8", errors="replace") as file:
+            for line in file:
+                line = line.strip()
+                if line.upper().startswith("FILE "):
+                    try:
+                        name = shlex.split(line[5:], posix=True)[0]
+                    except (ValueError, IndexError):
+                        continue
+                    files.append(os.path.join(directory, name))
+    except OSError:
+        pass
+    return files
+
+
+def _open_cue(cue_path: str) -> Optional[DiscImage]:
+    """Abre la primera pista de datos de una hoja CUE."""
+    directory = os.path.dirname(cue_path)
+    current_file, mode = None, None
+    with open(cue_path, "r", encoding="utf-8", errors="replace") as file:
+        for line in file:
+            line = line.strip()
+            upper = line.upper()
+            if upper.startswith("FILE "):
+                try:
+                    current_file = os.path.join(directory, shlex.split(line[5:], posix=True)[0])
+                except (ValueError, IndexError):
+                    current_file = None
+                mode = None
+            elif upper.startswith("TRACK "):
+                parts = upper.split()
+                mode = parts[2] if len(parts) > 2 and parts[2] in _CUE_MODES else None
+            elif mode and current_file:
+                match = _CUE_INDEX.match(line)
+                if match:
+                    sector_size, data_offset = _CUE_MODES[mode]
+                    minutes, seconds, frames = (int(value) for value in match.groups())
+                    start = ((minutes * 60 + seconds) * 75 + frames) * sector_size
+                    return DiscImage(current_file, sector_size, data_offset, start)
+    return None
+
+
+def is_disc_image(path: str) -> bool:
+    """True si el archivo se debe identificar como disco y no como ROM de cartucho."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in DISC_EXTENSIONS:
+        return True
+    if extension in RAW_EXTENSIONS:
+        try:
+            return _raw_layout(path) is not None
+        except OSError:
+            return False
+    return False
+
+
+def open_disc(path: str) -> Optional[DiscImage]:
+    """Abre una imagen de disco (ISO, BIN/IMG en bruto, CUE o CSO)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".cue":
+        return _open_cue(path)
+    if extension == ".cso":
+        return CsoImage(path)
+    layout = _raw_layout(path)
+    if layout is not None:
+        return DiscImage(path, *layout)
+    return DiscImage(path)
+
+
+# --- ISO 9660 --------------------------------------------------------------------
+
+def _directory_records(image: DiscImage, sector: int, size: int):
+    """Recorre las entradas de un directorio: (nombre, sector, tamaño)."""
+    data = image.read(sector, min(size, 1024 * 1024))
+    for base in range(0, len(data), SECTOR_SIZE):
+        position = base
+        end = min(base + SECTOR_SIZE, len(data))
+        while position + 33 < end:
+            length = data[position]
+            if length == 0:
+                break  # Resto del sector sin usar: las entradas no cruzan sectores
+            name_length = data[position + 32]
+            name = data[position + 33:position + 33 + name_length]
+            extent, extent_size = struct.unpack_from("<I4xI", data, position + 2)
+            yield name, extent, extent_size
+            position += length
+
+
+def find_file(image: DiscImage, path: str) -> Optional[Tuple[int, int]]:
+    """Busca un archivo (`DIR\\ARCHIVO`, sin distinguir mayúsculas). Devuelve (sector, tamaño)."""
+    volume = image.read(_PVD_SECTOR, SECTOR_SIZE)
+    if len(volume) < 190 or volume[1:6] != b"CD001":
+        return None
+    sector, size = struct.unpack_from("<I4xI", volume, 156 + 2)
+    for component in path.replace("/", "\\").strip("\\").split("\\"):
+        wanted = component.upper().encode("ascii", "replace")
+        for name, extent, extent_size in _directory_records(image, sector, size):
+            if name.split(b";")[0].upper() == wanted:
+                sector, size = extent, extent_size
+                break
+        else:
+            return None
+    return sector, size
+
+
+def _hash_extent(md5, image: DiscImage, sector: int, size: int):
+    """Añade un archivo del disco al hash como rcheevos: al menos un sector completo."""
+    remaining = max(min(size, MAX_HASHED_FILE), SECTOR_SIZE)
+    step = 1024 * 1024 // SECTOR_SIZE  # Sectores por lectura
+    while remaining > 0:
+        data = image.read(sector, min(remaining, step * SECTOR_SIZE))
+        if not data:
+            break
+        md5.update(data)
+        remaining -= len(data)
+        sector += step
+
+
+def _boot_executable(image: DiscImage, key: bytes, prefix: bytes) -> Optional[str]:
+    """Nombre del ejecutable de arranque según SYSTEM.CNF (`BOOT`/`BOOT2`)."""
+    found = find_file(image, "SYSTEM.CNF")
+    if found is None:
+        return None
+    text = image.read(found[0], SECTOR_SIZE).split(b"\x00", 1)[0]
+    for line in text.splitlines():
+        line = line.strip()
+        if not line.startswith(key):
+            continue
+        value = line[len(key):].lstrip()
+        if not value.startswith(b"="):
+            continue
+        value = value[1:].lstrip()
+        if value.startswith(prefix):
+            value = value[len(prefix):]
+        value = value.lstrip(b"\\")
+        name = re.split(rb"[\s;]", value, 1)[0]
+        return name.decode("ascii", "replace")
+    return None
+
+
+# --- Algoritmos por consola ---------------------------------------------------
+
+_SEGA_SIGNATURES = {b"SEGADISCSYSTEM  ": "Sega CD", b"SEGA SEGASATURN ": "Saturn"}
+
+
+def _hash_sega(image: DiscImage) -> Optional[Tuple[str, str]]:
+    """(consola, md5) de un disco de Sega CD o Saturn, o None."""
+    header = image.read(0, 512)
+    console = _SEGA_SIGNATURES.get(header[:16])
+    if console is None:
+        return None
+    return console, hashlib.md5(header).hexdigest()
+
+
+def _hash_psp(image: DiscImage) -> Optional[str]:
+    param = find_file(image, "PSP_GAME\\PARAM.SFO")
+    eboot = find_file(image, "PSP_GAME\\SYSDIR\\EBOOT.BIN")
+    if param is None or eboot is None:
+        return None
+    md5 = hashlib.md5()
+    _hash_extent(md5, image, *param)
+    _hash_extent(md5, image, *eboot)
+    return md5.hexdigest()
+
+
+def _hash_ps2(image: DiscImage) -> Optional[str]:
+    name = _boot_executable(image, b"BOOT2", b"cdrom0:")
+    found = find_file(image, name) if name else None
+    if found is None:
+        return None
+    md5 = hashlib.md5(name.encode("ascii", "replace"))
+    _hash_extent(md5, image, *found)
+    return md5.hexdigest()
+
+
+def _hash_ps1(image: DiscImage) -> Optional[str]:
+    name = _boot_executable(image, b"BOOT", b"cdrom:")
+    found = find_file(image, name) if name else None
+    if found is None:
+        name, found = "PSX.EXE", find_file(image, "PSX.EXE")
+    if found is None:
+        return None
+    sector, size = found
+    header = image.read(sector, 32)
+    if header[:7] == b"PS-X EX" and len(header) == 32:
+        # El tamaño de la cabecera PS-X EXE no incluye la propia cabecera (2048 bytes)
+        size = struct.unpack_from("<I", header, 28)[0] + SECTOR_SIZE
+    md5 = hashlib.md5(name.encode("ascii", "replace"))
+    _hash_extent(md5, image, sector, size)
+    return md5.hexdigest()
+
+
+def identify_disc(image: DiscImage) -> Optional[Tuple[str, str]]:
+    """Identifica la consola de una imagen abierta y calcula su hash: (consola, md5) o None."""
+    found = _hash_sega(image)
+    if found:
+        return found
+    digest = _hash_psp(image)
+    if digest:
+        return "PSP", digest
+    # BOOT2 antes que BOOT: el prefijo "BOOT" también coincidiría con "BOOT2"
+    digest = _hash_ps2(image)
+    if digest:
+        return "PS2", digest
+    digest = _hash_ps1(image)
+    if digest:
+        return "PS1", digest
+    return None
+
+
+def hash_disc(path: str) -> Optional[Tuple[str, str]]:
+    """Identifica la consola del disco y calcula su hash. Devuelve (consola, md5) o None."""
+    image = open_disc(path)
+    if image is None:
+        return None
+    with image:
+        return identify_disc(image)
@@ -0,0 +1,642 @@
+"""
+Motor de descarga HTTP concurrente para las ROMs de archive.org.
+
+- Pool de workers acotado (total) y, por host, un limitador de ritmo de
+  peticiones y una concurrencia adaptativa (ver rate_limit.py).
+- Reintentos con espera exponencial y jitter hasta `max_attempts`, respetando
+  `Retry-After` en respuestas 429/503.
+- Con mirrors activados, cada intento usa el mejor mirror disponible del item
+  (ver mirrors.py); un host que falla queda en cuarentena y el reintento pasa al
+  siguiente. El diario se identifica por la URL canónica, así que un parcial
+  empezado en un mirror se puede terminar en otro (con `If-Range`).
+- Una sesión `requests` por host con conexiones keep-alive reutilizables.
+- Escritura en disco por bloques de tamaño fijo, sobre un archivo `.part` que se
+  renombra al terminar.
+- Descargas reanudables: junto al `.part` se guarda un pequeño diario con la URL,
+  los validadores (ETag/Last-Modified), el tamaño total y el último offset
+  verificado (escrito y sincronizado a disco). Al reintentar se pide sólo lo que
+  falta con `Range`/`If-Range`.
+- Los archivos grandes que admiten rangos se descargan por piezas en paralelo
+  (ver segmented_download.py); el diario registra las piezas completadas.
+- El MD5 se verifica contra el hash del catálogo mientras se escribe (ver
+  verification.py); si no coincide, el archivo se aparta como `<destino>.mismatch`
+  (nunca se borra) y se vuelve a pedir. Si un intento posterior se verifica, el
+  `.mismatch` sobra y se elimina.
+- Con un manifiesto (ver manifest.py) las ROMs ya descargadas se omiten por
+  hash y, si están en otra ruta, se enlazan en vez de volver a pedirlas.
+- `cancel()` detiene las descargas en curso en el siguiente bloque, dejando el
+  `.part` y su diario listos para reanudar.
+"""
+import json
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .interfaces import GameInfo
+from .manifest import DownloadManifest
+from .mirrors import MirrorSelector
+from .rate_limit import HostLimits, RetryPolicy, parse_retry_after
+from .segmented_download import DownloadCancelled, SegmentedFetcher, preallocate
+from .verification import StreamingVerifier, verifier_for
+
+PART_SUFFIX = ".part"
+JOURNAL_SUFFIX = ".part.journal"
+MISMATCH_SUFFIX = ".mismatch"  # Descarga completa cuyo MD5 no coincide con el catálogo
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+@dataclass
+class DownloadTask:
+    """Archivo a descargar."""
+    url: str
+    destination: str
+    game: Optional[GameInfo] = None
+    size: Optional[int] = None  # Tamaño anunciado por el servidor (HEAD), si se conoce
+    mirrors: Optional[List[str]] = None  # URLs alternativas ya ordenadas (tras probe)
+
+
+@dataclass
+class DownloadResult:
+    """Resultado de una descarga."""
+    task: DownloadTask
+    success: bool
+    bytes_written: int = 0
+    error: Optional[str] = None
+    skipped: bool = False  # Ya estaba descargado
+    resumed_from: int = 0  # Offset desde el que se reanudó (0 = desde el inicio)
+    verified: Optional[bool] = None  # MD5 del catálogo: True/False, None = no verificado
+    cancelled: bool = False  # Interrumpida con cancel(); el parcial queda para reanudar
+    linked_from: Optional[str] = None  # Duplicado: enlazado desde este archivo ya descargado
+
+
+@dataclass
+class PartJournal:
+    """Diario de una descarga parcial (archivo `<destino>.part.journal`)."""
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    total_size: Optional[int] = None
+    offset: int = 0  # Bytes escritos y sincronizados en el `.part`
+    piece_size: Optional[int] = None  # Sólo en descargas segmentadas
+    pieces_done: Optional[List[int]] = None
+
+    @staticmethod
+    def path_for(destination: str) -> str:
+        return destination + JOURNAL_SUFFIX
+
+    @classmethod
+    def load(cls, destination: str) -> Optional["PartJournal"]:
+        try:
+            with open(cls.path_for(destination), "r", encoding="utf-8") as file:
+                return cls(**json.load(file))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save(self, destination: str):
+        path = self.path_for(destination)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(self.__dict__, file)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def remove(cls, destination: str):
+        try:
+            os.remove(cls.path_for(destination))
+        except FileNotFoundError:
+            pass
+
+
+def failed_result(task: DownloadTask, error: Exception) -> DownloadResult:
+    """Resultado fallido para una tarea cuya descarga lanzó una excepción inesperada."""
+    return DownloadResult(task, False, error=str(error) or type(error).__name__)
+
+
+def destination_for(rom_path: str, download_dir: str) -> str:
+    """Ruta local de una ROM dentro de `download_dir`, conservando sus carpetas.
+
+    Descarta segmentos vacíos, '.' y '..' para que nunca escriba fuera del directorio.
+    """
+    parts = [p for p in rom_path.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+    return os.path.join(download_dir, *parts)
+
+
+class HTTPDownloader:
+    """Descarga archivos en paralelo con límites de concurrencia global y por host."""
+
+    def __init__(self, max_workers: int = 4, max_per_host: int = 2,
+                 chunk_size: int = 1024 * 1024, timeout: float = 30.0,
+                 journal_interval: int = 8 * 1024 * 1024,
+                 segment_threshold: int = 64 * 1024 * 1024,
+                 piece_size: int = 16 * 1024 * 1024,
+                 min_segments: int = 2, max_segments: int = 8,
+                 verify: bool = True, verify_zip_content: bool = True,
+                 verify_attempts: int = 2,
+                 max_attempts: int = 5, max_per_host_ceiling: Optional[int] = None,
+                 requests_per_second: float = 2.0, request_burst: int = 4,
+                 retry_base_delay: float = 1.0, retry_max_delay: float = 60.0,
+                 use_mirrors: bool = False, mirror_probe_timeout: float = 5.0,
+                 mirror_metadata_ttl: float = 3600.0, mirror_cooldown: float = 30.0,
+                 manifest: Optional[DownloadManifest] = None,
+                 user_agent: str = "RetroAchievementsDownloader"):
+        self.max_workers = max(1, max_workers)
+        self.max_per_host = max(1, max_per_host)  # Concurrencia inicial por host
+        self.max_per_host_ceiling = max(self.max_per_host, max_per_host_ceiling or self.max_per_host)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.journal_interval = journal_interval  # Bytes entre actualizaciones del diario
+        # Descarga segmentada: archivos >= segment_threshold, en piezas de piece_size.
+        # Las conexiones de un mismo archivo no cuentan contra max_per_host.
+        self.segment_threshold = segment_threshold
+        self.piece_size = piece_size
+        self.min_segments = max(1, min_segments)
+        self.max_segments = max(self.min_segments, max_segments)
+        # Verificación MD5: intentos totales por archivo si el hash no coincide
+        self.verify = verify
+        self.verify_zip_content = verify_zip_content
+        self.verify_attempts = max(1, verify_attempts)
+        # Ritmo de peticiones por host y reintentos ante errores transitorios
+        self.requests_per_second = requests_per_second
+        self.request_burst = request_burst
+        self.retry = RetryPolicy(max_attempts, retry_base_delay, retry_max_delay)
+        self.user_agent = user_agent
+        self._sessions: Dict[str, requests.Session] = {}
+        self._host_limits: Dict[str, HostLimits] = {}
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self.manifest = manifest  # Registro de lo descargado (por hash); no se cierra aquí
+        self.mirrors: Optional[MirrorSelector] = None
+        if use_mirrors:
+            self.mirrors = MirrorSelector(
+                self._session, before_request=self._throttle,
+                probe_timeout=mirror_probe_timeout, metadata_ttl=mirror_metadata_ttl,
+                failure_cooldown=mirror_cooldown
+            )
+
+    # --- Sesiones y límites por host ------------------------------------------
+
+    def _host(self, url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def _session(self, host: str) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.headers["User-Agent"] = self.user_agent
+                # Sin compresión: los offsets del diario son bytes del archivo real
+                session.headers["Accept-Encoding"] = "identity"
+                adapter = HTTPAdapter(pool_connections=1,
+                                      pool_maxsize=self.max_per_host_ceiling * self.max_segments)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def _limits(self, host: str) -> HostLimits:
+        with self._lock:
+            limits = self._host_limits.get(host)
+            if limits is None:
+                limits = HostLimits(self.requests_per_second, self.request_burst,
+                                    self.max_per_host, self.max_per_host_ceiling)
+                self._host_limits[host] = limits
+            return limits
+
+    def _throttle(self, url: str):
+        """Espera un token del host antes de cada petición."""
+        if not self._limits(self._host(url)).bucket.acquire(self._cancelled):
+            raise DownloadCancelled()
+
+    @staticmethod
+    def _is_missing(error: Optional[Exception]) -> bool:
+        """Error 4xx (salvo 429): el archivo no está en ese servidor, el host funciona."""
+        if not isinstance(error, requests.HTTPError) or error.response is None:
+            return False
+        status = error.response.status_code
+        return 400 <= status < 500 and status != 429
+
+    def _retry_delay(self, limits: HostLimits, error: Optional[Exception], attempt: int) -> Optional[float]:
+        """Espera antes de reintentar tras `error`, o None si no se debe reintentar.
+
+        `error` None indica una descarga que terminó incompleta.
+        """
+        if attempt >= self.retry.max_attempts:
+            return None
+        retry_after = None
+        if isinstance(error, requests.HTTPError):
+            status = error.response.status_code if error.response is not None else None
+            if status in (429, 503):
+                retry_after = parse_retry_after(error.response.headers.get("Retry-After"))
+                limits.concurrency.on_congestion()
+            elif status is None or status < 500:
+                return None  # 404 y similares: reintentar no sirve
+        elif isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            limits.concurrency.on_congestion()
+        elif error is not None and not isinstance(error, requests.RequestException):
+            return None  # Errores locales (disco)
+        delay = self.retry.delay(attempt, retry_after)
+        if retry_after is not None:
+            limits.bucket.pause(delay)  # El servidor pidió esperar: vale para todo el host
+        return delay
+
+    # --- Descarga -------------------------------------------------------------
+
+    def cancel(self):
+        """Interrumpe las descargas en curso y rechaza las siguientes."""
+        self._cancelled.set()
+
+    def probe(self, task: DownloadTask) -> Optional[int]:
+        """Consulta con HEAD el tamaño del archivo (siguiendo redirecciones).
+
+        Devuelve None si el servidor no lo anuncia; lanza `requests.HTTPError`
+        si el archivo no está disponible.
+        """
+        if self.mirrors is not None:
+            # Mide también los mirrors sin medición reciente y deja el orden en la tarea
+            task.mirrors, size, responses = self.mirrors.probe(task.url)
+            for response in responses:
+                self._note_throttling(response)
+            if size is None and responses and not any(response.ok for response in responses):
+                responses[0].raise_for_status()
+            return size
+        self._throttle(task.url)
+        response = self._session(self._host(task.url)).head(task.url, allow_redirects=True, timeout=self.timeout)
+        self._note_throttling(response)
+        response.raise_for_status()
+        length = response.headers.get("Content-Length")
+        return int(length) if length and length.isdigit() else None
+
+    def _note_throttling(self, response: requests.Response):
+        """Pausa el host si respondió 429/503 a una consulta."""
+        if response.status_code in (429, 503):
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            self._limits(self._host(response.url)).bucket.pause(retry_after or self.retry.base_delay)
+
+    def _candidate_urls(self, task: DownloadTask) -> List[str]:
+        """URLs a probar para la tarea, de mejor a peor."""
+        if self.mirrors is None:
+            return [task.url]
+        if task.mirrors:
+            return self.mirrors.rank(task.mirrors)
+        return self.mirrors.candidates(task.url)
+
+    def download(self, task: DownloadTask) -> DownloadResult:
+        """Descarga un archivo (bloqueante). Omite los ya completados y reanuda los parciales."""
+        known = self._from_manifest(task)
+        if known is not None:
+            return known
+        if os.path.exists(task.destination):
+            return DownloadResult(task, True, skipped=True)
+        result = self._download(task)
+        if result.success and self.manifest is not None and task.game is not None:
+            self.manifest.record(task.game.hash_value, task.game.rom_path,
+                                 os.path.abspath(task.destination), verified=result.verified)
+        return result
+
+    def has_local_copy(self, task: DownloadTask) -> bool:
+        """True si la descarga se resolverá sin red (destino existente o ROM en el manifiesto)."""
+        if os.path.exists(task.destination):
+            return True
+        if self.manifest is None or task.game is None or not task.game.hash_value:
+            return False
+        entry = self.manifest.get(task.game.hash_value)
+        return entry is not None and entry.verified is not False and entry.exists()
+
+    def _from_manifest(self, task: DownloadTask) -> Optional[DownloadResult]:
+        """Resultado sin descargar si el manifiesto ya tiene la ROM (omitida o enlazada)."""
+        if self.manifest is None or task.game is None or not task.game.hash_value:
+            return None
+        destination = os.path.abspath(task.destination)
+        entry = self.manifest.get(task.game.hash_value)
+        if entry is not None and entry.verified is not False and entry.exists():
+            if entry.path == destination:
+                return DownloadResult(task, True, skipped=True, verified=entry.verified)
+            if not os.path.exists(destination):
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                try:
+                    os.link(entry.path, destination)
+                except OSError:
+                    shutil.copyfile(entry.path, destination)  # Otro sistema de archivos
+                return DownloadResult(task, True, skipped=True, verified=entry.verified,
+                                      linked_from=entry.path)
+        if os.path.exists(destination):
+            # Descargado antes de existir el manifiesto (o movido): se registra tal cual
+            self.manifest.record(task.game.hash_value, task.game.rom_path, destination)
+            return DownloadResult(task, True, skipped=True)
+        if entry is not None:
+            self.manifest.remove(task.game.hash_value)  # El archivo registrado ya no existe
+        return None
+
+    def _download(self, task: DownloadTask) -> DownloadResult:
+        """Descarga con reintentos, cambio de mirror y verificación."""
+        cancelled = DownloadResult(task, False, error="Descarga cancelada", cancelled=True)
+        attempt = 0
+        mismatches = 0
+        failed_urls = set()
+        while True:
+            if self._cancelled.is_set():
+                return cancelled
+            attempt += 1
+            candidates = self._candidate_urls(task)
+            url = next((u for u in candidates if u not in failed_urls), candidates[0])
+            host = self._host(url)
+            limits = self._limits(host)
+            error = None
+            with limits.concurrency.slot():
+                try:
+                    result = self._fetch(self._session(host), task, url)
+                except DownloadCancelled:
+                    return cancelled
+                except (requests.RequestException, OSError) as e:
+                    error, result = e, None
+
+            if result is not None and result.verified is False:
+                # MD5 distinto: el archivo quedó apartado como .mismatch, se vuelve a
+                # descargar de cero (en otro mirror si lo hay)
+                failed_urls.add(url)
+                mismatches += 1
+                if mismatches < self.verify_attempts:
+                    continue
+                return result
+            if result is not None and result.success:
+                limits.concurrency.on_success()
+                if self.mirrors is not None:
+                    self.mirrors.record_success(url)
+                if result.verified:
+                    self._discard_mismatch(task.destination)
+                return result
+
+            # Error de red/servidor o descarga incompleta: reintentar, si hay otro mirror, en él
+            delay = self._retry_delay(limits, error, attempt)
+            local_error = error is not None and not isinstance(error, requests.RequestException)
+            if self.mirrors is not None and not local_error:
+                failed_urls.add(url)
+                if not self._is_missing(error):
+                    self.mirrors.record_failure(url)  # Problema del host: cuarentena
+                if attempt < self.retry.max_attempts and any(u not in failed_urls for u in candidates):
+                    delay = 0.0  # Otro mirror disponible (también ante un 404 de un datanode)
+            if delay is None:
+                return result if result is not None else DownloadResult(task, False, error=str(error))
+            if self._cancelled.wait(delay):
+                return cancelled
+            # El reintento reanuda desde el diario
+
+    def _verifier(self, task: DownloadTask) -> Optional[StreamingVerifier]:
+        if not self.verify:
+            return None
+        return verifier_for(task.game, zip_content=self.verify_zip_content)
+
+    def _resume_offset(self, task: DownloadTask, part_path: str) -> Optional[PartJournal]:
+        """Devuelve el diario válido para reanudar `task`, o None si hay que empezar de cero."""
+        journal = PartJournal.load(task.destination)
+        if journal is None or journal.url != task.url or not os.path.exists(part_path):
+            return None
+        if journal.pieces_done is not None:
+            # Segmentada: el `.part` ya tiene el tamaño final
+            valid = journal.piece_size == self.piece_size and os.path.getsize(part_path) == journal.total_size
+            return journal if valid else None
+        journal.offset = min(journal.offset, os.path.getsize(part_path))
+        return journal if journal.offset > 0 else None
+
+    def _fetch(self, session: requests.Session, task: DownloadTask, url: str) -> DownloadResult:
+        part_path = task.destination + PART_SUFFIX
+        os.makedirs(os.path.dirname(task.destination) or ".", exist_ok=True)
+
+        previous = self._resume_offset(task, part_path)
+        verifier = self._verifier(task)
+        if previous and previous.pieces_done is not None:
+            return self._fetch_segmented(session, task, url, previous, verifier)
+        headers = {}
+        if previous:
+            headers["Range"] = f"bytes={previous.offset}-"
+            validator = previous.etag or previous.last_modified
+            if validator:
+                headers["If-Range"] = validator
+
+        self._throttle(url)
+        with session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416 and previous and previous.total_size == previous.offset:
+                # El parcial ya estaba completo
+                if verifier:
+                    verifier.update_from_file(part_path, previous.offset, self.chunk_size)
+                return self._finish(task, part_path, previous, previous.offset, previous.offset, verifier)
+            response.raise_for_status()
+
+            offset = 0
+            total_size = None
+            match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+            if response.status_code == 206 and previous and match and int(match.group(1)) == previous.offset:
+                offset = previous.offset
+                total_size = int(match.group(3)) if match.group(3) != "*" else None
+            elif response.status_code == 206:
+                raise requests.RequestException(
+                    f"Rango inesperado del servidor: {response.headers.get('Content-Range')}"
+                )
+            else:
+                # Un Content-Length mal formado se trata como tamaño desconocido
+                length = response.headers.get("Content-Length")
+                total_size = int(length) if length and length.isdigit() else None
+
+            journal = PartJournal(
+                url=task.url,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                total_size=total_size,
+                offset=offset
+            )
+
+            if offset == 0 and self._should_segment(response, total_size):
+                # Se abandona esta respuesta y se piden las piezas a la URL final (tras redirecciones)
+                journal.piece_size = self.piece_size
+                journal.pieces_done = []
+                final_url = response.url
+            else:
+                journal.save(task.destination)
+                if verifier and offset:
+                    # Lo ya descargado se lee una sola vez para continuar el hash
+                    verifier.update_from_file(part_path, offset, self.chunk_size)
+                written = self._stream_to_part(response, part_path, journal, offset,
+                                               task.destination, verifier)
+                return self._finish(task, part_path, journal, offset + written, offset, verifier)
+
+        return self._fetch_segmented(session, task, final_url, journal, verifier)
+
+    def _stream_to_part(self, response, part_path: str, journal: PartJournal,
+                        offset: int, destination: str,
+                        verifier: Optional[StreamingVerifier] = None) -> int:
+        """Escribe la respuesta en el `.part` desde `offset`. Devuelve los bytes escritos."""
+        mode = "r+b" if offset else "wb"
+        written = 0
+        with open(part_path, mode) as file:
+            file.seek(offset)
+            file.truncate()
+            since_journal = 0
+            try:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if not chunk:
+                        continue
+                    if self._cancelled.is_set():
+                        raise DownloadCancelled()
+                    file.write(chunk)
+                    if verifier:
+                        verifier.update(chunk)
+                    written += len(chunk)
+                    since_journal += len(chunk)
+                    if since_journal >= self.journal_interval:
+                        self._checkpoint(file, journal, offset + written, destination)
+                        since_journal = 0
+            finally:
+                # También al cortarse la conexión: el reintento sigue desde aquí
+                self._checkpoint(file, journal, offset + written, destination)
+        return written
+
+    def _should_segment(self, response, total_size: Optional[int]) -> bool:
+        return (
+            self.max_segments > 1
+            and total_size is not None
+            and total_size >= self.segment_threshold
+            and response.headers.get("Accept-Ranges", "").lower() == "bytes"
+        )
+
+    def _fetch_segmented(self, session: requests.Session, task: DownloadTask,
+                         url: str, journal: PartJournal,
+                         verifier: Optional[StreamingVerifier] = None) -> DownloadResult:
+        """Descarga por piezas en paralelo sobre un `.part` preasignado.
+
+        El MD5 necesita los bytes en orden: cada pieza se incorpora al hash cuando
+        ya están todas las anteriores, leyéndola recién escrita (caché de páginas).
+        """
+        part_path = task.destination + PART_SUFFIX
+        done = set(journal.pieces_done)
+        resumed_from = sum(
+            min(journal.piece_size, journal.total_size - piece * journal.piece_size) for piece in done
+        )
+        if not done:
+            preallocate(part_path, journal.total_size)
+        journal.save(task.destination)
+
+        piece_count = (journal.total_size + journal.piece_size - 1) // journal.piece_size
+        journal_lock = threading.Lock()
+        hashed = [0]  # Piezas ya incorporadas al MD5, en orden
+
+        def advance_hash():
+            with open(part_path, "rb") as file:
+                file.seek(hashed[0] * journal.piece_size)
+                while hashed[0] < piece_count and hashed[0] in done:
+                    remaining = min(journal.piece_size, journal.total_size - hashed[0] * journal.piece_size)
+                    while remaining > 0:
+                        chunk = file.read(min(self.chunk_size, remaining))
+                        if not chunk:
+                            raise OSError(f"Archivo parcial truncado: {part_path}")
+                        verifier.update(chunk)
+                        remaining -= len(chunk)
+                    hashed[0] += 1
+
+        if verifier:
+            advance_hash()
+
+        def on_piece_done(piece: int):
+            with journal_lock:
+                journal.pieces_done.append(piece)
+                journal.save(task.destination)
+                done.add(piece)
+                if verifier and piece == hashed[0]:
+                    advance_hash()
+
+        fetcher = SegmentedFetcher(
+            session, url, part_path, journal.total_size, journal.piece_size,
+            pieces=[piece for piece in range(piece_count) if piece not in done],
+            validator=journal.etag or journal.last_modified,
+            chunk_size=self.chunk_size, timeout=self.timeout,
+            min_segments=self.min_segments, max_segments=self.max_segments,
+            on_piece_done=on_piece_done, cancelled=self._cancelled,
+            before_request=lambda: self._throttle(url)
+        )
+        if not fetcher.run():
+            if self._cancelled.is_set():
+                raise DownloadCancelled()
+            if isinstance(fetcher.exception, (requests.RequestException, OSError)):
+                raise fetcher.exception  # Se reintenta desde las piezas ya registradas
+            return DownloadResult(task, False, fetcher.bytes_written, error=fetcher.error,
+                                  resumed_from=resumed_from)
+        return self._finish(task, part_path, journal, journal.total_size, resumed_from, verifier)
+
+    def _checkpoint(self, file, journal: PartJournal, offset: int, destination: str):
+        """Sincroniza el `.part` a disco y registra el offset en el diario."""
+        file.flush()
+        os.fsync(file.fileno())
+        journal.offset = offset
+        journal.save(destination)
+
+    def _finish(self, task: DownloadTask, part_path: str, journal: PartJournal,
+                size: int, resumed_from: int,
+                verifier: Optional[StreamingVerifier] = None) -> DownloadResult:
+        if journal.total_size is not None and size != journal.total_size:
+            return DownloadResult(
+                task, False, size - resumed_from,
+                error=f"Descarga incompleta: {size}/{journal.total_size} bytes",
+                resumed_from=resumed_from
+            )
+        verified = verifier.matches() if verifier else None
+        if verified is False:
+            # Se conserva apartado en lugar de borrarlo: si la regla de hash de una
+            # consola fuera incorrecta, las descargas seguirían en disco
+            mismatch_path = task.destination + MISMATCH_SUFFIX
+            os.replace(part_path, mismatch_path)
+            PartJournal.remove(task.destination)
+            return DownloadResult(
+                task, False, size - resumed_from,
+                error=(f"El MD5 no coincide con el hash del catálogo ({verifier.expected_md5.upper()}); "
+                       f"archivo conservado en {mismatch_path}"),
+                resumed_from=resumed_from, verified=False
+            )
+        os.replace(part_path, task.destination)
+        PartJournal.remove(task.destination)
+        return DownloadResult(task, True, size - resumed_from, resumed_from=resumed_from,
+                              verified=verified)
+
+    @staticmethod
+    def _discard_mismatch(destination: str):
+        """Elimina el `.mismatch` de un intento anterior cuando ya hay una copia verificada."""
+        try:
+            os.remove(destination + MISMATCH_SUFFIX)
+        except FileNotFoundError:
+            pass
+
+    def download_all(self, tasks: Iterable[DownloadTask],
+                     on_result: Optional[Callable[[DownloadResult], None]] = None) -> List[DownloadResult]:
+        """Descarga varias tareas con el pool de workers. Devuelve los resultados en orden de llegada."""
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.download, task): task for task in tasks}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Un fallo inesperado en un juego no detiene el resto del lote
+                    result = failed_result(futures[future], e)
+                results.append(result)
+                if on_result:
+                    on_result(result)
+        return results
+
+    def close(self):
+        """Cierra las sesiones HTTP abiertas."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,117 @@
+"""
+Índice de juegos precalculado para los listados de la web (/games, /api/games).
+
+Se guarda en un archivo auxiliar junto al JSON de origen, con la huella del JSON
+(tamaño, mtime y sha256), de modo que se invalida solo cuando cambia el catálogo.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .catalogue import source_fingerprint, source_matches
+from ..utils.rom_info import extract_game_name, get_console_from_rom_path
+
+GAMES_INDEX_SUFFIX = ".games.json"
+GAMES_INDEX_VERSION = 1
+
+
+def default_games_index_path(json_file_path: str) -> str:
+    """Ruta del índice de juegos asociado a un JSON."""
+    path = Path(json_file_path)
+    return str(path.with_name(path.stem + GAMES_INDEX_SUFFIX))
+
+
+def compute_games_index(data: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """Calcula el índice de juegos (nombre, consolas, versiones) ordenado por nombre."""
+    games = []
+    for game_id, hash_list in data.items():
+        game_name = None
+        consoles = set()
+        total_versions = 0
+        sample_rom_path = None
+        for item in hash_list:
+            for _hash, rom_path in item.items():
+                if sample_rom_path is None:
+                    sample_rom_path = rom_path
+                total_versions += 1
+                if not game_name:
+                    game_name = extract_game_name(rom_path)
+                consoles.add(get_console_from_rom_path(rom_path))
+        games.append({
+            'id': game_id,
+            'name': game_name or f'Game {game_id}',
+            'consoles': sorted(list(consoles)),
+            'versions': total_versions,
+            'sample_rom_path': sample_rom_path
+        })
+    games.sort(key=lambda g: (g['name'] or '').lower())
+    return games
+
+
+def save_games_index(games: List[Dict[str, Any]], index_path: str, json_file_path: str) -> bool:
+    """Guarda el índice con la huella del JSON. Devuelve False si no se pudo escribir."""
+    try:
+        size, mtime_ns, sha256 = source_fingerprint(json_file_path)
+        payload = {
+            'version': GAMES_INDEX_VERSION,
+            'source': {'size': size, 'mtime_ns': mtime_ns, 'sha256': sha256.hex()},
+            'games': games
+        }
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(payload, file, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, index_path)
+        return True
+    except OSError:
+        return False
+
+
+def load_games_index(index_path: str, json_file_path: str) -> Optional[List[Dict[str, Any]]]:
+    """Carga el índice si existe y corresponde al JSON actual."""
+    try:
+        with open(index_path, 'r', encoding='utf-8') as file:
+            payload = json.load(file)
+        source = payload['source']
+        if payload.get('version') != GAMES_INDEX_VERSION:
+            return None
+        if not source_matches(json_file_path, source['size'], source['mtime_ns'], bytes.fromhex(source['sha256'])):
+            return None
+        return payload['games']
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class ConsoleFacets:
+    """Listas de posiciones por consola y conteos precalculados sobre el índice de juegos.
+
+    Las posiciones conservan el orden del índice (alfabético), de modo que una
+    página se obtiene cortando la lista de la consola sin recorrer el resto.
+    """
+
+    def __init__(self, games: Sequence[Mapping[str, Any]]):
+        self._postings: Dict[str, List[int]] = {}
+        self._labels: Dict[str, str] = {}
+        self._consoles_by_position: List[frozenset] = []
+        for position, game in enumerate(games):
+            keys = set()
+            for console in game.get('consoles') or []:
+                key = (console or '').lower()
+                keys.add(key)
+                self._labels.setdefault(key, console)
+                self._postings.setdefault(key, []).append(position)
+            self._consoles_by_position.append(frozenset(keys))
+        self.total = len(games)
+        self.counts: List[Tuple[str, int]] = sorted(
+            ((self._labels[key], len(positions)) for key, positions in self._postings.items()),
+            key=lambda x: x[0]
+        )
+
+    def positions(self, console: str = '') -> Sequence[int]:
+        """Posiciones de los juegos de una consola (todas si no se indica)."""
+        if not console:
+            return range(self.total)
+        return self._postings.get(console.lower(), [])
+
+    def has_console(self, position: int, console: str) -> bool:
+        return console.lower() in self._consoles_by_position[position]
@@ -0,0 +1,98 @@
+"""
+Caché persistente de hashes de archivos locales para los escaneos de biblioteca.
+
+Cada archivo se identifica por su ruta y se considera sin cambios mientras
+coincidan tamaño, fecha de modificación (ns) e inodo; en ese caso se reutilizan
+los MD5 guardados sin volver a leerlo. Igual que el manifiesto de descargas
+(ver manifest.py), la tabla SQLite se carga entera en un dict al abrirla y las
+escrituras se hacen en bloque al terminar cada lote.
+
+La caché guarda la versión de las reglas de hash con la que se calculó: si
+cambia (p.ej. se añaden formatos nuevos), se descarta entera.
+"""
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    digests TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+Signature = Tuple[int, int, int]  # (tamaño, mtime_ns, inodo)
+
+
+class HashCache:
+    """Hashes ya calculados por ruta, válidos mientras el archivo no cambie."""
+
+    def __init__(self, path: str, version: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Signature, List[str]]] = {}
+
+        stored = self._connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if stored is None or stored[0] != version:
+            self._connection.execute("DELETE FROM files")
+            self._connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+        else:
+            for path_, size, mtime_ns, inode, digests in self._connection.execute(
+                "SELECT path, size, mtime_ns, inode, digests FROM files"
+            ):
+                self._entries[path_] = ((size, mtime_ns, inode), digests.split(",") if digests else [])
+        self._connection.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str, size: int, mtime_ns: int, inode: int) -> Optional[List[str]]:
+        """MD5 guardados del archivo, o None si no está o ha cambiado."""
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None or entry[0] != (size, mtime_ns, inode):
+            return None
+        return entry[1]
+
+    def put_many(self, items: Iterable[Tuple[str, int, int, int, List[str]]]):
+        """Guarda en una sola transacción (ruta, tamaño, mtime_ns, inodo, hashes)."""
+        rows = [(path, size, mtime_ns, inode, ",".join(digests))
+                for path, size, mtime_ns, inode, digests in items]
+        if not rows:
+            return
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", rows)
+            self._connection.commit()
+            for path, size, mtime_ns, inode, digests in rows:
+                self._entries[path] = ((size, mtime_ns, inode), digests.split(",") if digests else [])
+
+    def prune(self, root: str, seen: Iterable[str]) -> int:
+        """Olvida los archivos bajo `root` que ya no existen. Devuelve cuántos se borraron."""
+        prefix = os.path.join(root, "")
+        seen = set(seen)
+        with self._lock:
+            stale = [path for path in self._entries if path.startswith(prefix) and path not in seen]
+            if stale:
+                self._connection.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in stale))
+                self._connection.commit()
+                for path in stale:
+                    del self._entries[path]
+        return len(stale)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
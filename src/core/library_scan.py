@@ -0,0 +1,357 @@
+"""
+Escaneo de una biblioteca local de ROMs contra el catálogo.
+
+Recorre un árbol de directorios, calcula el MD5 de cada archivo en un pool de
+procesos (uno por núcleo) y resuelve todos los hashes contra el catálogo en
+bloque. Los archivos pequeños se agrupan en lotes para amortizar el coste de
+enviar trabajo a otro proceso; los grandes se leen con mmap (sin copias entre
+el sistema operativo y el proceso) y el resto con lecturas grandes sobre un
+buffer reutilizado.
+
+Con una caché de hashes (ver hash_cache.py) sólo se leen los archivos nuevos o
+modificados; los demás reutilizan los MD5 del escaneo anterior.
+
+Igual que en la verificación de descargas (ver verification.py):
+
+- De los .zip se calcula el MD5 de cada ROM interna.
+- En las consolas con cabecera opcional (iNES, copiadores de SNES/PC Engine,
+  Atari 7800, Lynx), deducidas por la extensión, se prueba también el MD5 sin
+  cabecera.
+
+Las imágenes de disco (ISO, CUE, CSO y BIN en bruto) se identifican con el
+algoritmo de RetroAchievements de cada consola (ver disc_hash.py), que lee sólo
+los sectores necesarios. Los .bin referenciados por un .cue no se escanean por
+separado.
+"""
+import csv
+import mmap
+import os
+import struct
+import time
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .data_manager import RetroAchievementsDataManager
+from .disc_hash import cue_files, identify_disc, is_disc_image, open_disc
+from .hash_cache import HashCache
+from .verification import HEADER_RULES, Header, RomHasher
+from ..utils.rom_info import get_console_from_rom_path
+
+# Extensión -> consola cuya regla de cabecera se aplica
+HEADER_EXTENSIONS = {
+    '.nes': 'NES', '.unf': 'NES', '.fds': 'Fds',
+    '.sfc': 'SNES', '.smc': 'SNES', '.swc': 'SNES', '.fig': 'SNES',
+    '.pce': 'PC Engine', '.sgx': 'PC Engine',
+    '.a78': 'Atari 7800', '.lnx': 'Atari Lynx',
+}
+
+# Extensiones que se escanean por defecto (None en la configuración = todas)
+DEFAULT_EXTENSIONS = (
+    '.zip', '.nes', '.unf', '.fds', '.sfc', '.smc', '.swc', '.fig', '.pce', '.sgx',
+    '.a26', '.a78', '.lnx', '.j64', '.gb', '.gbc', '.gba', '.md', '.gen', '.smd',
+    '.32x', '.sms', '.gg', '.sg', '.col', '.int', '.vec', '.vb', '.min', '.ngp',
+    '.ngc', '.ws', '.wsc', '.bin', '.rom', '.dsk', '.uze', '.wasm',
+    '.iso', '.cue', '.cso', '.img',
+)
+
+# Cambiarla cuando cambien los hashes que se calculan: invalida las cachés existentes
+HASH_VERSION = "2"
+
+RESULT_MATCH = "match"
+RESULT_NO_MATCH = "no_match"
+RESULT_ERROR = "error"
+
+
+@dataclass
+class FileHashes:
+    """Hashes candidatos de un archivo (lo que devuelve cada proceso)."""
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+    digests: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    read_bytes: int = 0  # Bytes leídos para calcularlos (en discos, sólo los sectores necesarios)
+
+
+@dataclass
+class ScanMatch:
+    """Resultado del escaneo de un archivo."""
+    path: str
+    size: int
+    status: str  # RESULT_MATCH, RESULT_NO_MATCH o RESULT_ERROR
+    md5: Optional[str] = None  # Hash que coincidió (o el primero calculado)
+    game_id: Optional[str] = None
+    rom_path: Optional[str] = None
+    console: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class ScanReport:
+    """Resumen de un escaneo."""
+    results: List[ScanMatch] = field(default_factory=list)
+    files: int = 0
+    bytes: int = 0
+    elapsed: float = 0.0
+    cache_hits: int = 0  # Archivos sin cambios cuyos hashes salieron de la caché
+    cache_misses: int = 0  # Archivos nuevos o modificados que hubo que leer
+    hashed_bytes: int = 0  # Bytes leídos realmente del disco
+
+    @property
+    def matches(self) -> List[ScanMatch]:
+        return [result for result in self.results if result.status == RESULT_MATCH]
+
+    @property
+    def unmatched(self) -> List[ScanMatch]:
+        return [result for result in self.results if result.status == RESULT_NO_MATCH]
+
+    @property
+    def errors(self) -> List[ScanMatch]:
+        return [result for result in self.results if result.status == RESULT_ERROR]
+
+    def matches_by_console(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for result in self.matches:
+            counts[result.console] = counts.get(result.console, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def write_csv(self, path: str):
+        """Guarda el informe completo (un archivo por fila)."""
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["path", "size", "status", "md5", "game_id", "console", "rom_path", "error"])
+            for result in self.results:
+                writer.writerow([
+                    result.path, result.size, result.status, result.md5 or "", result.game_id or "",
+                    result.console or "", result.rom_path or "", result.error or ""
+                ])
+
+
+# --- Cálculo de hashes (se ejecuta en los procesos del pool) -------------------
+
+def _header_for(name: str) -> Optional[Header]:
+    console = HEADER_EXTENSIONS.get(os.path.splitext(name)[1].lower())
+    return HEADER_RULES.get(console) if console else None
+
+
+def _hash_plain(path: str, size: int, read_size: int, mmap_threshold: int) -> List[str]:
+    hasher = RomHasher(_header_for(path))
+    with open(path, "rb", buffering=0) as file:
+        if size >= mmap_threshold:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                with memoryview(mapped) as view:
+                    for offset in range(0, len(view), read_size):
+                        hasher.update(view[offset:offset + read_size])
+        else:
+            buffer = bytearray(min(read_size, max(size, 1)))
+            view = memoryview(buffer)
+            while True:
+                read = file.readinto(buffer)
+                if not read:
+                    break
+                hasher.update(view[:read])
+    return hasher.digests()
+
+
+def _hash_zip(path: str, read_size: int) -> List[str]:
+    digests = []
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            hasher = RomHasher(_header_for(info.filename))
+            with archive.open(info) as member:
+                while True:
+                    chunk = member.read(read_size)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+            digests.extend(hasher.digests())
+    return digests
+
+
+def hash_file(path: str, read_size: int = 8 * 1024 * 1024,
+              mmap_threshold: int = 64 * 1024 * 1024) -> FileHashes:
+    """Calcula los MD5 candidatos de un archivo local (ROM suelta, .zip o imagen de disco)."""
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        return FileHashes(path, 0, 0, 0, error=str(e))
+    result = FileHashes(path, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    try:
+        if is_disc_image(path):
+            image = open_disc(path)
+            if image is not None:
+                try:
+                    disc = identify_disc(image)
+                finally:
+                    image.close()
+                    result.read_bytes = image.bytes_read
+                result.digests = [disc[1]] if disc else []
+        else:
+            result.read_bytes = stat.st_size
+            if zipfile.is_zipfile(path):
+                result.digests = _hash_zip(path, read_size)
+            else:
+                result.digests = _hash_plain(path, stat.st_size, read_size, mmap_threshold)
+    except (OSError, ValueError, EOFError, struct.error, zlib.error,
+            zipfile.BadZipFile, NotImplementedError, RuntimeError) as e:
+        # Un archivo dañado se anota como error sin interrumpir el lote
+        result.error = str(e) or type(e).__name__
+    return result
+
+
+def _hash_batch(paths: List[str], read_size: int, mmap_threshold: int) -> List[FileHashes]:
+    return [hash_file(path, read_size, mmap_threshold) for path in paths]
+
+
+# --- Escáner ---------------------------------------------------------------------
+
+class LibraryScanner:
+    """Escanea directorios locales y cruza los hashes con el catálogo."""
+
+    def __init__(self, data_manager: Optional[RetroAchievementsDataManager] = None,
+                 workers: Optional[int] = None, read_size: int = 8 * 1024 * 1024,
+                 mmap_threshold: int = 64 * 1024 * 1024,
+                 batch_bytes: int = 64 * 1024 * 1024, batch_files: int = 64,
+                 extensions: Optional[Iterable[str]] = DEFAULT_EXTENSIONS,
+                 cache: Optional[HashCache] = None):
+        self.data_manager = data_manager or RetroAchievementsDataManager()
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.read_size = read_size
+        self.mmap_threshold = mmap_threshold
+        self.batch_bytes = batch_bytes  # Un lote se cierra al llegar a este tamaño...
+        self.batch_files = batch_files  # ...o a este número de archivos
+        self.extensions = {ext.lower() for ext in extensions} if extensions is not None else None
+        self.cache = cache
+
+    def iter_files(self, root: str) -> Iterator[Tuple[str, int, int, int]]:
+        """Recorre `root` recursivamente y devuelve (ruta, tamaño, mtime_ns, inodo)
+        de los archivos a escanear."""
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            # Pistas de un .cue: se identifican a través del .cue
+            tracks = {
+                os.path.normcase(os.path.abspath(track))
+                for entry in entries if entry.name.lower().endswith(".cue")
+                for track in cue_files(entry.path)
+            } if self.extensions is None or ".cue" in self.extensions else set()
+            for entry in entries:
+                try:
+                    if tracks and os.path.normcase(os.path.abspath(entry.path)) in tracks:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        if self.extensions is None or os.path.splitext(entry.name)[1].lower() in self.extensions:
+                            stat = entry.stat()
+                            yield entry.path, stat.st_size, stat.st_mtime_ns, entry.inode()
+                except OSError:
+                    continue
+
+    def _batches(self, files: Iterable[Tuple[str, int]]) -> Iterator[List[Tuple[str, int]]]:
+        batch, batch_size = [], 0
+        for path, size in files:
+            batch.append((path, size))
+            batch_size += size
+            if batch_size >= self.batch_bytes or len(batch) >= self.batch_files:
+                yield batch
+                batch, batch_size = [], 0
+        if batch:
+            yield batch
+
+    def scan(self, root: str,
+             on_progress: Optional[Callable[[int, int, int, int], None]] = None) -> ScanReport:
+        """Escanea `root`. `on_progress(archivos, bytes, total_archivos, total_bytes)`."""
+        started = time.monotonic()
+        root = os.path.abspath(root)  # Rutas absolutas: claves estables en la caché
+        # Los archivos grandes primero: así no queda uno solo al final ocupando un núcleo
+        files = sorted(self.iter_files(root), key=lambda item: -item[1])
+        report = ScanReport()
+        total_files, total_bytes = len(files), sum(item[1] for item in files)
+
+        cached, pending = [], []
+        for path, size, mtime_ns, inode in files:
+            digests = self.cache.get(path, size, mtime_ns, inode) if self.cache is not None else None
+            if digests is None:
+                pending.append((path, size))
+            else:
+                cached.append(FileHashes(path, size, mtime_ns, inode, digests))
+        report.cache_hits, report.cache_misses = len(cached), len(pending)
+        if cached:
+            report.results.extend(self.resolve(cached))
+            report.files += len(cached)
+            report.bytes += sum(item.size for item in cached)
+        if on_progress:
+            on_progress(report.files, report.bytes, total_files, total_bytes)
+
+        batches = self._batches(pending)
+        with ProcessPoolExecutor(self.workers) as pool:
+            running = {}  # Futuro -> lote de (ruta, tamaño)
+            while True:
+                # Ventana acotada de lotes en vuelo: memoria constante con bibliotecas enormes
+                while len(running) < self.workers * 2:
+                    batch = next(batches, None)
+                    if batch is None:
+                        break
+                    future = pool.submit(_hash_batch, [path for path, _ in batch],
+                                         self.read_size, self.mmap_threshold)
+                    running[future] = batch
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = running.pop(future)
+                    try:
+                        hashed = future.result()
+                    except Exception as e:
+                        # Un lote fallido (p.ej. un proceso que muere) no detiene el escaneo
+                        error = str(e) or type(e).__name__
+                        hashed = [FileHashes(path, size, 0, 0, error=error) for path, size in batch]
+                    report.results.extend(self.resolve(hashed))
+                    report.files += len(hashed)
+                    report.bytes += sum(item.size for item in hashed)
+                    report.hashed_bytes += sum(item.read_bytes for item in hashed)
+                    if self.cache is not None:
+                        self.cache.put_many(
+                            (item.path, item.size, item.mtime_ns, item.inode, item.digests)
+                            for item in hashed if item.error is None
+                        )
+                if on_progress:
+                    on_progress(report.files, report.bytes, total_files, total_bytes)
+
+        if self.cache is not None:
+            self.cache.prune(root, (item[0] for item in files))
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def resolve(self, hashed: List[FileHashes]) -> List[ScanMatch]:
+        """Cruza en bloque los hashes calculados con el catálogo."""
+        entries = self.data_manager.find_hash_entries(
+            {digest for item in hashed for digest in item.digests}
+        )
+        results = []
+        for item in hashed:
+            if item.error:
+                results.append(ScanMatch(item.path, item.size, RESULT_ERROR, error=item.error))
+                continue
+            match = next((digest for digest in item.digests if entries.get(digest)), None)
+            if match is None:
+                results.append(ScanMatch(item.path, item.size, RESULT_NO_MATCH,
+                                         md5=item.digests[0] if item.digests else None))
+                continue
+            game_id, rom_path = entries[match]
+            results.append(ScanMatch(item.path, item.size, RESULT_MATCH, md5=match, game_id=game_id,
+                                     rom_path=rom_path, console=get_console_from_rom_path(rom_path)))
+        return results
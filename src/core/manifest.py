@@ -0,0 +1,123 @@
+"""
+Manifiesto persistente de descargas, indexado por hash del catálogo.
+
+Guarda en SQLite, por cada ROM descargada, la ruta local, el tamaño, el estado
+de verificación MD5 y las fechas de descarga y de última comprobación. Al
+abrirlo se carga entero en un dict (unas decenas de miles de filas caben de
+sobra), así que las consultas durante el lote son O(1) y sólo las escrituras
+tocan el disco.
+
+El lote lo consulta antes de cada descarga: si la ROM ya está en disco con el
+tamaño registrado se omite, y si está en otra ruta se enlaza (hard link) en
+lugar de volver a descargarla.
+"""
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    hash TEXT PRIMARY KEY,
+    rom_path TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    verified INTEGER,
+    downloaded_at REAL NOT NULL,
+    checked_at REAL NOT NULL
+)
+"""
+
+
+@dataclass
+class ManifestEntry:
+    """ROM registrada en el manifiesto."""
+    hash: str
+    rom_path: str
+    path: str  # Ruta local del archivo
+    size: int
+    verified: Optional[bool]  # True/False según el MD5, None = no verificado
+    downloaded_at: float
+    checked_at: float
+
+    def exists(self) -> bool:
+        """Comprueba (con un solo stat) que el archivo sigue en disco con el mismo tamaño."""
+        try:
+            return os.stat(self.path).st_size == self.size
+        except OSError:
+            return False
+
+
+class DownloadManifest:
+    """Registro de ROMs descargadas, seguro entre hilos."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(_SCHEMA)
+        self._connection.commit()
+        self._lock = threading.Lock()
+        self._entries: Dict[str, ManifestEntry] = {}
+        for row in self._connection.execute(
+            "SELECT hash, rom_path, path, size, verified, downloaded_at, checked_at FROM downloads"
+        ):
+            entry = ManifestEntry(*row)
+            entry.verified = None if entry.verified is None else bool(entry.verified)
+            self._entries[entry.hash] = entry
+
+    @staticmethod
+    def _key(hash_value: str) -> str:
+        return hash_value.strip().upper()
+
+    def get(self, hash_value: str) -> Optional[ManifestEntry]:
+        with self._lock:
+            return self._entries.get(self._key(hash_value))
+
+    def __contains__(self, hash_value: str) -> bool:
+        return self.get(hash_value) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[ManifestEntry]:
+        with self._lock:
+            return iter(list(self._entries.values()))
+
+    def record(self, hash_value: str, rom_path: str, path: str,
+               size: Optional[int] = None, verified: Optional[bool] = None) -> ManifestEntry:
+        """Registra (o actualiza) una ROM descargada."""
+        now = time.time()
+        if size is None:
+            size = os.path.getsize(path)
+        key = self._key(hash_value)
+        with self._lock:
+            previous = self._entries.get(key)
+            if verified is None and previous is not None and previous.path == path:
+                verified = previous.verified  # No perder una verificación anterior del mismo archivo
+            entry = ManifestEntry(key, rom_path, path, size, verified,
+                                  previous.downloaded_at if previous and previous.path == path else now, now)
+            self._connection.execute(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (entry.hash, entry.rom_path, entry.path, entry.size,
+                 None if verified is None else int(verified), entry.downloaded_at, entry.checked_at)
+            )
+            self._connection.commit()
+            self._entries[key] = entry
+            return entry
+
+    def remove(self, hash_value: str):
+        key = self._key(hash_value)
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._connection.execute("DELETE FROM downloads WHERE hash = ?", (key,))
+                self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
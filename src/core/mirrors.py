@@ -0,0 +1,233 @@
+"""
+Selección de mirror para los archivos de archive.org.
+
+Cada archivo de un item de archive.org se puede pedir por la URL canónica
+(`https://archive.org/download/<item>/<ruta>`, que redirige a un datanode) o
+directamente a cualquiera de los datanodes que tienen una copia del item
+(`https://<servidor>/<n>/items/<item>/<ruta>`). Los datanodes se obtienen de la
+API de metadatos (`/metadata/<item>/workable_servers` y `/dir`), una sola vez
+por item.
+
+Por cada host se guarda una puntuación de salud: media móvil del tiempo de
+respuesta de las consultas HEAD y fallos consecutivos. Un host que falla queda
+en cuarentena con espera creciente, de modo que las descargas siguientes (y los
+reintentos de la misma) pasan al siguiente mirror sin intervención del usuario.
+"""
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+import requests
+
+ARCHIVE_HOST = "archive.org"
+
+_DOWNLOAD_PATH = re.compile(r"^/download/([^/]+)/(.+)$")
+_DATANODE_PATH = re.compile(r"^/\d+/items/([^/]+)/(.+)$")
+
+
+def parse_archive_url(url: str) -> Optional[Tuple[str, str]]:
+    """Devuelve (item, ruta relativa sin codificar) de una URL de archive.org, o None."""
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host != ARCHIVE_HOST and not host.endswith("." + ARCHIVE_HOST):
+        return None
+    match = _DOWNLOAD_PATH.match(parts.path)
+    if match:
+        return unquote(match.group(1)), unquote(match.group(2))
+    match = _DATANODE_PATH.match(parts.path)
+    if match:
+        return unquote(match.group(1)), unquote(match.group(2))
+    return None
+
+
+def _quote_path(path: str) -> str:
+    return quote(path, safe="/-_.")
+
+
+@dataclass
+class HostHealth:
+    """Estado de salud de un host."""
+    rtt: Optional[float] = None  # Media móvil (segundos) de las respuestas HEAD
+    failures: int = 0  # Fallos consecutivos
+    quarantined_until: float = 0.0
+    measured_at: float = 0.0  # Última medición de tiempo de respuesta (monotonic)
+
+    RTT_ALPHA = 0.3
+    UNKNOWN_RTT = 0.5  # Hosts sin medir: se prueban antes que uno lento conocido
+
+    def score(self) -> float:
+        """Menor es mejor."""
+        return self.rtt if self.rtt is not None else self.UNKNOWN_RTT
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.quarantined_until
+
+
+class MirrorSelector:
+    """Ordena las URLs alternativas de un archivo según la salud de cada host."""
+
+    def __init__(self, session_for: Callable[[str], requests.Session],
+                 before_request: Optional[Callable[[str], None]] = None,
+                 probe_timeout: float = 5.0, probe_interval: float = 300.0,
+                 metadata_ttl: float = 3600.0,
+                 failure_cooldown: float = 30.0, max_cooldown: float = 600.0):
+        self.session_for = session_for  # host -> sesión HTTP (compartida con el downloader)
+        self.before_request = before_request  # url -> espera del limitador del host
+        self.probe_timeout = probe_timeout
+        self.probe_interval = probe_interval  # Antigüedad a partir de la cual se vuelve a medir un host
+        self.metadata_ttl = metadata_ttl
+        self.failure_cooldown = failure_cooldown
+        self.max_cooldown = max_cooldown
+        self._items: Dict[str, Tuple[float, List[str]]] = {}  # item -> (caduca, [bases])
+        self._health: Dict[str, HostHealth] = {}
+        self._lock = threading.Lock()
+        self._item_locks: Dict[str, threading.Lock] = {}
+
+    # --- Candidatos ----------------------------------------------------------
+
+    def _item_bases(self, item: str) -> List[str]:
+        """Bases de datanode (`https://host/n/items/item/`) del item, con caché."""
+        with self._lock:
+            cached = self._items.get(item)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+            item_lock = self._item_locks.setdefault(item, threading.Lock())
+        with item_lock:  # Una sola consulta de metadatos por item aunque haya varios hilos
+            with self._lock:
+                cached = self._items.get(item)
+                if cached and cached[0] > time.monotonic():
+                    return cached[1]
+            bases = self._fetch_item_bases(item)
+            # Si la API falla se reintenta antes (un minuto) que con éxito
+            ttl = self.metadata_ttl if bases else min(60.0, self.metadata_ttl)
+            with self._lock:
+                self._items[item] = (time.monotonic() + ttl, bases)
+            return bases
+
+    def _fetch_item_bases(self, item: str) -> List[str]:
+        session = self.session_for(ARCHIVE_HOST)
+        base = f"https://{ARCHIVE_HOST}/metadata/{quote(item)}"
+        try:
+            if self.before_request:
+                self.before_request(base)
+            servers = session.get(base + "/workable_servers", timeout=self.probe_timeout).json().get("result")
+            directory = session.get(base + "/dir", timeout=self.probe_timeout).json().get("result")
+        except (requests.RequestException, ValueError):
+            return []
+        if not servers or not isinstance(directory, str):
+            return []
+        directory = directory.rstrip("/")
+        return [f"https://{server}{_quote_path(directory)}/" for server in servers if isinstance(server, str)]
+
+    def candidates(self, url: str) -> List[str]:
+        """URLs equivalentes de `url` (incluida ella), ordenadas de mejor a peor."""
+        parsed = parse_archive_url(url)
+        if parsed is None:
+            return [url]
+        item, rel = parsed
+        urls = [url]
+        canonical = f"https://{ARCHIVE_HOST}/download/{_quote_path(item)}/{_quote_path(rel)}"
+        if canonical != url:
+            urls.append(canonical)
+        for base in self._item_bases(item):
+            candidate = base + _quote_path(rel)
+            if candidate not in urls:
+                urls.append(candidate)
+        return self.rank(urls)
+
+    def rank(self, urls: List[str]) -> List[str]:
+        """Ordena por salud: primero los hosts disponibles por menor tiempo de respuesta,
+        después los que están en cuarentena por el momento en que salen de ella."""
+        now = time.monotonic()
+        with self._lock:
+            def key(item):
+                position, url = item
+                health = self._health.get(urlsplit(url).netloc.lower(), HostHealth())
+                if health.healthy(now):
+                    return (0, health.score(), position)
+                return (1, health.quarantined_until, position)
+            return [url for _, url in sorted(enumerate(urls), key=key)]
+
+    def best(self, url: str) -> str:
+        return self.candidates(url)[0]
+
+    # --- Salud ---------------------------------------------------------------
+
+    def _host_health(self, host: str) -> HostHealth:
+        health = self._health.get(host)
+        if health is None:
+            health = self._health[host] = HostHealth()
+        return health
+
+    def record_success(self, url: str, rtt: Optional[float] = None):
+        with self._lock:
+            health = self._host_health(urlsplit(url).netloc.lower())
+            health.failures = 0
+            health.quarantined_until = 0.0
+            if rtt is not None:
+                health.measured_at = time.monotonic()
+                health.rtt = rtt if health.rtt is None else (
+                    HostHealth.RTT_ALPHA * rtt + (1 - HostHealth.RTT_ALPHA) * health.rtt
+                )
+
+    def record_failure(self, url: str):
+        with self._lock:
+            health = self._host_health(urlsplit(url).netloc.lower())
+            health.failures += 1
+            cooldown = min(self.max_cooldown, self.failure_cooldown * 2 ** (health.failures - 1))
+            health.quarantined_until = time.monotonic() + cooldown
+
+    def health(self) -> Dict[str, HostHealth]:
+        """Copia del estado de salud por host (para informes)."""
+        with self._lock:
+            return {
+                host: HostHealth(h.rtt, h.failures, h.quarantined_until, h.measured_at)
+                for host, h in self._health.items()
+            }
+
+    # --- Sondeo --------------------------------------------------------------
+
+    def _head(self, url: str) -> Tuple[Optional[int], Optional[requests.Response]]:
+        try:
+            if self.before_request:
+                self.before_request(url)
+            started = time.monotonic()
+            response = self.session_for(urlsplit(url).netloc.lower()).head(
+                url, allow_redirects=True, timeout=self.probe_timeout
+            )
+        except requests.RequestException:
+            self.record_failure(url)
+            return None, None
+        rtt = time.monotonic() - started
+        if response.ok:
+            self.record_success(url, rtt)
+        elif response.status_code >= 500 or response.status_code == 429:
+            self.record_failure(url)
+        length = response.headers.get("Content-Length")
+        size = int(length) if response.ok and length and length.isdigit() else None
+        return size, response
+
+    def _needs_measure(self, url: str, now: float) -> bool:
+        with self._lock:
+            health = self._health.get(urlsplit(url).netloc.lower())
+            return health is None or (health.healthy(now) and now - health.measured_at >= self.probe_interval)
+
+    def probe(self, url: str) -> Tuple[List[str], Optional[int], List[requests.Response]]:
+        """Consulta con HEAD el mejor mirror de `url` y, a la vez, los hosts sin
+        medición reciente (así un lote grande no repite la ronda completa por archivo).
+
+        Devuelve (candidatos ordenados tras la medición, tamaño, respuestas recibidas).
+        El tamaño es el del primer mirror que respondió bien.
+        """
+        urls = self.candidates(url)
+        now = time.monotonic()
+        targets = [urls[0]] + [u for u in urls[1:] if self._needs_measure(u, now)]
+        with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+            results = list(pool.map(self._head, targets))
+        size = next((size for size, _ in results if size is not None), None)
+        responses = [response for _, response in results if response is not None]
+        return self.rank(urls), size, responses
@@ -0,0 +1,93 @@
+"""
+Índice invertido de nombres de juego para la búsqueda por nombre.
+
+Usa un índice de trigramas para la búsqueda por subcadena; las consultas de
+menos de tres caracteres, sin trigramas, recorren los nombres. Los resultados
+se ordenan por relevancia: nombre exacto, prefijo del nombre, prefijo de
+palabra y subcadena.
+"""
+import unicodedata
+from typing import Any, Dict, List, Mapping, Sequence, Set
+
+# Relevancia (menor = mejor)
+RANK_EXACT = 0
+RANK_NAME_PREFIX = 1
+RANK_WORD_PREFIX = 2
+RANK_SUBSTRING = 3
+
+
+def normalize_name(text: str) -> str:
+    """Minúsculas, sin acentos y con cualquier signo reemplazado por espacio."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = ''.join(ch if ch.isalnum() else ' ' for ch in text)
+    return ' '.join(text.split())
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    """Índice de búsqueda sobre una lista de juegos con clave 'name'."""
+
+    def __init__(self, games: Sequence[Mapping[str, Any]]):
+        self._games: List[Mapping[str, Any]] = list(games)
+        self._names: List[str] = []
+        self._trigrams: Dict[str, List[int]] = {}
+
+        for position, game in enumerate(self._games):
+            name = normalize_name(game.get('name') or '')
+            self._names.append(name)
+            for gram in _trigrams(name):
+                self._trigrams.setdefault(gram, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def _candidate_positions(self, query: str) -> Set[int]:
+        """Posiciones cuyo nombre contiene `query`."""
+        if len(query) < 3:
+            # Sin trigramas posibles: recorrido lineal de los nombres (subcadena, como antes)
+            return {p for p, name in enumerate(self._names) if query in name}
+        postings = [self._trigrams.get(gram) for gram in _trigrams(query)]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return {p for p in candidates if query in self._names[p]}
+
+    def _rank(self, name: str, query: str) -> int:
+        if name == query:
+            return RANK_EXACT
+        if name.startswith(query):
+            return RANK_NAME_PREFIX
+        if (' ' + query) in (' ' + name):
+            return RANK_WORD_PREFIX
+        return RANK_SUBSTRING
+
+    def search(self, query: str, limit: int = 10) -> List[Mapping[str, Any]]:
+        """Devuelve los juegos que coinciden, ordenados por relevancia."""
+        query = normalize_name(query)
+        if not query:
+            return []
+        positions = self._candidate_positions(query)
+        # Empate: nombre más corto y luego el orden de la lista (alfabético)
+        ranked = sorted(
+            positions,
+            key=lambda p: (self._rank(self._names[p], query), len(self._names[p]), p)
+        )
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self._games[p] for p in ranked]
+
+    def matching_positions(self, query: str) -> List[int]:
+        """Posiciones (en la lista original) de todas las coincidencias, en ese orden."""
+        query = normalize_name(query)
+        if not query:
+            return list(range(len(self._games)))
+        return sorted(self._candidate_positions(query))
@@ -0,0 +1,156 @@
+"""
+Pipeline asíncrono para la descarga en lote de la lista de deseos.
+
+Las etapas se solapan y se comunican con colas acotadas:
+
+    nombres -> resolver (hash/rom_path) -> URL -> HEAD (tamaño) -> descarga
+
+La primera descarga empieza mientras se siguen resolviendo los demás juegos.
+Si una etapa va más lenta, su cola se llena y las anteriores esperan
+(contrapresión), así que nunca hay más de `queue_size` elementos por etapa.
+El trabajo bloqueante (lectura de la lista, HTTP, disco) se ejecuta en pools
+de hilos propios de cada etapa; el bucle de eventos sólo coordina.
+
+Al cancelar (Ctrl-C) se detienen las descargas en curso en el siguiente bloque
+y sus `.part` quedan listos para reanudar.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+import requests
+
+from .downloader import DownloadResult, DownloadTask, HTTPDownloader, destination_for, failed_result
+from .interfaces import GameInfo
+from ..factories.url_factory import URLGeneratorFactory
+
+_DONE = object()  # Marca de fin de cola (una por consumidor)
+
+
+class BatchPipeline:
+    """Resuelve y descarga una lista de juegos con etapas concurrentes."""
+
+    def __init__(self, resolve: Callable[[str], Optional[GameInfo]],
+                 downloader: HTTPDownloader, download_dir: str,
+                 queue_size: int = 8, resolve_workers: int = 2, probe_workers: int = 4,
+                 on_unresolved: Optional[Callable[[str], None]] = None,
+                 on_result: Optional[Callable[[DownloadResult], None]] = None):
+        self.resolve = resolve
+        self.downloader = downloader
+        self.download_dir = download_dir
+        self.queue_size = max(1, queue_size)
+        self.resolve_workers = max(1, resolve_workers)
+        self.probe_workers = max(1, probe_workers)
+        self.on_unresolved = on_unresolved
+        self.on_result = on_result
+        self.results: List[DownloadResult] = []
+        self.unresolved: List[str] = []
+
+    async def run(self, names: Iterable[str]) -> List[DownloadResult]:
+        """Procesa todos los nombres. Devuelve los resultados en orden de llegada."""
+        names = iter(names)
+        resolved = asyncio.Queue(self.queue_size)
+        tasks = asyncio.Queue(self.queue_size)
+        probed = asyncio.Queue(self.queue_size)
+        download_workers = self.downloader.max_workers
+
+        pools = [
+            ThreadPoolExecutor(self.resolve_workers, thread_name_prefix="resolve"),
+            ThreadPoolExecutor(self.probe_workers, thread_name_prefix="probe"),
+            ThreadPoolExecutor(download_workers, thread_name_prefix="download"),
+        ]
+        resolve_pool, probe_pool, download_pool = pools
+
+        stages = [
+            self._stage(self.resolve_workers, lambda: self._resolve_worker(names, resolved, resolve_pool),
+                        resolved, consumers=1),
+            self._stage(1, lambda: self._url_worker(resolved, tasks),
+                        tasks, consumers=self.probe_workers),
+            self._stage(self.probe_workers, lambda: self._probe_worker(tasks, probed, probe_pool),
+                        probed, consumers=download_workers),
+            self._stage(download_workers, lambda: self._download_worker(probed, download_pool)),
+        ]
+        running = [asyncio.ensure_future(stage) for stage in stages]
+        try:
+            await asyncio.gather(*running)
+        except BaseException:
+            # Ctrl-C o error en una etapa: parar descargas y desmontar el resto
+            self.downloader.cancel()
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+        finally:
+            # Espera a los hilos en curso (terminan en el siguiente bloque si se canceló)
+            for pool in pools:
+                pool.shutdown(wait=True)
+        return self.results
+
+    @staticmethod
+    async def _stage(workers: int, worker: Callable, output: Optional[asyncio.Queue] = None,
+                     consumers: int = 0):
+        """Ejecuta `workers` copias de una etapa y cierra su cola de salida."""
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        if output is not None:
+            for _ in range(consumers):
+                await output.put(_DONE)
+
+    async def _resolve_worker(self, names, output: asyncio.Queue, pool: ThreadPoolExecutor):
+        loop = asyncio.get_running_loop()
+        for name in names:  # Iterador compartido: cada nombre lo toma un solo worker
+            game = await loop.run_in_executor(pool, self.resolve, name)
+            if game is None:
+                self.unresolved.append(name)
+                if self.on_unresolved:
+                    self.on_unresolved(name)
+                continue
+            await output.put(game)
+
+    async def _url_worker(self, source: asyncio.Queue, output: asyncio.Queue):
+        # Generación memoizada y sin E/S: se hace en el propio bucle
+        while True:
+            game = await source.get()
+            if game is _DONE:
+                return
+            url = URLGeneratorFactory.generate_url(game.rom_path)
+            await output.put(DownloadTask(url, destination_for(game.rom_path, self.download_dir), game))
+
+    async def _probe_worker(self, source: asyncio.Queue, output: asyncio.Queue,
+                            pool: ThreadPoolExecutor):
+        loop = asyncio.get_running_loop()
+        while True:
+            task = await source.get()
+            if task is _DONE:
+                return
+            if self.downloader.has_local_copy(task):
+                await output.put(task)  # Ya descargado: la descarga lo omitirá o lo enlazará
+                continue
+            try:
+                task.size = await loop.run_in_executor(pool, self.downloader.probe, task)
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code in (404, 410):
+                    # No disponible: se informa sin ocupar un hueco de descarga
+                    self._record(DownloadResult(task, False, error=str(e)))
+                    continue
+            except (requests.RequestException, OSError):
+                pass  # Sin tamaño previo; la descarga lo volverá a intentar
+            await output.put(task)
+
+    async def _download_worker(self, source: asyncio.Queue, pool: ThreadPoolExecutor):
+        loop = asyncio.get_running_loop()
+        while True:
+            task = await source.get()
+            if task is _DONE:
+                return
+            try:
+                result = await loop.run_in_executor(pool, self.downloader.download, task)
+            except Exception as e:
+                # Un fallo inesperado en un juego no detiene el resto del lote
+                result = failed_result(task, e)
+            self._record(result)
+
+    def _record(self, result: DownloadResult):
+        self.results.append(result)
+        if self.on_result:
+            self.on_result(result)
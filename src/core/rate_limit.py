@@ -0,0 +1,143 @@
+"""
+Límites por host para las descargas: ritmo de peticiones, concurrencia adaptativa
+y política de reintentos.
+
+- `TokenBucket`: cada petición HTTP (GET, HEAD, piezas de rango) consume un
+  token; los tokens se reponen a `rate` por segundo con ráfagas de `burst`.
+  Un `Retry-After` del servidor pausa el bucket entero de ese host.
+- `AdaptiveConcurrency`: descargas simultáneas por host con AIMD. Cada
+  descarga correcta suma 1/límite (≈ +1 por ronda completa) y cada señal de
+  saturación (429, 503, timeouts, conexiones cortadas) divide el límite a la
+  mitad, como mucho una vez por ventana para no hundirlo por una sola ráfaga.
+- `RetryPolicy`: espera exponencial con jitter completo entre intentos,
+  respetando `Retry-After` cuando el servidor lo envía.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Segundos indicados por una cabecera `Retry-After` (número o fecha HTTP)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment is None:
+        return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Limitador de ritmo de peticiones, seguro entre hilos."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate  # Tokens por segundo (<= 0 desactiva el límite)
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, cancelled: Optional[threading.Event] = None) -> bool:
+        """Espera hasta obtener un token. Devuelve False si se canceló mientras esperaba."""
+        if self.rate <= 0:
+            return True
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            if cancelled is not None:
+                if cancelled.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Bloquea nuevas peticiones durante `seconds` (p.ej. por `Retry-After`)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class AdaptiveConcurrency:
+    """Semáforo cuyo límite se ajusta con incremento aditivo y reducción multiplicativa."""
+
+    DECREASE_WINDOW = 5.0  # Segundos entre reducciones consecutivas
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: Optional[int] = None):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum if maximum is not None else initial)
+        self._limit = float(min(self.maximum, max(self.minimum, initial)))
+        self._active = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @contextmanager
+    def slot(self):
+        with self._condition:
+            while self._active >= int(self._limit):
+                self._condition.wait()
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify()
+
+    def on_success(self):
+        with self._condition:
+            before = int(self._limit)
+            self._limit = min(self.maximum, self._limit + 1.0 / max(1.0, self._limit))
+            if int(self._limit) > before:
+                self._condition.notify()
+
+    def on_congestion(self):
+        with self._condition:
+            now = time.monotonic()
+            if now - self._last_decrease < self.DECREASE_WINDOW:
+                return
+            self._last_decrease = now
+            self._limit = max(float(self.minimum), self._limit / 2)
+
+
+class RetryPolicy:
+    """Número de intentos y espera entre ellos (exponencial con jitter completo)."""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Espera antes del intento `attempt + 1` (attempt empieza en 1)."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        if retry_after is not None:
+            return max(min(retry_after, self.max_delay * 5), backoff)
+        return backoff
+
+
+class HostLimits:
+    """Límites compartidos por todas las descargas de un mismo host."""
+
+    def __init__(self, rate: float, burst: int, concurrency: int, max_concurrency: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(concurrency, 1, max_concurrency)
@@ -0,0 +1,213 @@
+"""
+Descarga segmentada de archivos grandes (imágenes de disco de PS1/PS2/PSP).
+
+El archivo se divide en piezas de tamaño fijo que varias conexiones piden en
+paralelo con `Range` y escriben directamente en su posición dentro del `.part`
+preasignado, sin copias ni reensamblado posterior. El número de conexiones
+empieza en `min_segments` y crece mientras cada conexión nueva aumente el
+rendimiento agregado medido (hasta `max_segments`).
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+import requests
+
+_BINARY = getattr(os, "O_BINARY", 0)
+
+
+class DownloadCancelled(Exception):
+    """La descarga se interrumpió a petición del usuario (el parcial se conserva)."""
+
+
+def preallocate(path: str, size: int):
+    """Crea (o ajusta) el archivo con el tamaño final, reservando espacio si el SO lo permite."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | _BINARY, 0o644)
+    try:
+        os.ftruncate(fd, size)
+        if hasattr(os, "posix_fallocate") and size:
+            try:
+                os.posix_fallocate(fd, 0, size)
+            except OSError:
+                pass  # Sistemas de archivos sin soporte: queda como archivo disperso
+    finally:
+        os.close(fd)
+
+
+class _PositionalWriter:
+    """Escritura posicional en un descriptor compartido entre hilos."""
+
+    def __init__(self, path: str):
+        self.fd = os.open(path, os.O_RDWR | _BINARY)
+        self._lock = None if hasattr(os, "pwrite") else threading.Lock()
+
+    def write_at(self, data: bytes, offset: int):
+        if self._lock is None:
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(self.fd, view, offset)
+                view = view[written:]
+                offset += written
+        else:
+            with self._lock:
+                os.lseek(self.fd, offset, os.SEEK_SET)
+                os.write(self.fd, data)
+
+    def sync(self):
+        os.fsync(self.fd)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _ConnectionController:
+    """Decide cuándo abrir otra conexión según el rendimiento agregado medido."""
+
+    MIN_SAMPLE_SECONDS = 0.5
+    GAIN_THRESHOLD = 1.10  # Otra conexión sólo si la anterior mejoró >10 %
+
+    def __init__(self, min_segments: int, max_segments: int):
+        self.connections = max(1, min_segments)
+        self.max_segments = max(self.connections, max_segments)
+        self._previous_rate: Optional[float] = None
+        self._level_bytes = 0
+        self._level_started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, nbytes: int) -> bool:
+        """Registra bytes recibidos; devuelve True si conviene abrir una conexión más."""
+        with self._lock:
+            self._level_bytes += nbytes
+            elapsed = time.monotonic() - self._level_started
+            if self.connections >= self.max_segments or elapsed < self.MIN_SAMPLE_SECONDS:
+                return False
+            rate = self._level_bytes / elapsed
+            if self._previous_rate is not None and rate < self._previous_rate * self.GAIN_THRESHOLD:
+                # La última conexión no compensó: se mantiene el nivel actual
+                self.max_segments = self.connections
+                return False
+            self._previous_rate = rate
+            self._level_bytes = 0
+            self._level_started = time.monotonic()
+            self.connections += 1
+            return True
+
+
+class SegmentedFetcher:
+    """Descarga las piezas pendientes de un archivo en paralelo."""
+
+    def __init__(self, session: requests.Session, url: str, part_path: str,
+                 total_size: int, piece_size: int, pieces: List[int],
+                 validator: Optional[str], chunk_size: int, timeout: float,
+                 min_segments: int, max_segments: int,
+                 on_piece_done: Callable[[int], None],
+                 cancelled: Optional[threading.Event] = None,
+                 before_request: Optional[Callable[[], None]] = None):
+        self.session = session
+        self.url = url
+        self.part_path = part_path
+        self.total_size = total_size
+        self.piece_size = piece_size
+        self.validator = validator
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.on_piece_done = on_piece_done
+        self.cancelled = cancelled
+        self.before_request = before_request  # Limitador de ritmo del host
+        self._pending = deque(pieces)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._controller = _ConnectionController(min_segments, max_segments)
+        self._writer: Optional[_PositionalWriter] = None
+        self.error: Optional[str] = None
+        self.exception: Optional[BaseException] = None
+        self.bytes_written = 0
+
+    def run(self) -> bool:
+        """Descarga todas las piezas pendientes. Devuelve True si no hubo errores."""
+        self._writer = _PositionalWriter(self.part_path)
+        try:
+            for _ in range(min(self._controller.connections, len(self._pending))):
+                self._spawn()
+            # Las conexiones nuevas se añaden a la lista mientras se espera
+            index = 0
+            while True:
+                with self._lock:
+                    if index >= len(self._threads):
+                        break
+                    thread = self._threads[index]
+                thread.join()
+                index += 1
+            self._writer.sync()
+        finally:
+            self._writer.close()
+        return self.error is None
+
+    def _spawn(self):
+        thread = threading.Thread(target=self._worker, daemon=True)
+        with self._lock:
+            self._threads.append(thread)
+        thread.start()
+
+    def _next_piece(self) -> Optional[int]:
+        with self._lock:
+            if self.error is not None or not self._pending:
+                return None
+            return self._pending.popleft()
+
+    def _worker(self):
+        while True:
+            piece = self._next_piece()
+            if piece is None:
+                return
+            try:
+                self._fetch_piece(piece)
+                # La pieza queda en disco antes de registrarla como completada. Un fallo
+                # al registrarla (diario, hash) también detiene la descarga: sin él el
+                # MD5 quedaría a medias y se tomaría por un archivo distinto
+                self._writer.sync()
+                self.on_piece_done(piece)
+            except (requests.RequestException, OSError, DownloadCancelled) as e:
+                with self._lock:
+                    if self.error is None:
+                        self.error = str(e) or "Descarga cancelada"
+                        self.exception = e
+                return
+
+    def _fetch_piece(self, piece: int):
+        start = piece * self.piece_size
+        end = min(start + self.piece_size, self.total_size) - 1
+        headers = {"Range": f"bytes={start}-{end}"}
+        if self.validator:
+            headers["If-Range"] = self.validator
+
+        if self.before_request is not None:
+            self.before_request()
+        with self.session.get(self.url, headers=headers, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code != 206 or not content_range.startswith(f"bytes {start}-"):
+                raise requests.RequestException(
+                    f"El servidor no respetó el rango {start}-{end} (¿cambió el archivo?)"
+                )
+            offset = start
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if not chunk:
+                    continue
+                if self.cancelled is not None and self.cancelled.is_set():
+                    raise DownloadCancelled()
+                self._writer.write_at(chunk, offset)
+                offset += len(chunk)
+                if self._controller.record(len(chunk)):
+                    with self._lock:
+                        has_more = bool(self._pending)
+                    if has_more:
+                        self._spawn()
+            if offset != end + 1:
+                raise requests.RequestException(
+                    f"Pieza {piece} incompleta: {offset - start}/{end + 1 - start} bytes"
+                )
+        with self._lock:
+            self.bytes_written += end + 1 - start
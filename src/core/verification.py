@@ -0,0 +1,290 @@
+"""
+Verificación MD5 en streaming de las ROMs descargadas.
+
+Los hashes del catálogo son los MD5 que calcula RetroAchievements sobre la ROM
+(no sobre el .zip que la contiene). El verificador recibe los bytes a medida
+que se escriben en disco, de modo que el archivo nunca se vuelve a leer:
+
+- Si el archivo es un .zip y se pide verificar el contenido, se recorren sus
+  entradas descomprimiendo al vuelo y se calcula el MD5 de cada ROM interna.
+- Si no es un .zip, se calcula el MD5 del archivo completo.
+
+Algunas consolas llevan una cabecera que RetroAchievements descarta antes de
+calcular el hash (iNES, copiadores de SNES/PC Engine, Atari 7800, Lynx); en
+ellas se calcula también el MD5 sin cabecera. Para las consolas cuyo hash no
+es un MD5 directo (discos, arcade, N64, DS...) no se verifica nada.
+"""
+import hashlib
+import struct
+import zlib
+from typing import List, Optional, Tuple
+
+from .interfaces import GameInfo
+from ..utils.rom_info import get_console_from_rom_path
+
+# Consolas en las que el hash de RetroAchievements es el MD5 de la ROM tal cual
+PLAIN_MD5_CONSOLES = {
+    'Game Boy', 'Game Boy Color', 'Game Boy Advance',
+    'Genesis/Mega Drive', 'Sega 32X', 'Master System', 'Game Gear', 'Gamegear', 'SG-1000',
+    'Atari 2600', 'Atari Jaguar', 'Colecovision', 'Intellivision', 'Vectrex',
+    'Virtual Boy', 'Pokemon Mini', 'Neo Geo Pocket', 'WonderSwan', 'Mega Duck',
+    'Watara Supervision', 'Fairchild Channel F', 'Magnavox Odyssey 2', 'MSX',
+    'Amstrad Cpc', 'Apple Ii', 'Pc 8000 8800', 'Uzebox', 'Wasm 4',
+    'Arcadia 2001', 'Interton Vc 4000', 'Elektor Tv Games Computer',
+}
+
+# Consolas con cabecera opcional: (tamaño, offset de la firma, firma o None)
+HEADER_RULES = {
+    'NES': (16, 0, (b"NES\x1a", b"FDS\x1a")),
+    'Fds': (16, 0, (b"FDS\x1a",)),
+    'SNES': (512, 0, None),
+    'PC Engine': (512, 0, None),
+    'TurboGrafx-16': (512, 0, None),
+    'Pc Engine Turbografx 16': (512, 0, None),
+    'Atari 7800': (128, 1, (b"ATARI7800",)),
+    'Atari Lynx': (64, 0, (b"LYNX",)),
+}
+
+_ZIP_LOCAL = b"PK\x03\x04"
+_ZIP_CENTRAL = (b"PK\x01\x02", b"PK\x05\x06")
+_ZIP_DESCRIPTOR = b"PK\x07\x08"
+_ZIP_HEADER = struct.Struct("<4sHHHHHIIIHH")
+_INFLATE_STEP = 1024 * 1024  # Límite de salida por llamada (zips muy comprimibles)
+
+Header = Tuple[int, int, Optional[Tuple[bytes, ...]]]
+
+
+class RomHasher:
+    """MD5 de una ROM, con y sin cabecera si la consola la admite."""
+
+    def __init__(self, header: Optional[Header] = None):
+        self._full = hashlib.md5()
+        self._header = header
+        self._headerless = hashlib.md5() if header else None
+        self._prefix = bytearray()
+
+    def update(self, data):
+        self._full.update(data)
+        if self._headerless is not None:
+            missing = self._header[0] - len(self._prefix)
+            if missing > 0:
+                self._prefix += data[:missing]
+                data = data[missing:]
+            self._headerless.update(data)
+
+    def digests(self) -> List[str]:
+        """MD5 candidatos: el del archivo completo y, si tiene la cabecera, el de sin ella."""
+        result = [self._full.hexdigest()]
+        if self._headerless is not None:
+            size, offset, magic = self._header
+            has_header = len(self._prefix) == size and (
+                magic is None or any(self._prefix[offset:offset + len(m)] == m for m in magic)
+            )
+            if has_header:
+                result.append(self._headerless.hexdigest())
+        return result
+
+
+class _ZipStream:
+    """Recorre un .zip recibido en streaming y calcula el MD5 de cada entrada."""
+
+    def __init__(self, header: Optional[Header]):
+        self._header = header
+        self._buffer = bytearray()
+        self._state = "header"
+        self._member: Optional[RomHasher] = None
+        self._inflater = None
+        self._remaining = 0  # Entradas sin comprimir: bytes pendientes
+        self._descriptor = 0  # Tamaño del descriptor tras la entrada (sin firma)
+        self.digests: List[str] = []
+        self.supported = True
+
+    def update(self, data):
+        if self._state in ("done", "unsupported"):
+            return
+        if self._state == "data" and not self._buffer:
+            # Camino habitual: el bloque va directo al descompresor sin copiarse
+            data = self._consume_member(memoryview(data))
+            if not data:
+                return
+        self._buffer += data
+        self._process()
+
+    def _process(self):
+        while self._state not in ("done", "unsupported"):
+            if self._state == "header":
+                if not self._read_header():
+                    return
+            elif self._state == "data":
+                pending = self._consume_member(memoryview(bytes(self._buffer)))
+                self._buffer = bytearray(pending)
+                if self._state == "data":
+                    return
+            elif self._state == "descriptor":
+                needed = self._descriptor + 4
+                if len(self._buffer) < needed:
+                    return
+                skip = needed if self._buffer[:4] == _ZIP_DESCRIPTOR else self._descriptor
+                del self._buffer[:skip]
+                self._state = "header"
+
+    def _read_header(self) -> bool:
+        if len(self._buffer) < 4:
+            return False
+        signature = bytes(self._buffer[:4])
+        if signature in _ZIP_CENTRAL:
+            self._state = "done"  # Directorio central: no hay más entradas
+            return True
+        if signature != _ZIP_LOCAL:
+            self._fail()
+            return True
+        if len(self._buffer) < _ZIP_HEADER.size:
+            return False
+        (_, _, flags, method, _, _, _, compressed, uncompressed,
+         name_len, extra_len) = _ZIP_HEADER.unpack_from(self._buffer)
+        total = _ZIP_HEADER.size + name_len + extra_len
+        if len(self._buffer) < total:
+            return False
+        name = bytes(self._buffer[_ZIP_HEADER.size:_ZIP_HEADER.size + name_len])
+        extra = bytes(self._buffer[_ZIP_HEADER.size + name_len:total])
+        del self._buffer[:total]
+
+        zip64 = compressed == 0xFFFFFFFF or uncompressed == 0xFFFFFFFF
+        if zip64:
+            compressed = self._zip64_compressed_size(extra, uncompressed == 0xFFFFFFFF)
+        has_descriptor = bool(flags & 0x08)
+        self._descriptor = (20 if zip64 else 12) if has_descriptor else 0
+
+        if flags & 0x01:
+            self._fail()  # Cifrado
+        elif method == 8:
+            self._inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+        elif method == 0 and compressed is not None and not (has_descriptor and compressed == 0):
+            self._inflater = None
+            self._remaining = compressed
+        else:
+            self._fail()  # Método no soportado o tamaño desconocido
+        if self._state == "unsupported":
+            return True
+        is_dir = name.endswith(b"/")
+        self._member = None if is_dir else RomHasher(self._header)
+        self._state = "data"
+        return True
+
+    @staticmethod
+    def _zip64_compressed_size(extra: bytes, has_uncompressed: bool) -> Optional[int]:
+        pos = 0
+        while pos + 4 <= len(extra):
+            tag, size = struct.unpack_from("<HH", extra, pos)
+            if tag == 0x0001:
+                field = pos + 4 + (8 if has_uncompressed else 0)
+                if field + 8 <= pos + 4 + size:
+                    return struct.unpack_from("<Q", extra, field)[0]
+                return None
+            pos += 4 + size
+        return None
+
+    def _consume_member(self, data: memoryview) -> bytes:
+        """Pasa datos de la entrada actual al hash. Devuelve lo que sobra tras ella."""
+        if self._inflater is None:
+            take = min(self._remaining, len(data))
+            self._hash(data[:take])
+            self._remaining -= take
+            if self._remaining == 0:
+                self._end_member()
+            return bytes(data[take:])
+
+        chunk = data
+        while chunk and not self._inflater.eof:
+            self._hash(self._inflater.decompress(chunk, _INFLATE_STEP))
+            chunk = self._inflater.unconsumed_tail
+        if not self._inflater.eof:
+            return b""
+        leftover = self._inflater.unused_data
+        self._end_member()
+        return leftover
+
+    def _hash(self, data):
+        if self._member is not None and data:
+            self._member.update(data)
+
+    def _end_member(self):
+        if self._member is not None:
+            self.digests.extend(self._member.digests())
+        self._member = None
+        self._inflater = None
+        self._state = "descriptor" if self._descriptor else "header"
+
+    def _fail(self):
+        self.supported = False
+        self._state = "unsupported"
+        self._buffer = bytearray()
+
+
+class StreamingVerifier:
+    """Compara el MD5 de lo descargado con el hash esperado, sin releer el archivo."""
+
+    def __init__(self, expected_md5: str, header: Optional[Header] = None,
+                 zip_content: bool = True):
+        self.expected_md5 = expected_md5.strip().lower()
+        self.header = header
+        self.zip_content = zip_content
+        self._head = bytearray()  # Primeros bytes, para detectar si es un .zip
+        self._target = None
+        self._opaque = False  # .zip sin verificar contenido: no se puede comparar
+
+    def update(self, data):
+        if self._opaque:
+            return
+        if self._target is None:
+            self._head += data
+            if len(self._head) < len(_ZIP_LOCAL):
+                return
+            data, self._head = bytes(self._head), bytearray()
+            if data.startswith(_ZIP_LOCAL):
+                if not self.zip_content:
+                    self._opaque = True
+                    return
+                self._target = _ZipStream(self.header)
+            else:
+                self._target = RomHasher(self.header)
+        self._target.update(data)
+
+    def update_from_file(self, path: str, length: int, chunk_size: int = 1024 * 1024):
+        """Incorpora los primeros `length` bytes de un archivo (parciales ya descargados)."""
+        with open(path, "rb") as file:
+            while length > 0:
+                chunk = file.read(min(chunk_size, length))
+                if not chunk:
+                    break
+                self.update(chunk)
+                length -= len(chunk)
+
+    def matches(self) -> Optional[bool]:
+        """True si coincide, False si no, None si no se pudo verificar."""
+        if self._opaque:
+            return None
+        if self._target is None:
+            if not self._head:
+                return None
+            # Archivo más corto que la firma de un .zip
+            self._target = RomHasher(self.header)
+            self._target.update(bytes(self._head))
+            self._head = bytearray()
+        if isinstance(self._target, _ZipStream):
+            if not self._target.supported or not self._target.digests:
+                return None
+            return self.expected_md5 in self._target.digests
+        return self.expected_md5 in self._target.digests()
+
+
+def verifier_for(game: Optional[GameInfo], zip_content: bool = True) -> Optional[StreamingVerifier]:
+    """Crea el verificador de un juego, o None si su consola no usa un MD5 verificable."""
+    if game is None or not game.hash_value or not game.rom_path:
+        return None
+    console = get_console_from_rom_path(game.rom_path)
+    if console in HEADER_RULES:
+        return StreamingVerifier(game.hash_value, HEADER_RULES[console], zip_content)
+    if console in PLAIN_MD5_CONSOLES:
+        return StreamingVerifier(game.hash_value, None, zip_content)
+    return None
@@ -1,6 +1,15 @@
 """
 Factory para crear generadores de URL según la consola/plataforma.
+
+La resolución es por tabla: cada generador declara las carpetas raíz
+(`ROOT_SEGMENTS`) que maneja y la factory busca el primer segmento normalizado
+del rom_path en un dict. Las URLs generadas se memorizan por rom_path.
+
+Las URLs base salen de `config.BASE_URLS` (claves en `BASE_URL_KEYS` de cada
+generador); los valores de cada clase son los de respaldo sin config.py.
 """
+from functools import lru_cache
+from typing import Dict, Iterable, List
 from urllib.parse import quote
 
 from ..core.interfaces import URLGenerator
@@ -34,65 +43,91 @@ def _strip_first_segment_if_matches(path: str, segment: str) -> str:
     return norm
 
 
-class SNESURLGenerator(URLGenerator):
+def _configured(generator: URLGenerator) -> URLGenerator:
+    """Aplica config.BASE_URLS a las URLs base del generador (`BASE_URL_KEYS`:
+    atributo -> clave de config). Sin config.py se quedan los valores de la clase."""
+    try:
+        import config
+        base_urls = getattr(config, "BASE_URLS", {})
+    except ImportError:
+        base_urls = {}
+    for attribute, key in getattr(generator, "BASE_URL_KEYS", {}).items():
+        if key in base_urls:
+            setattr(generator, attribute, base_urls[key])
+    return generator
+
+
+def _root_segment(path: str) -> str:
+    """Primer segmento del path normalizado, en minúsculas (clave de la tabla)."""
+    return _normalize_slashes(path).split("/", 1)[0].strip().lower()
+
+
+class RootSegmentURLGenerator(URLGenerator):
+    """Base para generadores que se seleccionan por la carpeta raíz del rom_path."""
+    
+    ROOT_SEGMENTS: tuple = ()
+    
+    def can_handle(self, rom_path: str) -> bool:
+        return _root_segment(rom_path) in self.ROOT_SEGMENTS
+
+
+class SNESURLGenerator(RootSegmentURLGenerator):
     """Generador de URLs para SNES/Super Famicom."""
     
     BASE_URL = "https://archive.org/download/retroachievements_collection_SNES-Super_Famicom/"
+    BASE_URL_KEYS = {"BASE_URL": "SNES"}
+    ROOT_SEGMENTS = ("snes-super famicom",)
     
     def generate_url(self, rom_path: str) -> str:
         rel = _normalize_slashes(rom_path)
         return self.BASE_URL + _encode_rel_path(rel)
-    
-    def can_handle(self, rom_path: str) -> bool:
-        return "SNES-Super Famicom" in rom_path
 
 
-class NESURLGenerator(URLGenerator):
+class NESURLGenerator(RootSegmentURLGenerator):
     """Generador de URLs para NES/Famicom."""
     
     BASE_URL = "https://archive.org/download/retroachievements_collection_NES-Famicom/"
+    BASE_URL_KEYS = {"BASE_URL": "NES"}
+    ROOT_SEGMENTS = ("nes-famicom",)
     
     def generate_url(self, rom_path: str) -> str:
         rel = _normalize_slashes(rom_path)
         return self.BASE_URL + _encode_rel_path(rel)
-    
-    def can_handle(self, rom_path: str) -> bool:
-        return "NES-Famicom" in rom_path
 
 
-class PSPURLGenerator(URLGenerator):
+class PSPURLGenerator(RootSegmentURLGenerator):
     """Generador de URLs para PlayStation Portable."""
     
     BASE_URL = "https://dn720005.ca.archive.org/0/items/retroachievements_collection_PlayStation_Portable/PlayStation%20Portable/"
+    BASE_URL_KEYS = {"BASE_URL": "PSP"}
+    ROOT_SEGMENTS = ("playstation portable",)
     
     def generate_url(self, rom_path: str) -> str:
         # La BASE_URL ya incluye 'PlayStation%20Portable/'
         rel = _strip_first_segment_if_matches(rom_path, "PlayStation Portable")
         return self.BASE_URL + _encode_rel_path(rel)
-    
-    def can_handle(self, rom_path: str) -> bool:
-        return "PlayStation Portable" in rom_path
 
 
-class PS1URLGenerator(URLGenerator):
+class PS1URLGenerator(RootSegmentURLGenerator):
     """Generador de URLs para PlayStation 1."""
     
     BASE_URL = "https://archive.org/download/retroachievements_collection_PlayStation/PlayStation/"
+    BASE_URL_KEYS = {"BASE_URL": "PS1"}
+    ROOT_SEGMENTS = ("playstation",)
     
     def generate_url(self, rom_path: str) -> str:
         # La BASE_URL ya incluye 'PlayStation/'
         rel = _strip_first_segment_if_matches(rom_path, "PlayStation")
         return self.BASE_URL + _encode_rel_path(rel)
-    
-    def can_handle(self, rom_path: str) -> bool:
-        return "PlayStation" in rom_path and "PlayStation 2" not in rom_path and "PlayStation Portable" not in rom_path
 
 
-class PS2URLGenerator(URLGenerator):
+class PS2URLGenerator(RootSegmentURLGenerator):
     """Generador de URLs para PlayStation 2."""
     
     BASE_URL_A_M = "https://archive.org/download/retroachievements_collection_PlayStation_2_A-M/PlayStation%202/"
     BASE_URL_N_Z = "https://archive.org/download/retroachievements_collection_PlayStation_2_N-Z/PlayStation%202/"
+    BASE_URL_KEYS = {"BASE_URL_A_M": "PS2_A_M", "BASE_URL_N_Z": "PS2_N_Z"}
+    ROOT_SEGMENTS = ("playstation 2",)
     
     def generate_url(self, rom_path: str) -> str:
         # Quitar prefijo 'PlayStation 2/' si está presente para evitar duplicados
@@ -101,41 +136,38 @@ class PS2URLGenerator(URLGenerator):
         game_name = rel.split('/')[-1] if '/' in rel else rel
         base = self.BASE_URL_A_M if (game_name and game_name[0].upper() < 'N') else self.BASE_URL_N_Z
         return base + _encode_rel_path(rel)
-    
-    def can_handle(self, rom_path: str) -> bool:
-        return "PlayStation 2" in rom_path
 
 
-class SegaURLGenerator(URLGenerator):
+class SegaURLGenerator(RootSegmentURLGenerator):
     """Generador de URLs para consolas Sega (Genesis, Mega Drive, Sega CD)."""
     
     BASE_URL = "https://archive.org/download/retroachievements_collection_v5/"
+    BASE_URL_KEYS = {"BASE_URL": "SEGA"}
+    ROOT_SEGMENTS = ("genesis-mega drive", "sega cd")
     
     def generate_url(self, rom_path: str) -> str:
         rel = _normalize_slashes(rom_path)
         return self.BASE_URL + _encode_rel_path(rel)
-    
-    def can_handle(self, rom_path: str) -> bool:
-        return any(console in rom_path for console in ["Genesis-Mega Drive", "Sega CD"])
 
 
-class ArcadeURLGenerator(URLGenerator):
+class ArcadeURLGenerator(RootSegmentURLGenerator):
     """Generador de URLs para Arcade."""
     
     BASE_URL = "https://archive.org/download/fbnarcade-fullnonmerged/arcade/"
+    BASE_URL_KEYS = {"BASE_URL": "ARCADE"}
+    ROOT_SEGMENTS = ("arcade",)
     
     def generate_url(self, rom_path: str) -> str:
-        rel = _normalize_slashes(rom_path)
+        # La BASE_URL ya incluye 'arcade/'
+        rel = _strip_first_segment_if_matches(rom_path, "arcade")
         return self.BASE_URL + _encode_rel_path(rel)
-    
-    def can_handle(self, rom_path: str) -> bool:
-        return "Arcade" in rom_path
 
 
 class DefaultURLGenerator(URLGenerator):
     """Generador de URLs por defecto."""
     
     BASE_URL = "https://archive.org/download/retroachievements_collection_v5/"
+    BASE_URL_KEYS = {"BASE_URL": "DEFAULT"}
     
     def generate_url(self, rom_path: str) -> str:
         rel = _normalize_slashes(rom_path)
@@ -149,26 +181,39 @@ class URLGeneratorFactory:
     """Factory para crear generadores de URL."""
     
     _generators = [
-        SNESURLGenerator(),
-        NESURLGenerator(),
-        PSPURLGenerator(),
-        PS1URLGenerator(),
-        PS2URLGenerator(),
-        SegaURLGenerator(),
-        ArcadeURLGenerator(),
-        DefaultURLGenerator()  # Debe ir al final como fallback
+        _configured(SNESURLGenerator()),
+        _configured(NESURLGenerator()),
+        _configured(PSPURLGenerator()),
+        _configured(PS1URLGenerator()),
+        _configured(PS2URLGenerator()),
+        _configured(SegaURLGenerator()),
+        _configured(ArcadeURLGenerator()),
     ]
+    _default_generator = _configured(DefaultURLGenerator())
+    
+    # Tabla carpeta raíz normalizada -> generador
+    _by_root: Dict[str, URLGenerator] = {
+        root: generator
+        for generator in _generators
+        for root in generator.ROOT_SEGMENTS
+    }
     
     @classmethod
     def get_generator(cls, rom_path: str) -> URLGenerator:
         """Obtiene el generador apropiado para la ROM."""
-        for generator in cls._generators:
-            if generator.can_handle(rom_path):
-                return generator
-        return cls._generators[-1]  # Retorna el generador por defecto
+        return cls._by_root.get(_root_segment(rom_path), cls._default_generator)
     
     @classmethod
     def generate_url(cls, rom_path: str) -> str:
-        """Genera la URL de descarga para una ROM."""
-        generator = cls.get_generator(rom_path)
-        return generator.generate_url(rom_path)
+        """Genera la URL de descarga para una ROM (memorizada por rom_path)."""
+        return _generate_url_cached(rom_path)
+    
+    @classmethod
+    def generate_urls(cls, rom_paths: Iterable[str]) -> List[str]:
+        """Genera las URLs de descarga de varias ROMs, en el mismo orden."""
+        return [_generate_url_cached(rom_path) for rom_path in rom_paths]
+
+
+@lru_cache(maxsize=16384)
+def _generate_url_cached(rom_path: str) -> str:
+    return URLGeneratorFactory.get_generator(rom_path).generate_url(rom_path)
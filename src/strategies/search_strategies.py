@@ -1,13 +1,18 @@
 """
 Estrategias para diferentes modos de búsqueda de juegos.
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import json
+import os
+import threading
 from rich.console import Console
 from rich.prompt import Prompt
 
 from ..core.interfaces import HashSearchStrategy, GameInfo
 from ..core.data_manager import RetroAchievementsDataManager
+from ..core.hash_cache import HashCache
+from ..core.library_scan import LibraryScanner, ScanReport, DEFAULT_EXTENSIONS, HASH_VERSION, hash_file
+from ..utils.rom_info import analyze_rom_info
 
 
 class DirectHashSearchStrategy(HashSearchStrategy):
@@ -61,6 +66,53 @@ class DirectHashSearchStrategy(HashSearchStrategy):
         return rom_path.split('/')[-1] if '/' in rom_path else rom_path
 
 
+class LibraryScanSearchStrategy(HashSearchStrategy):
+    """Estrategia para identificar ROMs locales por su contenido."""
+    
+    def __init__(self):
+        self.console = Console()
+        self.data_manager = RetroAchievementsDataManager()
+        try:
+            import config
+        except ImportError:
+            config = None
+        self.scanner = LibraryScanner(
+            self.data_manager,
+            workers=getattr(config, "SCAN_WORKERS", None),
+            read_size=getattr(config, "SCAN_READ_SIZE", 8 * 1024 * 1024),
+            mmap_threshold=getattr(config, "SCAN_MMAP_THRESHOLD", 64 * 1024 * 1024),
+            extensions=getattr(config, "SCAN_EXTENSIONS", DEFAULT_EXTENSIONS),
+        )
+        self.cache_file = getattr(config, "SCAN_HASH_CACHE_FILE", None)
+    
+    def search(self, file_path: str) -> Optional[GameInfo]:
+        """Identifica un único archivo local (ROM suelta o .zip)."""
+        hashed = hash_file(file_path, self.scanner.read_size, self.scanner.mmap_threshold)
+        result = self.scanner.resolve([hashed])[0]
+        if result.rom_path is None:
+            return None
+        return GameInfo(
+            name=result.rom_path.split('/')[-1],
+            console=result.console,
+            hash_value=result.md5,
+            rom_path=result.rom_path
+        )
+    
+    def scan(self, directory: str, on_progress=None) -> ScanReport:
+        """Escanea un directorio completo con todos los núcleos.
+
+        Con caché configurada sólo se leen los archivos nuevos o modificados.
+        """
+        if not self.cache_file:
+            return self.scanner.scan(directory, on_progress)
+        self.scanner.cache = HashCache(self.cache_file, HASH_VERSION)
+        try:
+            return self.scanner.scan(directory, on_progress)
+        finally:
+            self.scanner.cache.close()
+            self.scanner.cache = None
+
+
 class WantToPlaySearchStrategy(HashSearchStrategy):
     """Estrategia para búsqueda desde lista de deseos."""
     
@@ -84,84 +136,124 @@ class WantToPlaySearchStrategy(HashSearchStrategy):
             }
         self.data_manager = RetroAchievementsDataManager()
         self.missing_games = []
+        # Caché de la lista de deseos: se vuelve a leer sólo si cambia el archivo
+        self._cache_lock = threading.Lock()
+        self._cache_signature: Optional[Tuple[int, int, int]] = None  # (mtime_ns, tamaño, datos del catálogo)
+        self._games: Dict[str, Dict[str, Any]] = {}
+        self._games_by_console: Dict[str, List[str]] = {}
+        # juego -> (hash, región, rom_path) ganador del ranking de regiones
+        self._best_hashes: Dict[str, Tuple[Optional[str], Optional[str], Optional[str]]] = {}
+        self._region_ranks = {
+            region.upper(): rank for region, rank in self.PREFERRED_REGIONS.items()
+        }
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Devuelve la lista de deseos, releyéndola e indexándola sólo si el archivo
+        o el catálogo cambiaron (el ranking depende de qué hashes están en el catálogo)."""
+        stat = os.stat(self.want_to_play_file)
+        self.data_manager.load_data()
+        signature = (stat.st_mtime_ns, stat.st_size, self.data_manager.data_generation)
+        with self._cache_lock:
+            if signature != self._cache_signature:
+                with open(self.want_to_play_file, 'r', encoding='utf-8') as f:
+                    want_to_play_data = json.load(f)
+                self._index(want_to_play_data)
+                self._cache_signature = signature
+            return self._games
+    
+    def _index(self, want_to_play_data: Dict[str, Dict[str, Any]]):
+        """Construye los índices consola -> juegos y juego -> mejor hash (ranking de regiones)."""
+        games_by_console: Dict[str, List[str]] = {}
+        best_hashes = {}
+        # Todos los hashes candidatos de la lista se resuelven en una sola consulta
+        entries = self.data_manager.find_hash_entries({
+            hash_data['hash']
+            for game_data in want_to_play_data.values()
+            for hashes in game_data.get("regions", {}).values()
+            for hash_data in hashes if hash_data.get('hash')
+        })
+        for game_name, game_data in want_to_play_data.items():
+            console_name = game_data.get("console")
+            if console_name:
+                games_by_console.setdefault(console_name, []).append(game_name)
+            best_hashes[game_name] = self._select_best(game_data, entries)
+        self._games = want_to_play_data
+        self._games_by_console = games_by_console
+        self._best_hashes = best_hashes
     
     def search(self, game_identifier: str) -> Optional[GameInfo]:
         """Busca un juego desde la lista de deseos."""
         try:
-            with open(self.want_to_play_file, 'r', encoding='utf-8') as f:
-                want_to_play_data = json.load(f)
+            want_to_play_data = self._load()
         except Exception as e:
             self.console.print(f"[bold red]Error al cargar {self.want_to_play_file}: {e}[/bold red]")
             return None
         
         if game_identifier in want_to_play_data:
             game_data = want_to_play_data[game_identifier]
-            hash_value = self._select_best_hash(game_data)
+            hash_value, region, rom_path = self._best_hashes[game_identifier]
             
-            if hash_value:
-                rom_path = self.data_manager.find_hash(hash_value)
-                if rom_path:
-                    return GameInfo(
-                        name=game_identifier,
-                        console=game_data.get("console", "Unknown"),
-                        hash_value=hash_value,
-                        rom_path=rom_path,
-                        region=self._get_selected_region(game_data, hash_value)
-                    )
+            if hash_value and rom_path:
+                return GameInfo(
+                    name=game_identifier,
+                    console=game_data.get("console", "Unknown"),
+                    hash_value=hash_value,
+                    rom_path=rom_path,
+                    region=region
+                )
         
         return None
     
-    def _select_best_hash(self, game_data: Dict[str, Any]) -> Optional[str]:
-        """Selecciona el mejor hash basado en las preferencias de región."""
-        regions = game_data.get("regions", {})
-        if not regions:
-            return None
-        
-        # Buscar región preferida
-        selected_region = None
-        for preferred_region in self.PREFERRED_REGIONS:
-            if preferred_region.upper() in regions:
-                selected_region = preferred_region.upper()
-                break
-        
-        if not selected_region:
-            selected_region = list(regions.keys())[0]
-        
-        hashes = regions[selected_region]
-        
-        # Buscar hash preferido dentro de la región
-        for hash_data in hashes:
-            if any(preference in hash_data.get('name', '').upper() 
-                   for preference in self.PREFERRED_REGIONS.keys()):
-                return hash_data.get('hash')
-        
-        # Si no se encuentra un hash preferido, tomar el primero
-        if hashes:
-            return hashes[0].get('hash')
-        
-        return None
+    def _select_best(self, game_data: Dict[str, Any],
+                     entries: Dict[str, Optional[Tuple[str, str]]]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """Ordena todos los hashes del juego y devuelve el mejor como (hash, región, rom_path).
+
+        Criterios, de mayor a menor peso: que el hash esté en el catálogo, la
+        prioridad de la región (las no preferidas, en el orden de la lista), el
+        tipo de dump según analyze_rom_info (original [!], sin marcar,
+        traducción, hack), que el nombre mencione una región preferida y el
+        orden original. `entries` son los hashes ya resueltos: hash -> (game_id, rom_path).
+        """
+        best_key = None
+        best = (None, None, None)
+        fallback_rank = len(self.PREFERRED_REGIONS) + 1
+        for region_index, (region, hashes) in enumerate(game_data.get("regions", {}).items()):
+            region_rank = self._region_ranks.get(region.upper(), fallback_rank)
+            for position, hash_data in enumerate(hashes):
+                hash_value = hash_data.get('hash')
+                if not hash_value:
+                    continue
+                name = hash_data.get('name', '')
+                entry = entries.get(hash_value)
+                rom_path = entry[1] if entry else None
+                info = analyze_rom_info(rom_path or name)
+                name_upper = name.upper()
+                key = (
+                    rom_path is None,
+                    region_rank,
+                    region_index,
+                    self._dump_rank(info),
+                    not any(preference in name_upper for preference in self._region_ranks),
+                    position,
+                )
+                if best_key is None or key < best_key:
+                    best_key, best = key, (hash_value, region, rom_path)
+        return best
     
-    def _get_selected_region(self, game_data: Dict[str, Any], hash_value: str) -> Optional[str]:
-        """Obtiene la región del hash seleccionado."""
-        regions = game_data.get("regions", {})
-        for region, hashes in regions.items():
-            for hash_data in hashes:
-                if hash_data.get('hash') == hash_value:
-                    return region
-        return None
+    @staticmethod
+    def _dump_rank(info: Dict[str, Any]) -> int:
+        """Rango del tipo de dump (menor es mejor) a partir de los indicadores de analyze_rom_info."""
+        if info['is_hack']:
+            return 3
+        if info['is_translation']:
+            return 2
+        return 0 if info['is_original'] else 1
     
     def get_available_consoles(self) -> List[str]:
         """Obtiene lista de consolas disponibles en la lista de deseos."""
         try:
-            with open(self.want_to_play_file, 'r', encoding='utf-8') as f:
-                want_to_play_data = json.load(f)
-            
-            consoles = set()
-            for game_data in want_to_play_data.values():
-                console_name = game_data.get("console")
-                if console_name:
-                    consoles.add(console_name)
-            return list(consoles)
+            self._load()
+            return list(self._games_by_console)
         except Exception as e:
             self.console.print(f"[bold red]Error al cargar consolas: {e}[/bold red]")
             return []
@@ -169,14 +261,8 @@ class WantToPlaySearchStrategy(HashSearchStrategy):
     def get_games_for_console(self, console_name: str) -> List[str]:
         """Obtiene lista de juegos para una consola específica."""
         try:
-            with open(self.want_to_play_file, 'r', encoding='utf-8') as f:
-                want_to_play_data = json.load(f)
-            
-            games = []
-            for game_name, game_data in want_to_play_data.items():
-                if game_data.get("console") == console_name:
-                    games.append(game_name)
-            return games
+            self._load()
+            return list(self._games_by_console.get(console_name, []))
         except Exception as e:
             self.console.print(f"[bold red]Error al cargar juegos: {e}[/bold red]")
             return []
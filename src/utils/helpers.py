@@ -1,6 +1,7 @@
 """
 Utilidades comunes para el sistema.
 """
+import os
 from typing import List, Optional
 from rich.console import Console
 from rich.prompt import Prompt
@@ -65,6 +66,18 @@ class UIHelper:
         
         return hash_value
     
+    def get_directory_input(self) -> Optional[str]:
+        """Obtiene del usuario el directorio de la biblioteca a escanear."""
+        directory = Prompt.ask(
+            "Por favor, ingresa el directorio con tus ROMs (o escribe 'salir' para terminar)"
+        )
+        
+        if directory.lower() == 'salir':
+            self.console.print("[bold red]Saliendo...[/bold red]")
+            return None
+        
+        return os.path.expanduser(directory.strip().strip('"'))
+    
     def display_welcome_message(self, app_name: str):
         """Muestra mensaje de bienvenida."""
         self.console.print(f"[bold green]¡Bienvenido a {app_name}![/bold green]")
@@ -0,0 +1,84 @@
+"""
+Servidor HTTP local para las pruebas del motor de descarga.
+
+Sirve `server.files[ruta]` con soporte de `Range`/`If-Range` y permite simular
+los casos que el downloader tiene que aguantar: servidores que ignoran los
+rangos, archivos que cambian (ETag distinto) y conexiones que se cortan a
+mitad de la transferencia.
+"""
+import http.server
+import re
+import threading
+
+import pytest
+
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)$")
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        body = server.files.get(self.path)
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers)))
+        if body is None:
+            self.send_error(404)
+            return
+        etag = server.etags.get(self.path)
+        status, start, end = 200, 0, len(body) - 1
+
+        match = _RANGE.match(self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if match and self.path not in server.ignore_ranges and (if_range is None or if_range == etag):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), len(body) - 1) if match.group(2) else len(body) - 1
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Length", server.lengths.get(self.path, str(end + 1 - start)))
+        if self.path not in server.ignore_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if etag:
+            self.send_header("ETag", etag)
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+        self.end_headers()
+
+        payload = body[start:end + 1]
+        with server.lock:
+            cut = server.cuts.pop(self.path, None)  # Un solo corte por ruta
+        if cut is not None:
+            payload = payload[:cut]
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # El cliente abandonó la respuesta (descarga segmentada)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Servidor HTTP local. `files`: ruta -> bytes; `etags`: ruta -> ETag;
+    `ignore_ranges`: rutas que responden 200 completo; `cuts`: ruta -> bytes
+    enviados antes de cerrar la conexión (una vez); `lengths`: ruta ->
+    Content-Length anunciado en lugar del real; `requests`: (ruta, cabeceras)."""
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.files, httpd.etags, httpd.cuts, httpd.lengths = {}, {}, {}, {}
+    httpd.ignore_ranges = set()
+    httpd.requests = []
+    httpd.lock = threading.Lock()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
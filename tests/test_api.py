@@ -0,0 +1,72 @@
+"""
+Pruebas de la API web (api/index.py) con el cliente de pruebas de Flask y el
+catálogo real de Data/.
+"""
+import os
+
+import pytest
+
+CATALOGUE_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "Data", "TamperMonkeyRetroachievements.json")
+
+
+@pytest.fixture(scope="module")
+def client():
+    if not os.path.exists(CATALOGUE_JSON):
+        pytest.skip("Catálogo JSON no disponible")
+    from api.index import app
+    return app.test_client()
+
+
+# --- Caché HTTP ---------------------------------------------------------------------
+
+def test_get_lookup_is_revalidated_with_etag(client):
+    response = client.get("/get_game_versions?game_id=1")
+    etag = response.headers["ETag"]
+    assert "s-maxage=" in response.headers["Cache-Control"]
+
+    response = client.get("/get_game_versions?game_id=1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize("path, data", [
+    ("/get_game_versions", {"game_id": "1"}),
+    ("/search_games", {"search_term": "mario"}),
+    ("/api/lookup/games", {"game_id": "1"}),
+])
+def test_post_is_never_cached_nor_304(client, path, data):
+    etag = client.get(path, query_string=data).headers["ETag"]
+
+    response = client.post(path, data=data, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-store"
+    assert "ETag" not in response.headers
+
+
+# --- Consultas en bloque ------------------------------------------------------------
+
+@pytest.mark.parametrize("body, status, message", [
+    ('{"hashes": [', 400, "JSON válido"),
+    ('["abc"]', 400, "objeto JSON"),
+    ('{"hashes": "abc"}', 400, "lista"),
+    ('{"hashes": [true]}', 400, "textos o números"),
+    ('{"hashes": []}', 400, "ningún valor"),
+])
+def test_batch_lookup_rejects_bad_bodies(client, body, status, message):
+    response = client.post("/api/lookup/hashes", data=body, content_type="application/json")
+    assert response.status_code == status
+    assert message in response.get_json()["message"]
+
+
+# --- Búsqueda por nombre ------------------------------------------------------------
+
+def test_name_search_lists_only_matching_versions(client):
+    from api.index import get_versions_for_game, search_games_by_name
+    from src.core.name_index import normalize_name
+    from src.utils.rom_info import extract_game_name
+
+    game = next(g for g in search_games_by_name("alien crush") if g["name"] == "Alien Crush")
+    assert game["total_versions"] == len(game["versions"])
+    assert len(game["versions"]) < len(get_versions_for_game(game["id"]))
+    assert all("alien crush" in normalize_name(extract_game_name(v["rom_path"])) for v in game["versions"])
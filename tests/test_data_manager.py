@@ -0,0 +1,38 @@
+"""
+Pruebas de la carga de datos de RetroAchievementsDataManager desde varios hilos.
+"""
+import threading
+import time
+
+from src.core import data_manager
+from src.core.data_manager import RetroAchievementsDataManager
+
+
+def test_concurrent_cold_load_happens_once(monkeypatch):
+    manager = RetroAchievementsDataManager()
+    monkeypatch.setattr(manager, "_data", None)
+    monkeypatch.setattr(manager, "_generation", 0)
+    loads = []
+
+    def slow_load(*args, **kwargs):
+        loads.append(object())
+        time.sleep(0.05)  # Deja que los demás hilos lleguen mientras se carga
+        return loads[-1]
+
+    monkeypatch.setattr(data_manager, "load_catalogue", slow_load)
+    start = threading.Barrier(8)
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(manager.load_data())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(result is loads[0] for result in results)
+    assert manager.data_generation == 1
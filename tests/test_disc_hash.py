@@ -0,0 +1,329 @@
+"""
+Pruebas de los hashes de disco (disc_hash.py) con imágenes sintéticas.
+
+Las imágenes se generan aquí mismo: un ISO 9660 mínimo y sus variantes en
+bruto (2352 bytes por sector), CUE y CSO. El hash esperado se calcula
+directamente a partir de los datos de los archivos, siguiendo las reglas de
+rcheevos, sin pasar por el lector de ISO 9660 que se prueba.
+"""
+import hashlib
+import os
+import struct
+import zlib
+
+import pytest
+
+from src.core.disc_hash import (
+    MAX_HASHED_FILE, SECTOR_SIZE, CsoImage, find_file, hash_disc, is_disc_image, open_disc
+)
+from src.core.library_scan import RESULT_ERROR, RESULT_NO_MATCH, LibraryScanner, hash_file
+
+SYNC = b"\x00" + b"\xff" * 10 + b"\x00"
+
+
+# --- Generación de imágenes ----------------------------------------------------------
+
+def _pattern(seed: bytes, size: int) -> bytes:
+    """Datos deterministas (y poco compresibles) para el contenido de los archivos."""
+    out = bytearray()
+    counter = 0
+    while len(out) < size:
+        out += hashlib.sha256(seed + counter.to_bytes(4, "little")).digest()
+        counter += 1
+    return bytes(out[:size])
+
+
+def _sectors(size: int) -> int:
+    return max(1, (size + SECTOR_SIZE - 1) // SECTOR_SIZE)
+
+
+def _record(name: bytes, extent: int, size: int, directory: bool) -> bytes:
+    length = 33 + len(name) + (len(name) + 1) % 2  # Longitud par
+    record = bytearray(length)
+    record[0] = length
+    struct.pack_into("<I", record, 2, extent)  # Ambos órdenes de bytes, como en ISO 9660
+    struct.pack_into(">I", record, 6, extent)
+    struct.pack_into("<I", record, 10, size)
+    struct.pack_into(">I", record, 14, size)
+    record[25] = 2 if directory else 0
+    record[32] = len(name)
+    record[33:33 + len(name)] = name
+    return bytes(record)
+
+
+def build_iso(tree: dict) -> bytes:
+    """ISO 9660 mínimo. `tree`: nombre -> bytes (archivo) o dict (directorio)."""
+    layout = []  # (ruta del nodo, nodo, sector)
+    next_sector = 18
+
+    def allocate(node, path):
+        nonlocal next_sector
+        if isinstance(node, dict):
+            layout.append((path, node, next_sector))
+            next_sector += 1
+            for name, child in node.items():
+                allocate(child, path + (name,))
+        else:
+            layout.append((path, node, next_sector))
+            next_sector += _sectors(len(node))
+
+    allocate(tree, ())
+    sectors = {path: sector for path, _, sector in layout}
+    image = bytearray(next_sector * SECTOR_SIZE)
+
+    for path, node, sector in layout:
+        position = sector * SECTOR_SIZE
+        if isinstance(node, dict):
+            parent = sectors[path[:-1]] if path else sector
+            data = _record(b"\x00", sector, SECTOR_SIZE, True) + _record(b"\x01", parent, SECTOR_SIZE, True)
+            for name, child in node.items():
+                is_dir = isinstance(child, dict)
+                file_name = name.encode("ascii") + (b"" if is_dir else b";1")
+                data += _record(file_name, sectors[path + (name,)],
+                                SECTOR_SIZE if is_dir else len(child), is_dir)
+            assert len(data) <= SECTOR_SIZE
+        else:
+            data = node
+        image[position:position + len(data)] = data
+
+    volume = bytearray(SECTOR_SIZE)
+    volume[0:7] = b"\x01CD001\x01"
+    volume[156:156 + 34] = _record(b"\x00", sectors[()], SECTOR_SIZE, True)
+    image[16 * SECTOR_SIZE:17 * SECTOR_SIZE] = volume
+    return bytes(image)
+
+
+def to_raw(iso: bytes, mode: int) -> bytes:
+    """Convierte un ISO a sectores en bruto de 2352 bytes (modo 1, o modo 2 forma 1)."""
+    out = bytearray()
+    for number in range(len(iso) // SECTOR_SIZE):
+        data = iso[number * SECTOR_SIZE:(number + 1) * SECTOR_SIZE]
+        header = SYNC + bytes([0, 2, number % 75, mode])
+        if mode == 1:
+            sector = header + data + b"\xee" * 288  # EDC/ECC (su contenido no se hashea)
+        else:
+            sector = header + b"\x00\x00\x08\x00" * 2 + data + b"\xee" * 280
+        assert len(sector) == 2352
+        out += sector
+    return bytes(out)
+
+
+def to_cso(iso: bytes, block_size: int = SECTOR_SIZE) -> bytes:
+    """CSO v1 sin alineación: bloques pares comprimidos, impares guardados tal cual."""
+    header_size = 24
+    blocks = (len(iso) + block_size - 1) // block_size
+    offset = header_size + 4 * (blocks + 1)
+    index, payload = [], bytearray()
+    for number in range(blocks):
+        block = iso[number * block_size:(number + 1) * block_size]
+        if number % 2 == 0:
+            compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+            stored, flag = compressor.compress(block) + compressor.flush(), 0
+        else:
+            stored, flag = block, 0x80000000
+        index.append((offset + len(payload)) | flag)
+        payload += stored
+    index.append(offset + len(payload))
+    header = struct.pack("<4sIQIBB2x", b"CISO", header_size, len(iso), block_size, 1, 0)
+    return header + struct.pack(f"<{blocks + 1}I", *index) + bytes(payload)
+
+
+def _first_sector_rule(data: bytes, size: int) -> bytes:
+    """Bytes que rcheevos hashea de un archivo: al menos un sector completo, como mucho 64 MB."""
+    padded = data + b"\x00" * (SECTOR_SIZE - len(data) % SECTOR_SIZE)
+    return padded[:max(min(size, MAX_HASHED_FILE), SECTOR_SIZE)]
+
+
+def _ps1_executable(text_size: int) -> bytes:
+    header = bytearray(SECTOR_SIZE)
+    header[0:8] = b"PS-X EXE"
+    struct.pack_into("<I", header, 28, text_size)
+    return bytes(header) + bytes(range(256)) * (text_size // 256) + b"\x5a" * (text_size % 256)
+
+
+PS1_EXE = _ps1_executable(3000)
+PS1_TREE = {
+    "SYSTEM.CNF": b"BOOT = cdrom:\\SLUS_123.45;1\r\nTCB = 4\r\nEVENT = 10\r\n",
+    "SLUS_123.45": PS1_EXE + b"\x99" * 700,  # Relleno tras el ejecutable: no se hashea
+}
+PS1_DIGEST = hashlib.md5(b"SLUS_123.45" + PS1_EXE).hexdigest()
+
+PS2_ELF = b"\x7fELF" + _pattern(b"ps2", 5000)
+PS2_TREE = {
+    "SYSTEM.CNF": b"BOOT2 = cdrom0:\\SLES_500.01;1\r\nVER = 1.00\r\nVMODE = PAL\r\n",
+    "SLES_500.01": PS2_ELF,
+}
+PS2_DIGEST = hashlib.md5(b"SLES_500.01" + PS2_ELF).hexdigest()
+
+PSP_SFO = b"\x00PSF" + _pattern(b"sfo", 300)
+PSP_EBOOT = b"~PSP" + _pattern(b"eboot", 9000)
+PSP_TREE = {"PSP_GAME": {"PARAM.SFO": PSP_SFO, "SYSDIR": {"EBOOT.BIN": PSP_EBOOT}}}
+PSP_DIGEST = hashlib.md5(
+    _first_sector_rule(PSP_SFO, len(PSP_SFO)) + _first_sector_rule(PSP_EBOOT, len(PSP_EBOOT))
+).hexdigest()
+
+
+def _sega_cd_image(signature: bytes = b"SEGADISCSYSTEM  ") -> bytes:
+    header = bytearray(SECTOR_SIZE * 20)
+    header[0:16] = signature
+    header[16:512] = _pattern(signature, 496)
+    header[512:SECTOR_SIZE] = b"\x77" * (SECTOR_SIZE - 512)  # Fuera de los 512 bytes hasheados
+    return bytes(header)
+
+
+def _write(tmp_path, name: str, data: bytes) -> str:
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+# --- Algoritmos por consola --------------------------------------------------------
+
+@pytest.mark.parametrize("tree, console, digest", [
+    (PS1_TREE, "PS1", PS1_DIGEST),
+    (PS2_TREE, "PS2", PS2_DIGEST),
+    (PSP_TREE, "PSP", PSP_DIGEST),
+], ids=["ps1", "ps2", "psp"])
+def test_iso(tmp_path, tree, console, digest):
+    path = _write(tmp_path, "game.iso", build_iso(tree))
+    assert hash_disc(path) == (console, digest)
+
+
+def test_ps1_without_system_cnf_uses_psx_exe(tmp_path):
+    path = _write(tmp_path, "game.iso", build_iso({"PSX.EXE": PS1_EXE}))
+    assert hash_disc(path) == ("PS1", hashlib.md5(b"PSX.EXE" + PS1_EXE).hexdigest())
+
+
+@pytest.mark.parametrize("signature, console", [
+    (b"SEGADISCSYSTEM  ", "Sega CD"), (b"SEGA SEGASATURN ", "Saturn"),
+])
+def test_sega_cd_and_saturn(tmp_path, signature, console):
+    image = _sega_cd_image(signature)
+    path = _write(tmp_path, "game.iso", image)
+    assert hash_disc(path) == (console, hashlib.md5(image[:512]).hexdigest())
+
+
+def test_unknown_disc(tmp_path):
+    path = _write(tmp_path, "data.iso", build_iso({"README.TXT": b"hola"}))
+    assert hash_disc(path) is None
+
+
+def test_find_file_is_case_insensitive(tmp_path):
+    path = _write(tmp_path, "game.iso", build_iso(PSP_TREE))
+    with open_disc(path) as image:
+        sector, size = find_file(image, "psp_game/sysdir/eboot.bin")
+        assert size == len(PSP_EBOOT)
+        assert image.read(sector, size) == PSP_EBOOT
+        assert find_file(image, "PSP_GAME\\NOPE.BIN") is None
+
+
+# --- Formatos de imagen ------------------------------------------------------------
+
+@pytest.mark.parametrize("mode", [1, 2])
+def test_raw_bin(tmp_path, mode):
+    path = _write(tmp_path, "game.bin", to_raw(build_iso(PS1_TREE), mode))
+    assert is_disc_image(path)
+    assert hash_disc(path) == ("PS1", PS1_DIGEST)
+
+
+def test_cartridge_bin_is_not_a_disc(tmp_path):
+    path = _write(tmp_path, "game.bin", _pattern(b"cart", 4096))
+    assert not is_disc_image(path)
+
+
+def test_raw_sega_cd(tmp_path):
+    image = _sega_cd_image()
+    path = _write(tmp_path, "game.bin", to_raw(image, 1))
+    assert hash_disc(path) == ("Sega CD", hashlib.md5(image[:512]).hexdigest())
+
+
+@pytest.mark.parametrize("mode, track", [(1, "MODE1/2352"), (2, "MODE2/2352")])
+def test_cue_data_track_after_audio(tmp_path, mode, track):
+    # Pista de audio de 5 sectores delante: la pista de datos empieza en INDEX 01 00:00:05
+    audio = b"\x11" * (5 * 2352)
+    _write(tmp_path, "Game (Track 1).bin", audio + to_raw(build_iso(PS1_TREE), mode))
+    cue = _write(tmp_path, "game.cue", (
+        'FILE "Game (Track 1).bin" BINARY\n'
+        '  TRACK 01 AUDIO\n'
+        '    INDEX 01 00:00:00\n'
+        f'  TRACK 02 {track}\n'
+        '    INDEX 00 00:00:03\n'
+        '    INDEX 01 00:00:05\n'
+    ).encode())
+    assert hash_disc(cue) == ("PS1", PS1_DIGEST)
+
+
+def test_cue_with_one_file_per_track(tmp_path):
+    _write(tmp_path, "Game (Track 1).bin", to_raw(build_iso(PS2_TREE), 2))
+    _write(tmp_path, "Game (Track 2).bin", b"\x00" * 2352 * 4)
+    cue = _write(tmp_path, "game.cue", (
+        'FILE "Game (Track 1).bin" BINARY\n'
+        '  TRACK 01 MODE2/2352\n'
+        '    INDEX 01 00:00:00\n'
+        'FILE "Game (Track 2).bin" BINARY\n'
+        '  TRACK 02 AUDIO\n'
+        '    INDEX 01 00:00:00\n'
+    ).encode())
+    assert hash_disc(cue) == ("PS2", PS2_DIGEST)
+
+
+def test_cue_without_data_track(tmp_path):
+    _write(tmp_path, "audio.bin", b"\x00" * 2352 * 4)
+    cue = _write(tmp_path, "audio.cue", b'FILE "audio.bin" BINARY\n  TRACK 01 AUDIO\n    INDEX 01 00:00:00\n')
+    assert hash_disc(cue) is None
+
+
+@pytest.mark.parametrize("block_size", [SECTOR_SIZE, 4 * SECTOR_SIZE])
+def test_cso(tmp_path, block_size):
+    iso = build_iso(PSP_TREE)
+    path = _write(tmp_path, "game.cso", to_cso(iso, block_size))
+    with CsoImage(path) as image:
+        assert image.read(0, len(iso)) == iso
+    assert hash_disc(path) == ("PSP", PSP_DIGEST)
+
+
+def test_cso_truncated_index(tmp_path):
+    data = to_cso(build_iso(PSP_TREE))
+    path = _write(tmp_path, "game.cso", data[:30])
+    with pytest.raises(ValueError):
+        hash_disc(path)
+
+
+def test_cso_corrupt_block(tmp_path):
+    data = bytearray(to_cso(build_iso(PSP_TREE)))
+    first_block = struct.unpack_from("<I", data, 24)[0]
+    data[first_block:first_block + 64] = b"\xff" * 64  # Deflate inválido en el bloque 0
+    path = _write(tmp_path, "game.cso", bytes(data))
+    with pytest.raises(ValueError):
+        hash_disc(path)
+
+
+# --- Escáner -----------------------------------------------------------------------
+
+class _EmptyCatalogue:
+    def find_hash_entries(self, hashes):
+        return {}
+
+
+def test_hash_file_reads_only_needed_sectors(tmp_path):
+    path = _write(tmp_path, "game.iso", build_iso(PS2_TREE))
+    with open(path, "r+b") as file:
+        file.truncate(256 * 1024 * 1024)  # Imagen grande y dispersa
+    result = hash_file(path)
+    assert result.error is None
+    assert result.digests == [PS2_DIGEST]
+    assert result.read_bytes < 1024 * 1024 < result.size
+
+
+def test_scan_survives_corrupt_images(tmp_path):
+    _write(tmp_path, "garbage.cso", _pattern(b"cso", 4096))
+    _write(tmp_path, "short.cso", b"CISO")
+    _write(tmp_path, "broken.zip", b"PK\x03\x04" + _pattern(b"zip", 200))
+    _write(tmp_path, "game.iso", build_iso(PS1_TREE))
+    report = LibraryScanner(_EmptyCatalogue(), workers=1).scan(str(tmp_path))
+    statuses = {os.path.basename(result.path): result.status for result in report.results}
+    assert statuses["garbage.cso"] == RESULT_ERROR
+    assert statuses["short.cso"] == RESULT_ERROR
+    assert statuses["game.iso"] == RESULT_NO_MATCH
+    iso = next(result for result in report.results if result.path.endswith("game.iso"))
+    assert iso.md5 == PS1_DIGEST
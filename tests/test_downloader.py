@@ -0,0 +1,313 @@
+"""
+Pruebas del motor de descarga (downloader.py y segmented_download.py) contra
+el servidor HTTP local de conftest.py: reanudación desde el `.part` y su diario,
+`If-Range` con un archivo que cambió, respuestas 416 y 200 en lugar de 206,
+conexiones cortadas, descarga por piezas y fallos de un juego dentro de un lote.
+"""
+import asyncio
+import hashlib
+import os
+
+from src.core.downloader import MISMATCH_SUFFIX, PART_SUFFIX, DownloadTask, HTTPDownloader, PartJournal
+from src.core.interfaces import GameInfo
+from src.core.pipeline import BatchPipeline
+from src.core.segmented_download import preallocate
+from src.factories.url_factory import URLGeneratorFactory
+
+PIECE = 16 * 1024
+
+
+def _rom(seed: bytes, size: int) -> bytes:
+    out = bytearray()
+    counter = 0
+    while len(out) < size:
+        out += hashlib.sha256(seed + counter.to_bytes(4, "little")).digest()
+        counter += 1
+    return bytes(out[:size])
+
+
+def _downloader(**options) -> HTTPDownloader:
+    settings = dict(max_workers=2, chunk_size=1024, journal_interval=4096, max_attempts=1,
+                    requests_per_second=0, retry_base_delay=0, retry_max_delay=0,
+                    segment_threshold=1024 * 1024 * 1024, piece_size=PIECE,
+                    min_segments=2, max_segments=4)
+    settings.update(options)
+    return HTTPDownloader(**settings)
+
+
+def _segmented(**options) -> HTTPDownloader:
+    return _downloader(segment_threshold=4 * PIECE, **options)
+
+
+def _task(server, tmp_path, rom: bytes, name: str = "Game.gb") -> DownloadTask:
+    server.files["/" + name] = rom
+    game = GameInfo("Game", "Game Boy", hashlib.md5(rom).hexdigest(), "Game Boy/" + name)
+    return DownloadTask(f"{server.url}/{name}", str(tmp_path / name), game)
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def _ranges(server, path: str):
+    return [headers.get("Range") for request_path, headers in server.requests if request_path == path]
+
+
+def _assert_complete(task: DownloadTask, rom: bytes):
+    assert _read(task.destination) == rom
+    assert not os.path.exists(task.destination + PART_SUFFIX)
+    assert not os.path.exists(PartJournal.path_for(task.destination))
+
+
+def _write_partial(task: DownloadTask, data: bytes, **journal):
+    with open(task.destination + PART_SUFFIX, "wb") as file:
+        file.write(data)
+    PartJournal(task.url, offset=len(data), **journal).save(task.destination)
+
+
+# --- Descarga y reanudación ---------------------------------------------------------
+
+def test_download_verifies_and_renames(server, tmp_path):
+    rom = _rom(b"plain", 20000)
+    task = _task(server, tmp_path, rom)
+    result = _downloader().download(task)
+
+    assert result.success and result.verified is True and result.resumed_from == 0
+    assert result.bytes_written == len(rom)
+    _assert_complete(task, rom)
+
+
+def test_resume_from_part_and_journal(server, tmp_path):
+    rom = _rom(b"resume", 30000)
+    task = _task(server, tmp_path, rom)
+    server.etags["/Game.gb"] = '"v1"'
+    _write_partial(task, rom[:12000], etag='"v1"', total_size=len(rom))
+
+    result = _downloader().download(task)
+
+    assert result.success and result.verified is True
+    assert result.resumed_from == 12000 and result.bytes_written == len(rom) - 12000
+    headers = server.requests[-1][1]
+    assert headers["Range"] == "bytes=12000-" and headers["If-Range"] == '"v1"'
+    _assert_complete(task, rom)
+
+
+def test_changed_validator_restarts_from_zero(server, tmp_path):
+    rom = _rom(b"new", 30000)
+    task = _task(server, tmp_path, rom)
+    server.etags["/Game.gb"] = '"v2"'
+    # El parcial es de una versión anterior del archivo: If-Range hace que llegue entero
+    _write_partial(task, _rom(b"old", 12000), etag='"v1"', total_size=len(rom))
+
+    result = _downloader().download(task)
+
+    assert server.requests[-1][1]["If-Range"] == '"v1"'
+    assert result.success and result.verified is True and result.resumed_from == 0
+    _assert_complete(task, rom)
+
+
+def test_server_ignoring_range_restarts_from_zero(server, tmp_path):
+    rom = _rom(b"norange", 30000)
+    task = _task(server, tmp_path, rom)
+    server.ignore_ranges.add("/Game.gb")
+    _write_partial(task, rom[:12000], total_size=len(rom))
+
+    result = _downloader().download(task)
+
+    assert _ranges(server, "/Game.gb") == ["bytes=12000-"]
+    assert result.success and result.verified is True and result.resumed_from == 0
+    _assert_complete(task, rom)
+
+
+def test_416_on_complete_part_finishes_without_downloading(server, tmp_path):
+    rom = _rom(b"complete", 30000)
+    task = _task(server, tmp_path, rom)
+    _write_partial(task, rom, total_size=len(rom))
+
+    result = _downloader().download(task)
+
+    assert result.success and result.verified is True
+    assert result.bytes_written == 0 and result.resumed_from == len(rom)
+    _assert_complete(task, rom)
+
+
+def test_cut_transfer_is_retried_from_journal(server, tmp_path):
+    rom = _rom(b"cut", 60000)
+    task = _task(server, tmp_path, rom)
+    server.cuts["/Game.gb"] = 25000
+
+    result = _downloader(max_attempts=2).download(task)
+
+    first, second = _ranges(server, "/Game.gb")
+    assert first is None and second.startswith("bytes=")
+    offset = int(second[len("bytes="):-1])
+    assert 0 < offset <= 25000
+    assert result.success and result.verified is True and result.resumed_from == offset
+    _assert_complete(task, rom)
+
+
+def test_cut_transfer_keeps_part_for_next_run(server, tmp_path):
+    rom = _rom(b"later", 60000)
+    task = _task(server, tmp_path, rom)
+    server.cuts["/Game.gb"] = 25000
+
+    result = _downloader().download(task)
+
+    assert not result.success and not os.path.exists(task.destination)
+    journal = PartJournal.load(task.destination)
+    assert 0 < journal.offset <= 25000
+    assert _read(task.destination + PART_SUFFIX)[:journal.offset] == rom[:journal.offset]
+
+    result = _downloader().download(task)
+    assert result.success and result.resumed_from == journal.offset
+    _assert_complete(task, rom)
+
+
+# --- Descarga por piezas ------------------------------------------------------------
+
+def _piece_ranges(server, path: str):
+    return sorted(r for r in _ranges(server, path) if r is not None)
+
+
+def test_segmented_download(server, tmp_path):
+    rom = _rom(b"segments", 5 * PIECE + 1000)
+    task = _task(server, tmp_path, rom, "Disc.gb")
+
+    result = _segmented().download(task)
+
+    assert result.success and result.verified is True
+    expected = sorted(f"bytes={p * PIECE}-{min((p + 1) * PIECE, len(rom)) - 1}" for p in range(6))
+    assert _piece_ranges(server, "/Disc.gb") == expected
+    _assert_complete(task, rom)
+
+
+def test_segmented_resume_requests_only_missing_pieces(server, tmp_path):
+    rom = _rom(b"pieces", 5 * PIECE + 1000)
+    task = _task(server, tmp_path, rom, "Disc.gb")
+    server.etags["/Disc.gb"] = '"v1"'
+    part_path = task.destination + PART_SUFFIX
+    preallocate(part_path, len(rom))
+    with open(part_path, "r+b") as file:
+        for piece in (0, 2):
+            file.seek(piece * PIECE)
+            file.write(rom[piece * PIECE:(piece + 1) * PIECE])
+    PartJournal(task.url, etag='"v1"', total_size=len(rom),
+                piece_size=PIECE, pieces_done=[0, 2]).save(task.destination)
+
+    result = _segmented().download(task)
+
+    assert result.success and result.verified is True and result.resumed_from == 2 * PIECE
+    headers = [h for path, h in server.requests if path == "/Disc.gb"]
+    assert all(h.get("If-Range") == '"v1"' for h in headers)
+    assert sorted(h["Range"] for h in headers) == sorted(
+        f"bytes={p * PIECE}-{min((p + 1) * PIECE, len(rom)) - 1}" for p in (1, 3, 4, 5)
+    )
+    _assert_complete(task, rom)
+
+
+def test_segmented_cut_piece_is_retried(server, tmp_path):
+    rom = _rom(b"segcut", 5 * PIECE + 1000)
+    task = _task(server, tmp_path, rom, "Disc.gb")
+    downloader = _segmented(max_attempts=3)
+    original = downloader._fetch_segmented
+    attempts = []
+
+    def cut_first_piece(*args, **kwargs):
+        # La petición inicial (sin Range) ya terminó: el corte afecta a la primera pieza
+        if not attempts:
+            server.cuts["/Disc.gb"] = PIECE // 2
+        attempts.append(args[3].pieces_done[:])
+        return original(*args, **kwargs)
+
+    downloader._fetch_segmented = cut_first_piece
+    result = downloader.download(task)
+
+    assert result.success and result.verified is True
+    assert len(attempts) == 2 and len(attempts[1]) < 6  # Reintento desde las piezas registradas
+    # Cada pieza se pide una vez, salvo la cortada (que se pide de nuevo)
+    assert len(_piece_ranges(server, "/Disc.gb")) == 7
+    _assert_complete(task, rom)
+
+
+def test_segmented_bookkeeping_error_is_not_a_mismatch(server, tmp_path, monkeypatch):
+    rom = _rom(b"journal", 5 * PIECE + 1000)
+    task = _task(server, tmp_path, rom, "Disc.gb")
+    save = PartJournal.save
+    calls = []
+
+    def failing_save(journal, destination):
+        calls.append(destination)
+        if len(calls) == 3:  # Al registrar la segunda pieza
+            raise OSError("Disco lleno")
+        save(journal, destination)
+
+    monkeypatch.setattr(PartJournal, "save", failing_save)
+    result = _segmented().download(task)
+
+    # Un error local no es un MD5 distinto: nada se aparta como .mismatch
+    assert not result.success and result.verified is None
+    assert "Disco lleno" in result.error
+    assert not os.path.exists(task.destination + MISMATCH_SUFFIX)
+    assert os.path.exists(task.destination + PART_SUFFIX)
+
+    monkeypatch.setattr(PartJournal, "save", save)
+    result = _segmented().download(task)
+    assert result.success and result.verified is True and result.resumed_from > 0
+    _assert_complete(task, rom)
+
+
+# --- Errores de un juego dentro de un lote ------------------------------------------
+
+def test_malformed_content_length_is_unknown_size(server, tmp_path):
+    rom = _rom(b"length", 20000)
+    task = _task(server, tmp_path, rom)
+    server.lengths["/Game.gb"] = "20000abc"
+
+    result = _downloader().download(task)
+
+    assert result.success and result.verified is True
+    _assert_complete(task, rom)
+
+
+def _batch(server, tmp_path):
+    roms = {name: _rom(name.encode(), 5000) for name in ("A.gb", "Broken.gb", "C.gb")}
+    return roms, [_task(server, tmp_path, rom, name) for name, rom in roms.items()]
+
+
+def _break_one(monkeypatch, downloader: HTTPDownloader):
+    download = downloader.download
+
+    def flaky_download(task):
+        if task.destination.endswith("Broken.gb"):
+            raise ValueError("fallo inesperado")
+        return download(task)
+
+    monkeypatch.setattr(downloader, "download", flaky_download)
+
+
+def test_download_all_survives_unexpected_errors(server, tmp_path, monkeypatch):
+    roms, tasks = _batch(server, tmp_path)
+    downloader = _downloader()
+    _break_one(monkeypatch, downloader)
+
+    results = {os.path.basename(r.task.destination): r for r in downloader.download_all(tasks)}
+
+    assert not results["Broken.gb"].success and results["Broken.gb"].error == "fallo inesperado"
+    assert results["A.gb"].success and results["C.gb"].success
+
+
+def test_pipeline_survives_unexpected_errors(server, tmp_path, monkeypatch):
+    roms, tasks = _batch(server, tmp_path)
+    games = {task.game.rom_path: task.game for task in tasks}
+    downloader = _downloader()
+    _break_one(monkeypatch, downloader)
+    pipeline = BatchPipeline(games.get, downloader, str(tmp_path / "lote"))
+    pipeline_urls = {task.game.rom_path: task.url for task in tasks}
+    monkeypatch.setattr(URLGeneratorFactory, "generate_url", pipeline_urls.get)
+
+    results = asyncio.run(pipeline.run(list(games)))
+
+    by_name = {os.path.basename(r.task.destination): r for r in results}
+    assert not by_name["Broken.gb"].success and by_name["Broken.gb"].error == "fallo inesperado"
+    assert by_name["A.gb"].success and by_name["C.gb"].success
@@ -0,0 +1,245 @@
+"""
+Pruebas de la verificación MD5 en streaming (verification.py) y de lo que hace
+el downloader cuando el MD5 no coincide.
+
+Las ROMs son sintéticas; el hash esperado es el que calcula RetroAchievements
+(MD5 de la ROM sin su cabecera opcional), obtenido aquí directamente de los
+datos. Las consolas se comprueban contra las carpetas reales del catálogo.
+"""
+import hashlib
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from src.core.downloader import MISMATCH_SUFFIX, PART_SUFFIX, DownloadTask, HTTPDownloader
+from src.core.interfaces import GameInfo
+from src.core.verification import (
+    HEADER_RULES, PLAIN_MD5_CONSOLES, StreamingVerifier, _ZipStream, verifier_for
+)
+from src.utils.rom_info import get_console_from_rom_path
+
+CATALOGUE_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "Data", "TamperMonkeyRetroachievements.json")
+
+
+def _rom(seed: bytes, size: int) -> bytes:
+    out = bytearray()
+    counter = 0
+    while len(out) < size:
+        out += hashlib.sha256(seed + counter.to_bytes(4, "little")).digest()
+        counter += 1
+    return bytes(out[:size])
+
+
+def _md5(data: bytes) -> str:
+    return hashlib.md5(data).hexdigest()
+
+
+def _header(console: str) -> bytes:
+    """Cabecera válida para la regla de la consola (firma en su posición)."""
+    size, offset, magic = HEADER_RULES[console]
+    header = bytearray(_rom(b"header" + console.encode(), size))
+    if magic:
+        header[offset:offset + len(magic[0])] = magic[0]
+    return bytes(header)
+
+
+def _feed(verifier, data: bytes, chunk: int):
+    for position in range(0, len(data), chunk):
+        verifier.update(data[position:position + chunk])
+    return verifier
+
+
+def _zip(members, compression=zipfile.ZIP_DEFLATED, streamed=False, force_zip64=False) -> bytes:
+    """Crea un .zip en memoria. `streamed`: sin seek, con descriptores tras cada entrada."""
+    buffer = io.BytesIO()
+    target = buffer
+    if streamed:
+        class _Unseekable(io.RawIOBase):
+            def writable(self):
+                return True
+
+            def write(self, data):
+                return buffer.write(data)
+
+        target = _Unseekable()
+    with zipfile.ZipFile(target, "w", compression) as archive:
+        for name, data in members:
+            info = zipfile.ZipInfo(name)
+            info.compress_type = compression
+            with archive.open(info, "w", force_zip64=force_zip64) as member:
+                member.write(data)
+    return buffer.getvalue()
+
+
+# --- Reglas de cabecera ------------------------------------------------------------
+
+@pytest.mark.parametrize("console", sorted(HEADER_RULES))
+@pytest.mark.parametrize("chunk", [1, 7, 4096])
+def test_headered_rom_matches_headerless_hash(console, chunk):
+    body = _rom(console.encode(), 3000)
+    verifier = StreamingVerifier(_md5(body).upper(), HEADER_RULES[console])
+    assert _feed(verifier, _header(console) + body, chunk).matches() is True
+
+
+@pytest.mark.parametrize("console", sorted(HEADER_RULES))
+def test_unheadered_rom_matches_full_hash(console):
+    body = _rom(console.encode(), 3000)
+    verifier = StreamingVerifier(_md5(body), HEADER_RULES[console])
+    assert _feed(verifier, body, 1000).matches() is True
+
+
+@pytest.mark.parametrize("console", sorted(c for c, rule in HEADER_RULES.items() if rule[2]))
+def test_header_signature_is_required(console):
+    # Sin la firma, quitar los primeros bytes no es un candidato válido
+    size = HEADER_RULES[console][0]
+    data = b"\x00" * size + _rom(console.encode(), 3000)
+    verifier = StreamingVerifier(_md5(data[size:]), HEADER_RULES[console])
+    assert _feed(verifier, data, 512).matches() is False
+
+
+def test_atari_7800_signature_offset():
+    body = _rom(b"a78", 2048)
+    header = bytearray(128)
+    header[1:10] = b"ATARI7800"
+    verifier = StreamingVerifier(_md5(body), HEADER_RULES['Atari 7800'])
+    assert _feed(verifier, bytes(header) + body, 100).matches() is True
+
+
+def test_plain_rom_mismatch():
+    data = _rom(b"gba", 5000)
+    verifier = StreamingVerifier(_md5(data + b"x"), None)
+    assert _feed(verifier, data, 333).matches() is False
+
+
+def test_rom_shorter_than_zip_signature():
+    verifier = StreamingVerifier(_md5(b"ab"), None)
+    verifier.update(b"ab")
+    assert verifier.matches() is True
+
+
+# --- Consolas ----------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def catalogue_consoles():
+    if not os.path.exists(CATALOGUE_JSON):
+        pytest.skip("Catálogo JSON no disponible")
+    with open(CATALOGUE_JSON, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    return {
+        get_console_from_rom_path(rom_path): rom_path
+        for hash_list in data.values() for item in hash_list for rom_path in item.values()
+    }
+
+
+def test_rule_consoles_exist_in_catalogue(catalogue_consoles):
+    # Un nombre mal escrito dejaría la consola sin verificar (o con la regla equivocada)
+    assert set(HEADER_RULES) <= set(catalogue_consoles)
+    assert PLAIN_MD5_CONSOLES <= set(catalogue_consoles)
+    assert not set(HEADER_RULES) & PLAIN_MD5_CONSOLES
+
+
+@pytest.mark.parametrize("console", ["PS1", "PS2", "PSP", "Sega CD", "Saturn", "Dreamcast",
+                                     "ARCADE", "N64", "Nintendo DS", "Arduboy"])
+def test_consoles_without_plain_md5_are_not_verified(catalogue_consoles, console):
+    rom_path = catalogue_consoles[console]
+    assert verifier_for(GameInfo("x", console, "0" * 32, rom_path)) is None
+
+
+def test_verifier_for_uses_console_rule(catalogue_consoles):
+    nes = verifier_for(GameInfo("x", "NES", "0" * 32, catalogue_consoles["NES"]))
+    gba = verifier_for(GameInfo("x", "GBA", "0" * 32, catalogue_consoles["Game Boy Advance"]))
+    assert nes.header == HEADER_RULES["NES"]
+    assert gba is not None and gba.header is None
+
+
+# --- .zip en streaming -------------------------------------------------------------
+
+@pytest.mark.parametrize("compression, streamed", [
+    (zipfile.ZIP_DEFLATED, False), (zipfile.ZIP_STORED, False), (zipfile.ZIP_DEFLATED, True),
+], ids=["deflated", "stored", "deflated-descriptor"])
+@pytest.mark.parametrize("chunk", [1, 13, 65536])
+def test_zip_members(compression, streamed, chunk):
+    roms = [("Game (USA).gba", _rom(b"one", 70000)), ("extra/Game (Beta).gba", _rom(b"two", 1234))]
+    data = _zip([("extra/", b"")] + roms, compression, streamed)
+    stream = _feed(_ZipStream(None), data, chunk)
+    assert stream.supported
+    assert stream.digests == [_md5(rom) for _, rom in roms]
+    verifier = _feed(StreamingVerifier(_md5(roms[1][1]), None), data, chunk)
+    assert verifier.matches() is True
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED])
+def test_zip64_member(compression):
+    rom = _rom(b"zip64", 50000)
+    data = _zip([("Game.gb", rom)], compression, force_zip64=True)
+    assert _feed(_ZipStream(None), data, 4096).digests == [_md5(rom)]
+
+
+def test_zip_with_headered_rom():
+    body = _rom(b"nes", 40960)
+    data = _zip([("Game (USA).nes", _header("NES") + body)])
+    verifier = _feed(StreamingVerifier(_md5(body), HEADER_RULES["NES"]), data, 1000)
+    assert verifier.matches() is True
+
+
+def test_zip_highly_compressible():
+    rom = b"\x00" * (8 * 1024 * 1024)
+    data = _zip([("Blank.gb", rom)])
+    assert _feed(StreamingVerifier(_md5(rom), None), data, 65536).matches() is True
+
+
+def test_zip_stored_with_descriptor_is_not_verified():
+    # Entrada sin comprimir y sin tamaño en la cabecera local: no se sabe dónde termina
+    data = _zip([("Game.gb", _rom(b"st", 5000))], zipfile.ZIP_STORED, streamed=True)
+    assert _feed(StreamingVerifier(_md5(b""), None), data, 1000).matches() is None
+
+
+def test_zip_unsupported_method_is_not_verified():
+    data = _zip([("Game.gb", _rom(b"bz", 5000))], zipfile.ZIP_BZIP2)
+    assert _feed(StreamingVerifier(_md5(b""), None), data, 1000).matches() is None
+
+
+def test_zip_without_content_check_is_not_verified():
+    data = _zip([("Game.gb", _rom(b"opaque", 5000))])
+    verifier = StreamingVerifier(_md5(data), None, zip_content=False)
+    assert _feed(verifier, data, 1000).matches() is None
+
+
+# --- Downloader: MD5 distinto --------------------------------------------------------
+
+def _downloader():
+    return HTTPDownloader(max_workers=1, verify_attempts=2, max_attempts=1,
+                          requests_per_second=0, retry_base_delay=0)
+
+
+def test_mismatch_is_kept_not_deleted(server, tmp_path):
+    rom = _rom(b"gb", 10000)
+    server.files["/Game.gb"] = rom
+    destination = str(tmp_path / "Game.gb")
+    game = GameInfo("Game", "Game Boy", _md5(b"otra rom"), "Game Boy/Game.gb")
+    result = _downloader().download(DownloadTask(server.url + "/Game.gb", destination, game))
+
+    assert not result.success and result.verified is False
+    assert not os.path.exists(destination)
+    assert not os.path.exists(destination + PART_SUFFIX)
+    with open(destination + MISMATCH_SUFFIX, "rb") as file:
+        assert file.read() == rom
+
+
+def test_verified_download_discards_previous_mismatch(server, tmp_path):
+    rom = _rom(b"gb", 10000)
+    server.files["/Game.gb"] = rom
+    destination = str(tmp_path / "Game.gb")
+    with open(destination + MISMATCH_SUFFIX, "wb") as file:
+        file.write(b"intento anterior")
+    game = GameInfo("Game", "Game Boy", _md5(rom), "Game Boy/Game.gb")
+    result = _downloader().download(DownloadTask(server.url + "/Game.gb", destination, game))
+
+    assert result.success and result.verified is True
+    assert not os.path.exists(destination + MISMATCH_SUFFIX)
+    with open(destination, "rb") as file:
+        assert file.read() == rom